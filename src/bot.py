@@ -1,9 +1,10 @@
 import os
+import asyncio
 import discord
-import pandas as pd
 from discord.ext import commands
 from utils.sheets.GoogleSheetUtils import GoogleSheetUtils
-from utils.sheets.LocalSheetUtils import LocalSheetUtils
+from utils.sheets.GameStateStore import GameStateStore
+from utils.pathfinding.PathfindingUtils import PathfindingUtils
 import settings as settings
 
 intents = discord.Intents.all()
@@ -14,13 +15,14 @@ cogs: list = [
     "controllers.AdminController",
     "controllers.ArmyController", 
     "controllers.background.MovementBackgroundController",
-    "controllers.background.StatusBackgroundController"
+    "controllers.background.StatusBackgroundController",
+    "controllers.background.MapBackgroundController",
+    "controllers.background.StateBackgroundController"
 ]
 
-client = commands.Bot(command_prefix=settings.Prefix, help_command=None, intents=intents)
-sheet_utils = GoogleSheetUtils()
+# Built under __main__ below: pathfinding worker processes are spawned and import this module again.
+client = None
 
-@client.event
 async def on_ready():
     # Use a fallback for BotStatus
     await client.change_presence(
@@ -46,7 +48,7 @@ async def on_ready():
 
 async def download_sheets():
     google_sheet_utils = GoogleSheetUtils()
-    local_sheet_utils = LocalSheetUtils()
+    game_state_store = GameStateStore()
     # Download sheets.
     sheet_names = ["Status", "Movements", "Armies", "StatusTimers", "Map", "Seasons"]
 
@@ -54,8 +56,12 @@ async def download_sheets():
         data = google_sheet_utils.get_sheet_by_name(sheet)
         if data:
             print(f"Downloading {sheet}.")
-            # Use LocalSheetUtils to write the data safely.
-            local_sheet_utils.update_sheet_by_name(sheet, data)
+            # Game state sheets replace the in-memory copy, the Map is written straight to CSV.
+            if game_state_store.update_sheet_by_name(sheet, data) and sheet == "Map":
+                # New Map version: build the graph off the event loop and swap it in.
+                await asyncio.to_thread(PathfindingUtils().reload_map)
+    # Persist the downloaded game state now rather than on the next flush.
+    await asyncio.to_thread(game_state_store.flush)
 
 async def notify_game_master():
     # Fetch the GameMaster's user and send a notification
@@ -71,15 +77,18 @@ async def notify_game_master():
         print(f"Error: Unable to fetch user with ID {id}. Exception: {e}")
 
 async def get_game_status():
-    file_path = "src/sheets/Status.csv"
     try:
-        # Let pandas use the first row as header
-        df = pd.read_csv(file_path, encoding='utf-8')
+        df = GameStateStore().get_sheet_by_name("Status")
         # Return the value in the 'Game Status' column from the first row
         return df.iloc[0]["Game Status"]
     except Exception as e:
-        print(f"Error reading game status from {file_path}: {e}")
+        print(f"Error reading game status: {e}")
         return None
 
-# Use a fallback for TOKEN in case it's not in the environment
-client.run(os.environ.get("TOKEN", settings.TOKEN))
+if __name__ == "__main__":
+    client = commands.Bot(command_prefix=settings.Prefix, help_command=None, intents=intents)
+    client.event(on_ready)
+    # Use a fallback for TOKEN in case it's not in the environment
+    client.run(os.environ.get("TOKEN", settings.TOKEN))
+    # Write any game state changed since the last flush before exiting.
+    GameStateStore().flush()
@@ -1,3 +1,4 @@
+import asyncio
 from discord.ext import commands
 from services.AdminService import AdminService
 from time import gmtime, strftime
@@ -26,10 +27,17 @@ class AdminController(commands.Cog):
     async def download(self, ctx):
         success = self.admin_service.download_google_sheets()
         if success:
+            # Swap the new Map in straight away rather than waiting for the Map watcher.
+            await asyncio.to_thread(self.admin_service.reload_map)
             await ctx.send(f"Download Successful :)")
         else:
             await ctx.send(f"Download Failed :(")
 
+    @commands.command(name="pathfinding-stats")
+    @commands.has_permissions(administrator=True)
+    async def pathfinding_stats(self, ctx):
+        await ctx.send(embed=self.admin_service.get_pathfinding_stats_embed())
+
     @commands.command()
     @commands.has_permissions(administrator=True)
     async def pause(self, ctx):
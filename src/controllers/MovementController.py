@@ -15,6 +15,17 @@ class MovementController(commands.Cog):
         else:
             await ctx.send("**Success! Good Boy :)**")
 
+    @commands.has_permissions(administrator=True)
+    @commands.command(name="movements-bulk")
+    async def movements_bulk(self, ctx):
+        result = await self.movement_service.create_bulk_template_movements(ctx)
+        if result is None:
+            await ctx.send("**You gone fucked up cuh**")
+            return
+
+        created, received = result
+        await ctx.send(f"**Queued {created} of {received} movements :)**")
+
     @commands.command()
     async def movements(self, ctx):
         if ctx.author.guild_permissions.administrator:
@@ -48,6 +59,15 @@ class MovementController(commands.Cog):
         else:
             await ctx.send("**Successfully Retreated Movement :)**")
 
+    @commands.has_permissions(administrator=True)
+    @commands.command()
+    async def reroute(self, ctx, uid):
+        success = await self.movement_service.reroute_movement(ctx, uid)
+        if not success:
+            await ctx.send("**You gone fucked up cuh**")
+        else:
+            await ctx.send("**Successfully Rerouted Movement :)**")
+
     @commands.has_permissions(administrator=True)
     @commands.command()
     async def cancel(self, ctx, uid):
@@ -67,6 +87,26 @@ class MovementController(commands.Cog):
                         f"*Fastest Path: {path}*\n"
                         f"*Estimated Time to Completion: {time} minutes*")
 
+    @commands.command()
+    async def reach(self, ctx, origin):
+        reach = await self.movement_service.retrieve_reach(ctx, origin)
+        if reach is None:
+            await ctx.send("**Stop being retarded, bad player, bad! :(**")
+            return
+        if not reach:
+            await ctx.send(f"**No holdings can be reached from {origin}.**")
+            return
+
+        # Discord caps messages at 2000 characters, so send the list in chunks.
+        message = f"**Estimated Time to each Holding from {origin}**\n"
+        for holding, time in reach:
+            line = f"*{holding}: {time}*\n"
+            if len(message) + len(line) > 1900:
+                await ctx.send(message)
+                message = ""
+            message += line
+        await ctx.send(message)
+
     @commands.command()
     async def hex(self, ctx, hex):
         info = self.movement_service.retrieve_hex_info(hex)
@@ -0,0 +1,26 @@
+import asyncio
+import settings as settings
+from discord.ext import commands, tasks
+from utils.pathfinding.PathfindingUtils import PathfindingUtils
+from utils.sheets.MapStore import MapStore
+
+class MapBackgroundController(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.path_finding_utils = PathfindingUtils()
+        self.watch_map.start()  # Start the background task
+
+    def cog_unload(self):
+        self.watch_map.cancel()
+
+    @tasks.loop(seconds=settings.MapWatchIntervalSeconds)
+    async def watch_map(self):
+        # Map.csv was written (by ;download or by hand), rebuild off the event loop and swap it in.
+        if not MapStore.changed_on_disk():
+            return
+        reloaded = await asyncio.to_thread(self.path_finding_utils.reload_map)
+        if not reloaded:
+            print("Map.csv was touched but its contents did not change.")
+
+async def setup(bot):
+    await bot.add_cog(MapBackgroundController(bot))
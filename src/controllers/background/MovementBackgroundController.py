@@ -3,16 +3,15 @@ import discord
 import pandas as pd
 import settings as settings
 from discord.ext import commands, tasks
-from utils.sheets.LocalSheetUtils import LocalSheetUtils
+from utils.sheets.GameStateStore import GameStateStore
 from utils.pathfinding.PathfindingUtils import PathfindingUtils
 from utils.misc.EmbedUtils import EmbedUtils
 
 class MovementBackgroundController(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.local_sheet_utils = LocalSheetUtils()
+        self.game_state_store = GameStateStore()
         self.path_finding_utils = PathfindingUtils()
-        self.map = self.path_finding_utils.retrieve_digital_map()
         self.embed_utils = EmbedUtils()
         self.movements = {}  # Dictionary to store movements in memory
         self.collisions = {} # hex_id -> set(of army_uids) GM has been notified on
@@ -20,7 +19,7 @@ class MovementBackgroundController(commands.Cog):
         self.update_movements.start()  # Start the background task
 
     def load_movements(self):
-        df = self.local_sheet_utils.get_sheet_by_name("Movements")
+        df = self.game_state_store.get_sheet_by_name("Movements")
         if df is None or df.empty:
             print("Error: Could not retrieve data for 'Movements'.")
             return
@@ -55,9 +54,9 @@ class MovementBackgroundController(commands.Cog):
                 'path': [hex.strip() for hex in str(path).split(",")],
                 'terrain_values': [val.strip() for val in str(terrain_values).split(",")],
                 'current_hex': str(current_hex).strip(),
-                'base_minutes_per_hex': int(base_minutes_per_hex),
+                'base_minutes_per_hex': base_minutes_per_hex,
                 'terrain_mod_minutes_per_hex': int(terrain_mod_minutes_per_hex),
-                'minutes_since_last_hex': int(minutes_since_last_hex),
+                'minutes_since_last_hex': minutes_since_last_hex,
                 'message': message
             }
 
@@ -66,8 +65,8 @@ class MovementBackgroundController(commands.Cog):
         if self.is_paused():
             return
 
-        # Retrieve latest sheet data (as a DataFrame)
-        df = self.local_sheet_utils.get_sheet_by_name("Movements")
+        # Retrieve latest sheet data (as a DataFrame), and its version to write the tick back against
+        df, version = self.game_state_store.get_sheet_and_version("Movements")
         if df is None or df.empty:
             print("Error: Could not retrieve data for 'Movements'.")
             return
@@ -76,6 +75,8 @@ class MovementBackgroundController(commands.Cog):
         self.update_in_memory_data_from_sheet(df)
 
         updated_data = []
+        # Movement UID -> the columns this tick changed, written to the store in one go
+        changes = {}
         # Iterate over a static copy of movements to avoid dictionary size changes
         for uid, movement in list(self.movements.items()):
             # Ensure path and terrain_values are lists of strings
@@ -111,7 +112,14 @@ class MovementBackgroundController(commands.Cog):
                 'minutes_since_last_hex': minutes_since_last_hex,
             })
 
-            # Prepare updated data for the sheet as a list (matching the CSV columns)
+            changes[uid] = {
+                'Path': ",".join(path),
+                'Terrain Values': ",".join(terrain_values) if isinstance(terrain_values, list) else terrain_values,
+                'Current Hex': current_hex,
+                'Minutes since last Hex': minutes_since_last_hex
+            }
+
+            # Prepare updated data as a list (matching the CSV columns) for the collision check
             updated_data.append([
                 uid,
                 movement['player'],
@@ -140,9 +148,19 @@ class MovementBackgroundController(commands.Cog):
                 merged_row = [row.get(col, "") for col in header]
                 updated_data.append(merged_row)
 
-        all_data = [header] + updated_data
         await self.check_for_army_collision(updated_data)
-        self.local_sheet_utils.update_sheet_by_name("Movements", all_data)
+
+        # Paths as this tick read them, a movement retreated or rerouted since keeps its new path.
+        read_paths = {str(uid).strip(): path for uid, path in zip(df["Movement UID"], df["Path"])}
+
+        def apply_tick(rows):
+            current_paths = {str(row["Movement UID"]).strip(): row["Path"] for row in rows}
+            return {
+                uid: fields for uid, fields in changes.items()
+                if current_paths.get(str(uid).strip()) == read_paths.get(str(uid).strip())
+            }
+
+        self.game_state_store.update("Movements", apply_tick, expected_version=version)
 
     async def complete_movement(self, uid):
         data = self.movements[uid]
@@ -230,64 +248,30 @@ class MovementBackgroundController(commands.Cog):
         if uid in self.movements:
             del self.movements[uid]
             print(f"Movement {uid} removed from memory.")
+        self.path_finding_utils.forget_planner(uid)
 
-        # Update the Movements CSV to permanently remove this movement
-        df = self.local_sheet_utils.get_sheet_by_name("Movements")
-        if df is None or df.empty:
-            print("**complete_movement Error: Movements sheet is empty.**")
-            return
-
-        print(f"Before filtering: {df}")
-        df["Movement UID"] = df["Movement UID"].astype(str).str.strip()
-        uid = str(uid).strip()
-        df = df[df["Movement UID"] != uid]
-        print(f"After filtering: {df}")
-
-        try:
-            self.local_sheet_utils.update_sheet_by_name("Movements", df)
-            print(f"Successfully removed movement {uid} and updated Movements.csv.")
-        except Exception as e:
-            print(f"Error writing to Movements.csv: {e}")
+        # Remove the movement from the Movements sheet for good
+        if self.game_state_store.delete_row("Movements", uid):
+            print(f"Successfully removed movement {uid} from Movements.")
+        else:
+            print(f"**complete_movement Error: Movement {uid} is not in the Movements sheet.**")
 
     def update_army_position(self, army_uid, new_hex, new_status):
-        armies_df = self.local_sheet_utils.get_sheet_by_name("Armies")
-        if armies_df is None or armies_df.empty:
-            print("Error: Could not retrieve Armies data.")
-            return
-        
-        # Ensure both are strings for comparison
-        armies_df['Army UID'] = armies_df['Army UID'].astype(str)
-        army_uid = str(army_uid)
-
-        # Locate the row(s) where the 'Army UID' matches the provided army_uid
-        row_index = armies_df.index[armies_df['Army UID'] == army_uid]
-        if row_index.empty:
+        # Update the army's current hex and status, unchanged values don't dirty the sheet.
+        updated = self.game_state_store.update_fields("Armies", army_uid, {
+            'Current Hex': new_hex,
+            'Status': new_status
+        })
+        if not updated:
             print(f"No matching army found for UID {army_uid}.")
-            return
-
-        # Update the army's current hex and status
-        armies_df.loc[row_index, 'Current Hex'] = new_hex
-        armies_df.loc[row_index, 'Status'] = new_status
-
-        try:
-            self.local_sheet_utils.update_sheet_by_name("Armies", armies_df)
-            print(f"Updated Army {army_uid} with new hex {new_hex} and status {new_status}.")
-        except Exception as e:
-            print(f"Error updating army status: {e}")
         
     async def search_map_for_destination(self, destination):
-        # Iterate through each row in the map data
-        for row in self.map:
-            if row["Hex"] == destination:
-                holding = row.get("Holding Name")
-                # Only return the holding name if it is not "FALSE" (i.e. a valid name)
-                if holding and holding != "FALSE":
-                    return holding
-        # If no valid Holding Name is found, return the hex ID
-        return destination
+        # Return the Holding Name on the hex if there is one, otherwise the hex ID
+        holding = self.path_finding_utils.holding_for_hex(destination)
+        return holding if holding else destination
 
     def is_paused(self):
-        sheet_values = self.local_sheet_utils.get_sheet_by_name("Status")
+        sheet_values = self.game_state_store.get_sheet_by_name("Status")
 
         # Check if DataFrame is empty or missing expected columns
         if sheet_values is None or sheet_values.empty:
@@ -329,9 +313,9 @@ class MovementBackgroundController(commands.Cog):
                     'path': [hex.strip() for hex in path_str.split(",")],
                     'terrain_values': [val.strip() for val in terrain_values_str.split(",")],
                     'current_hex': str(row["Current Hex"]).strip(),
-                    'base_minutes_per_hex': int(row["Base Minutes per Hex"]),
+                    'base_minutes_per_hex': row["Base Minutes per Hex"],
                     'terrain_mod_minutes_per_hex': int(row["Terrain Mod Minutes per Hex"]),
-                    'minutes_since_last_hex': int(row["Minutes since last Hex"]),
+                    'minutes_since_last_hex': row["Minutes since last Hex"],
                     'message': row["Message"]
                 }
             else:
@@ -362,6 +346,22 @@ class MovementBackgroundController(commands.Cog):
                         'minutes_since_last_hex': 0,
                         'message': row["Message"]
                     })
+                else:
+                    # A reroute replaces the path in the sheet, pick it up from the current hex onwards.
+                    sheet_path = [hex.strip() for hex in str(row["Path"]).split(",")]
+                    if sheet_path != self.movements[uid]['path']:
+                        terrain_values = str(row["Terrain Values"]).strip()
+                        if terrain_values.startswith("[") and terrain_values.endswith("]"):
+                            terrain_values = terrain_values[1:-1]
+
+                        self.movements[uid].update({
+                            'path': sheet_path,
+                            'terrain_values': [val.strip() for val in terrain_values.split(",")],
+                            'current_hex': str(row["Current Hex"]).strip(),
+                            'terrain_mod_minutes_per_hex': int(row["Terrain Mod Minutes per Hex"]),
+                            'intent': intent,
+                            'message': row["Message"]
+                        })
 
         # Remove deleted movements from memory.
         self.remove_deleted_movements(current_uids_in_sheet)
@@ -386,18 +386,16 @@ class MovementBackgroundController(commands.Cog):
             hex_army_map.setdefault(hex_id, set()).add(uid)
 
         # 2. Include non-moving armies from Armies sheet
-        armies_df = self.local_sheet_utils.get_sheet_by_name("Armies")
+        armies_df = self.game_state_store.get_sheet_by_name("Armies")
         if armies_df is not None and not armies_df.empty:
-            armies_df['Army UID'] = armies_df['Army UID'].astype(str)
-            armies_df['Current Hex'] = armies_df['Current Hex'].astype(str)
-            armies_df['Status'] = armies_df['Status'].astype(str)
-
             for _, row in armies_df.iterrows():
                 uid = row["Army UID"]
+                if pd.isna(row["Current Hex"]):
+                    continue  # Not on the map, nothing to collide with
                 hex_id = self.resolve_to_hex_id(row["Current Hex"])
-                status = row["Status"].lower()
+                status = row["Status"]
 
-                if status not in ["moving"]:  # Only include non-moving units
+                if pd.isna(status) or status.lower() not in ["moving"]:  # Only include non-moving units
                     hex_army_map.setdefault(hex_id, set()).add(uid)
 
         current_collisions = {}
@@ -483,13 +481,11 @@ class MovementBackgroundController(commands.Cog):
 
     def get_army_status_map(self):
         """Return a dict of Army UID -> Status from the Armies sheet."""
-        armies_df = self.local_sheet_utils.get_sheet_by_name("Armies")
+        armies_df = self.game_state_store.get_sheet_by_name("Armies")
         if armies_df is None or armies_df.empty:
             print("Warning: Could not load Armies for status lookup.")
             return {}
 
-        armies_df['Army UID'] = armies_df['Army UID'].astype(str)
-        armies_df['Status'] = armies_df['Status'].astype(str)
         return dict(zip(armies_df['Army UID'], armies_df['Status']))
     
     def resolve_to_hex_id(self, identifier: str) -> str:
@@ -497,19 +493,10 @@ class MovementBackgroundController(commands.Cog):
         Takes a string that may be a Holding Name or Hex ID and resolves it to a Hex ID.
         """
         identifier = identifier.strip()
-        
-        # Check if it's already a hex ID
-        for row in self.map:
-            if row["Hex"].strip() == identifier:
-                return identifier
-        
-        # Otherwise, check if it's a holding name
-        for row in self.map:
-            if row.get("Holding Name", "").strip().lower() == identifier.lower():
-                return row["Hex"].strip()
+        hex_id = self.path_finding_utils.resolve_hex(identifier)
 
         # Default: return as-is (fallback)
-        return identifier
+        return hex_id if hex_id else identifier
 
 async def setup(bot):
     await bot.add_cog(MovementBackgroundController(bot))
\ No newline at end of file
@@ -0,0 +1,23 @@
+import asyncio
+import settings as settings
+from discord.ext import commands, tasks
+from utils.sheets.GameStateStore import GameStateStore
+
+class StateBackgroundController(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.game_state_store = GameStateStore()
+        self.flush_state.start()  # Start the background task
+
+    async def cog_unload(self):
+        self.flush_state.cancel()
+        await asyncio.to_thread(self.game_state_store.flush)
+
+    @tasks.loop(seconds=settings.StateFlushIntervalSeconds)
+    async def flush_state(self):
+        # Write only the sheets that changed since the last flush, off the event loop.
+        if not await asyncio.to_thread(self.game_state_store.flush):
+            print("Error: Some game state sheets could not be written, retrying next flush.")
+
+async def setup(bot):
+    await bot.add_cog(StateBackgroundController(bot))
@@ -2,18 +2,15 @@ import re
 import discord
 import settings as settings
 from discord.ext import commands, tasks
-from utils.pathfinding.PathfindingUtils import PathfindingUtils
-from utils.sheets.LocalSheetUtils import LocalSheetUtils
+from utils.sheets.GameStateStore import GameStateStore
 from utils.misc.EmbedUtils import EmbedUtils
 
 class StatusBackgroundController(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.path_finding_utils = PathfindingUtils()
-        self.map = self.path_finding_utils.retrieve_digital_map()
         # Completion times in minutes for each status type.
         self.status_completion_time_in_mins = {"Siege": 180, "Raid": 1, "Embark": 30, "Disembark": 30} # TODO: Change raid to 120 again
-        self.local_sheet_utils = LocalSheetUtils()
+        self.game_state_store = GameStateStore()
         self.embed_utils = EmbedUtils()
         self.armies = {}  # Dictionary to store armies in memory.
         self.load_armies()  # Load armies from the "Armies" sheet.
@@ -21,7 +18,7 @@ class StatusBackgroundController(commands.Cog):
         self.update_status.start()  # Start the background update task.
 
     def load_armies(self):
-        df = self.local_sheet_utils.get_sheet_by_name("Armies")
+        df = self.game_state_store.get_sheet_by_name("Armies")
         if df is None or df.empty:
             print("Error: Could not retrieve data for 'Armies'.")
             return
@@ -54,7 +51,7 @@ class StatusBackgroundController(commands.Cog):
         If the army is not in memory, discard that row.
         Then update the sheet with only the valid rows.
         """
-        df = self.local_sheet_utils.get_sheet_by_name("StatusTimers")
+        df = self.game_state_store.get_sheet_by_name("StatusTimers")
         if df is None or df.empty:
             print("No status timers to load.")
             return
@@ -72,7 +69,7 @@ class StatusBackgroundController(commands.Cog):
 
         # Update the StatusTimers sheet with only the valid rows.
         new_data = [list(valid_df.columns)] + valid_df.values.tolist()
-        self.local_sheet_utils.update_sheet_by_name("StatusTimers", new_data)
+        self.game_state_store.update_sheet_by_name("StatusTimers", new_data)
 
     def save_status_timers(self):
         """
@@ -86,7 +83,7 @@ class StatusBackgroundController(commands.Cog):
             timer = army.get("status_timer")
             if timer is not None:
                 rows.append([uid, army["status"], timer])
-        self.local_sheet_utils.update_sheet_by_name("StatusTimers", rows)
+        self.game_state_store.update_sheet_by_name("StatusTimers", rows)
 
     @tasks.loop(minutes=1)  # Runs every minute.
     async def update_status(self):
@@ -94,7 +91,7 @@ class StatusBackgroundController(commands.Cog):
             return
 
         # Retrieve latest armies data (as a DataFrame) from the "Armies" sheet.
-        df = self.local_sheet_utils.get_sheet_by_name("Armies")
+        df = self.game_state_store.get_sheet_by_name("Armies")
         if df is None or df.empty:
             print("Error: Could not retrieve data for 'Armies'.")
             return
@@ -176,23 +173,13 @@ class StatusBackgroundController(commands.Cog):
         print(f"Army {uid} status set to Stationary in memory.")
 
         # Update the Armies sheet: set the row's 'Status' column to "Stationary"
-        armies_df = self.local_sheet_utils.get_sheet_by_name("Armies")
-        if armies_df is None or armies_df.empty:
-            return
-
-        row_index = armies_df.index[armies_df['Army UID'] == uid]
-        if row_index.empty:
-            print(f"No matching army found for UID {uid}.")
+        if self.game_state_store.update_fields("Armies", uid, {'Status': "Stationary"}):
+            print(f"Updated Army {uid} to Stationary status in sheet.")
         else:
-            armies_df.loc[row_index, 'Status'] = "Stationary"
-            try:
-                self.local_sheet_utils.update_sheet_by_name("Armies", armies_df)
-                print(f"Updated Army {uid} to Stationary status in sheet.")
-            except Exception as e:
-                print(f"Error updating army status: {e}")
+            print(f"No matching army found for UID {uid}.")
 
     def is_paused(self):
-        sheet_values = self.local_sheet_utils.get_sheet_by_name("Status")
+        sheet_values = self.game_state_store.get_sheet_by_name("Status")
         if sheet_values is None or sheet_values.empty:
             print("Error: Could not retrieve data for 'Status'.")
             return True
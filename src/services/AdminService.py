@@ -1,21 +1,24 @@
 import os
 import pandas as pd
 from utils.sheets.GoogleSheetUtils import GoogleSheetUtils
-from utils.sheets.LocalSheetUtils  import LocalSheetUtils
+from utils.sheets.GameStateStore import GameStateStore
+from utils.sheets.LocalSheetUtils import LocalSheetUtils
 from utils.misc.EmbedUtils import EmbedUtils
+from utils.pathfinding.PathfindingUtils import PathfindingUtils
+from utils.pathfinding.PathfindingPool import PathfindingPool
 
 class AdminService:
     def __init__(self):
         self.google_sheet_utils = GoogleSheetUtils()
-        self.local_sheet_utils  = LocalSheetUtils()
+        self.game_state_store   = GameStateStore()
         self.embed_utils        = EmbedUtils()
 
     def update_google_sheets(self):
         """ Push all local CSV sheets up to their Google Sheet counterparts. """
         sheet_names = ["Status", "Movements", "Armies", "StatusTimers"]
         for sheet in sheet_names:
-            # 1) Read local CSV (with locking)
-            df = self.local_sheet_utils.get_sheet_by_name(sheet)
+            # 1) Read the in-memory game state
+            df = self.game_state_store.get_sheet_by_name(sheet)
             if df is None or df.empty:
                 print(f"Error: {sheet} is empty or missing.")
                 continue # Dataframe can be empty, so continue
@@ -33,8 +36,8 @@ class AdminService:
 
     def download_google_sheets(self):
         """ Pull all named Google Sheets down into local CSV files. """
-        sheet_names = ["Status", "Movements", "Armies", "Seasons"]
-        directory   = self.local_sheet_utils.DIR
+        sheet_names = ["Status", "Movements", "Armies", "Seasons", "Map"]
+        directory   = self.game_state_store.sheet_utils.DIR
 
         for sheet in sheet_names:
             data = self.google_sheet_utils.get_sheet_by_name(sheet)
@@ -47,23 +50,42 @@ class AdminService:
             rows     = data[1:]
             df       = pd.DataFrame(rows, columns=header)
 
-            ok = self.local_sheet_utils.update_sheet_by_name(sheet, df)
+            ok = self.game_state_store.update_sheet_by_name(sheet, df)
             if not ok:
                 print(f"Error writing local CSV for: {sheet}")
-        return True
+        # Persist the downloaded game state now rather than on the next flush.
+        return self.game_state_store.flush()
+
+    def reload_map(self):
+        """ Rebuilds the pathfinding graph from the downloaded Map and swaps it in. Blocking. """
+        return PathfindingUtils().reload_map()
+
+    def get_pathfinding_stats_embed(self):
+        """ Returns a discord.Embed with the route cache, worker pool and sheet read cache metrics. """
+        cache = PathfindingUtils.route_cache.stats()
+        pool = PathfindingPool.stats()
+        # One line per CSV read so far: how often the parsed copy could be reused.
+        sheet_cache = "\n".join(
+            f"{sheet}: {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses)"
+            for sheet, stats in sorted(LocalSheetUtils.cache_stats().items())
+        ) or "No sheets read yet"
+        return self.embed_utils.set_info_embed_from_list(
+            ["Title", "Route Cache Hits", "Route Cache Misses", "Hit Rate", "Cached Routes",
+             "Queue Depth", "Running", "Completed", "Aborted", "Latency p50 / p95 / max", "Sheet Cache Hit Rate"],
+            ["Pathfinding Stats", cache["hits"], cache["misses"], f"{cache['hit_rate']:.0%}", cache["size"],
+             pool["queue_depth"], pool["running"], pool["completed"], pool["aborted"],
+             f"{pool['p50_ms']:.1f} / {pool['p95_ms']:.1f} / {pool['max_ms']:.1f} ms", sheet_cache]
+        )
 
     def change_game_status(self, status):
         """ Update the single-row Status.csv → Game Status column. """
-        # 1) Read current file
-        df = self.local_sheet_utils.get_sheet_by_name("Status")
+        # 1) Read the current status, it is also the row's key
+        df = self.game_state_store.get_sheet_by_name("Status")
         if df is None or df.empty:
             return False
 
-        # 2) Modify in-memory
-        df.loc[0, "Game Status"] = status
-
-        # 3) Write it back
-        return self.local_sheet_utils.update_sheet_by_name("Status", df)
+        # 2) Change just that cell
+        return self.game_state_store.update_fields("Status", df.iloc[0]["Game Status"], {"Game Status": status})
 
     def change_season(self, season):
         """ Mark a new Current Season in Seasons.csv (only one 'x' per row). """
@@ -72,27 +94,18 @@ class AdminService:
         if season not in valid:
             return False
 
-        # 1) Load
-        df = self.local_sheet_utils.get_sheet_by_name("Seasons")
-        if df is None:
-            return False
-
-        # 2) Clear all season markers on the 'Current Season' row
-        mask = df["Army Type"] == "Current Season"
-        for col in valid:
-            df.loc[mask, col] = ""
+        # Clear all season markers on the 'Current Season' row…
+        fields = {col: "" for col in valid}
         #    …then set our chosen season
-        df.loc[mask, season] = "x"
-
-        # 3) Save
-        return self.local_sheet_utils.update_sheet_by_name("Seasons", df)
+        fields[season] = "x"
+        return self.game_state_store.update_fields("Seasons", "Current Season", fields)
 
     def get_current_season_embed(self):
         """
         Returns a discord.Embed showing the current season and per‐army movement times,
         or None if no valid season is set.
         """
-        df = self.local_sheet_utils.get_sheet_by_name("Seasons")
+        df = self.game_state_store.get_sheet_by_name("Seasons")
         if df is None:
             return None
 
@@ -131,13 +144,7 @@ class AdminService:
         return self.embed_utils.set_info_embed_from_list(column_headings, data)
     
     async def update_custom_season_with_template(self, custom_times):
-        # 1) Load the CSV
-        df = self.local_sheet_utils.get_sheet_by_name("Seasons")
-        if df is None:
-            print("set_custom_movement_times: could not load Seasons.csv")
-            return False
-
-        # 2) Map template keys → CSV 'Army Type' values
+        # 1) Map template keys → CSV 'Army Type' values
         mapping = {
             "army":    "army",
             "siege":   "has Siege",
@@ -145,7 +152,8 @@ class AdminService:
             "cavalry": "cavalry"
         }
 
-        # 3) Write each custom-time into the 'Custom' column
+        # 2) Collect each custom-time for the 'Custom' column
+        changes = {}
         for key, csv_name in mapping.items():
             if key not in custom_times:
                 print(f"set_custom_movement_times: missing key '{key}'")
@@ -158,12 +166,11 @@ class AdminService:
                 print(f"set_custom_movement_times: invalid integer for '{key}': {custom_times[key]}")
                 return False
 
-            # Place it into the DataFrame
-            df.loc[df["Army Type"] == csv_name, "Custom"] = str(val)
+            changes[csv_name] = {"Custom": str(val)}
 
-        # 4) Persist the CSV
-        ok = self.local_sheet_utils.update_sheet_by_name("Seasons", df)
+        # 3) Change just those cells
+        ok = self.game_state_store.update_many("Seasons", changes) > 0
         if not ok:
-            print("set_custom_movement_times: failed to write Seasons.csv")
+            print("set_custom_movement_times: could not update Seasons.csv")
         return ok
         
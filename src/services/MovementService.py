@@ -1,7 +1,10 @@
 from utils.MovementUtils import MovementUtils
-from utils.sheets.LocalSheetUtils import LocalSheetUtils
+from utils.sheets.GameStateStore import GameStateStore
+from utils.sheets.MapStore import MapStore
 from utils.misc.EmbedUtils import EmbedUtils
+from utils.pathfinding.PathfindingPool import PathfindingPool
 from utils.pathfinding.PathfindingUtils import PathfindingUtils
+from utils.pathfinding.HexGraph import HexGraph
 from utils.misc.TemplateUtils import TemplateUtils
 from utils.misc.CollectionUtils import CollectionUtils
 import settings as settings
@@ -16,8 +19,10 @@ class MovementService:
     def __init__(self, bot):
         self.bot = bot
         self.movement_utils = MovementUtils()
-        self.local_sheet_utils = LocalSheetUtils()
+        self.game_state_store = GameStateStore()
         self.embed_utils = EmbedUtils()
+        self.pathfinding_pool = PathfindingPool()
+        # Searches go through the pool, this is for the cheap lookups around them
         self.pathfinding_utils = PathfindingUtils()
         self.template_utils = TemplateUtils()
         self.collection_utils = CollectionUtils()
@@ -48,22 +53,98 @@ class MovementService:
         movement_type = "army" if navy == ["nan"] else "fleet"
 
         # Pathfind
-        path, terrain_values = self.pathfinding_utils.retrieve_movement_path(
+        route = await self.pathfinding_pool.find_path(
             movement_type, current_hex,
             movement.get("destination"), movement.get("avoid")
         )
+        path, terrain_values = route["path"], route["terrain_values"]
 
         if path is None:
             print("ERROR WHILE RETRIEVING PATH")
+            await ctx.send(f"❌ {route['reason']}")
             return False
 
+        movement_uid = f"{random.randint(0, 1000)}_{int(time.time())}"
+        row = await self.prepare_movement_row(
+            movement, movement_uid, movement_type, current_hex, commanders, troops, navy, siege, path, terrain_values
+        )
+        if row is None:
+            return False
+
+        # Create movement in sheet
+        return self.game_state_store.write_to_row("Movements", row)
+
+    async def create_bulk_template_movements(self, ctx):
+        """
+        Queues every Movement Template in a single message. All paths are found in one batch
+        and every new row is written to the Movements sheet in one go.
+        Returns (movements created, templates received), or None if nothing could be read.
+        """
+        templates = await self.collection_utils.ask_question(
+            ctx, self.bot,
+            "**Send me all the Movement Templates in one message now Pookie, Grrrr.**", str
+        )
+        if templates is None:
+            return None
+
+        # Every template starts with its Player line.
+        orders = []
+        for template in re.split(r"(?=Player:)", templates):
+            if not template.strip():
+                continue
+            try:
+                movement = self.template_utils.parse_movement_template(template)
+            except ValueError:
+                await ctx.send(f"❌ Could not read template:\n```{template.strip()}```")
+                continue
+
+            success, commanders, current_hex, troops, navy, siege = self.movement_utils.get_army_breakdown(movement.get("army_id"))
+            if not success or not current_hex:
+                await ctx.send(f"❌ Army `{movement.get('army_id')}` does not exist.")
+                continue
+
+            movement_type = "army" if navy == ["nan"] else "fleet"
+            orders.append((movement, movement_type, current_hex, commanders, troops, navy, siege))
+
+        if not orders:
+            return None
+
+        routes = await self.pathfinding_pool.find_paths([
+            (movement_type, current_hex, movement.get("destination"), movement.get("avoid"))
+            for movement, movement_type, current_hex, *_ in orders
+        ])
+
+        rows = []
+        used_uids = set()
+        for (movement, movement_type, current_hex, commanders, troops, navy, siege), route in zip(orders, routes):
+            if route["path"] is None:
+                await ctx.send(f"❌ Army `{movement.get('army_id')}`: {route['reason']}")
+                continue
+
+            # Every order in the batch is created in the same second, so keep the UIDs apart.
+            movement_uid = f"{random.randint(0, 1000)}_{int(time.time())}"
+            while movement_uid in used_uids:
+                movement_uid = f"{random.randint(0, 1000)}_{int(time.time())}"
+            used_uids.add(movement_uid)
+
+            row = await self.prepare_movement_row(
+                movement, movement_uid, movement_type, current_hex, commanders, troops, navy, siege,
+                route["path"], route["terrain_values"]
+            )
+            if row is not None:
+                rows.append(row)
+
+        if rows and not self.game_state_store.write_rows("Movements", rows):
+            return None
+        return len(rows), len(orders)
+
+    async def prepare_movement_row(self, movement, movement_uid, movement_type, current_hex, commanders, troops, navy, siege, path, terrain_values):
+        """ Works out the movement times, announces the departure and returns the Movements row. """
         base_minutes_per_hex = self.movement_utils.get_minutes_per_hex(troops, navy, siege)
 
         # Calculate terrain mod minutes per hex
         terrain_mod_minutes_per_hex = base_minutes_per_hex * (sum(terrain_values)/len(terrain_values))
 
-        movement_uid = f"{random.randint(0, 1000)}_{int(time.time())}"
-
         # Prepare data for sheet
         path_str = ', '.join(path) if path else "None"
         terrain_str = ', '.join(map(str, terrain_values)) if terrain_values else "None"
@@ -71,16 +152,12 @@ class MovementService:
         success = await self.announce_departure(movement, current_hex, movement_uid, path, terrain_values, base_minutes_per_hex, terrain_mod_minutes_per_hex, navy)
         if not success:
             print("ERROR WHILE ANNOUNCING DEPARTURE.")
-            return False
+            return None
+
+        return [movement_uid, movement.get("player"), movement_type, movement.get("army_id"), commanders, troops, navy, siege,
+                movement.get("intent"), path_str, terrain_str, path[0] if path else "None", base_minutes_per_hex,
+                terrain_mod_minutes_per_hex, 0, movement.get("arrival")]
 
-        # Create movement in sheet
-        return self.local_sheet_utils.write_to_row(
-            "Movements",
-            [movement_uid, movement.get("player"), movement_type, movement.get("army_id"), commanders, troops, navy, siege,
-            movement.get("intent"), path_str, terrain_str, path[0] if path else "None", base_minutes_per_hex, 
-            terrain_mod_minutes_per_hex, 0, movement.get("arrival")]
-        )
-    
     async def announce_departure(self, movement, origin, uid, path, terrain_values, base_minutes_per_hex, terrain_mod_minutes_per_hex, navy):
         channel_id = settings.MovementsChannel
         channel = self.bot.get_channel(channel_id)
@@ -91,17 +168,8 @@ class MovementService:
                 print(f"Error fetching channel: {e}")
                 return False
         
-        # Calculate total minutes and round up
-        total_minutes = (len(path) - 1) * terrain_mod_minutes_per_hex
-        rounded_minutes = math.ceil(total_minutes)  # Round up to nearest whole minute
-        
-        # Format time as hours and minutes if 60+ minutes
-        if rounded_minutes >= 60:
-            hours = rounded_minutes // 60
-            minutes = rounded_minutes % 60
-            time_str = f"{hours} hour{'s' if hours > 1 else ''} {minutes} minute{'s' if minutes != 1 else ''}"
-        else:
-            time_str = f"{rounded_minutes} minute{'s' if rounded_minutes != 1 else ''}"
+        # Calculate total minutes
+        time_str = self.format_minutes((len(path) - 1) * terrain_mod_minutes_per_hex)
         
         message = movement.get("departure")
         naval_movement = False if navy == ["nan"] else True
@@ -132,8 +200,18 @@ class MovementService:
             print("Cannot DM user")
         return True
 
+    def format_minutes(self, total_minutes):
+        rounded_minutes = math.ceil(total_minutes)  # Round up to nearest whole minute
+
+        # Format time as hours and minutes if 60+ minutes
+        if rounded_minutes >= 60:
+            hours = rounded_minutes // 60
+            minutes = rounded_minutes % 60
+            return f"{hours} hour{'s' if hours > 1 else ''} {minutes} minute{'s' if minutes != 1 else ''}"
+        return f"{rounded_minutes} minute{'s' if rounded_minutes != 1 else ''}"
+
     def retrieve_all_movements(self):
-        movements_df = self.local_sheet_utils.get_sheet_by_name("Movements")
+        movements_df = self.game_state_store.get_sheet_by_name("Movements")
         if movements_df is None or movements_df.empty:
             return "No active movements"
             
@@ -148,111 +226,137 @@ class MovementService:
             return "Error retrieving movements"
 
     def retrieve_user_movements(self, user_id):
-        movements_df = self.local_sheet_utils.get_sheet_by_name("Movements")
-        if movements_df is None or movements_df.empty:
-            return "No movements found"
-            
-        user_movements = movements_df[movements_df['Player'] == user_id]
-        if user_movements.empty:
+        user_movements = self.game_state_store.find_rows("Movements", "Player", user_id)
+        if not user_movements:
             return "No movements for this user"
             
         try:
             return "\n".join(
                 f"Movement UID: {row['Movement UID']}, Army UID: {row['Army UID']}, Path: [{row['Path']}], Terrain: [{row['Terrain Values']}], Intent: {row['Intent']}"
-                for _, row in user_movements.iterrows()
+                for row in user_movements
             )
         except KeyError as e:
             print(f"Missing column: {e}")
             return "Error retrieving user movements"
         
     def retrieve_user_movement(self, movement_uid, user_id):
-        movements_df = self.local_sheet_utils.get_sheet_by_name("Movements")
-        if movements_df is None or movements_df.empty:
-            return None
-
-        movement = movements_df[movements_df['Movement UID'] == movement_uid]
-        if movement.empty:
+        row = self.game_state_store.get_row("Movements", movement_uid)
+        if row is None:
             return None
 
-        row = movement.iloc[0]  # row is a Pandas Series
-
         # Verify the user_id matches the 'Player' field in the movement
         if row['Player'] != user_id:
             return None
 
-        # Convert the Series into column names and values for the embed
-        column_headings = list(row.index)
-        data = list(row.values)
+        # Convert the row into column names and values for the embed
+        column_headings = list(row.keys())
+        data = list(row.values())
         
         return self.embed_utils.set_info_embed_from_list(column_headings, data)
 
     def retrieve_movement(self, uid):
-        movements_df = self.local_sheet_utils.get_sheet_by_name("Movements")
-        if movements_df is None or movements_df.empty:
+        row = self.game_state_store.get_row("Movements", uid)
+        if row is None:
             return None
-        
-        movement = movements_df[movements_df['Movement UID'] == uid]
-        if movement.empty:
-            return None
-        
-        row = movement.iloc[0]  # row is a Pandas Series
 
-        # Convert Series into column names and values
-        column_headings = list(row.index)  # Extract column names
-        data = list(row.values)  # Extract corresponding values
+        # Convert the row into column names and values
+        column_headings = list(row.keys())  # Extract column names
+        data = list(row.values())  # Extract corresponding values
 
         return self.embed_utils.set_info_embed_from_list(column_headings, data)
 
     def retreat_movement(self, uid):
-        movements_df = self.local_sheet_utils.get_sheet_by_name("Movements")
-        print(movements_df)
-        if movements_df is None or movements_df.empty:
-            return False
-
-        mask = movements_df['Movement UID'] == uid
-        print(mask)
-        if not mask.any():
+        def reverse_path(rows):
+            # Worked out from the rows as they are when written, so a tick moving the
+            # movement meanwhile is not undone.
+            row = next((row for row in rows if str(row['Movement UID']).strip() == str(uid).strip()), None)
+            if row is None:
+                return None
+
+            # Split on comma then strip whitespace
+            path = [p.strip() for p in row['Path'].split(',')]
+            current_hex = row['Current Hex']
+            if current_hex not in path:
+                print(f"Retreat of {uid}: {current_hex} is not on its path {path}")
+                return None
+
+            current_index = path.index(current_hex)
+            new_path = path[current_index::-1]
+            new_terrain = [t.strip() for t in row['Terrain Values'].split(',')][current_index::-1]
+            return {uid: {
+                'Path': ', '.join(new_path),
+                'Terrain Values': ', '.join(new_terrain),
+                'Intent': 'Retreat',
+                'Minutes since last Hex': 0
+            }}
+
+        return self.game_state_store.update("Movements", reverse_path)
+
+    async def reroute_movement(self, ctx, uid):
+        new_goal = await self.collection_utils.ask_question(
+            ctx, self.bot,
+            "Where should the movement go now? Send a hex or holding, or **same** to keep the destination.", str
+        )
+        avoid = await self.collection_utils.ask_question(
+            ctx, self.bot,
+            "Which hexes should it avoid? **(comma separated)**, **none** to clear the list, or **same** to keep it.", str
+        )
+        if new_goal is None or avoid is None:
             return False
 
-        row = movements_df.loc[mask].iloc[0]
-        # Split on comma then strip whitespace
-        path = [p.strip() for p in row['Path'].split(',')]
-        current_hex = row['Current Hex']
+        new_goal = None if new_goal.strip().lower() == "same" else new_goal.strip()
+        if avoid.strip().lower() == "same":
+            avoid = None
+        elif avoid.strip().lower() == "none":
+            avoid = []
+        else:
+            avoid = [hex_id.strip() for hex_id in avoid.split(",") if hex_id.strip()]
 
-        print(current_hex)
-        print(path)
-        if current_hex not in path:
+        route = await self.reroute(uid, new_goal, avoid)
+        if route is None:
             return False
+        if route["path"] is None:
+            await ctx.send(f"❌ {route['reason']}")
+            return False
+        return True
 
-        current_index = path.index(current_hex)
-        new_path = path[current_index::-1]
-        new_terrain = [t.strip() for t in row['Terrain Values'].split(',')][current_index::-1]
-
-        movements_df.loc[mask, 'Path'] = ', '.join(new_path)
-        movements_df.loc[mask, 'Terrain Values'] = ', '.join(new_terrain)
-        movements_df.loc[mask, 'Intent'] = 'Retreat'
-        movements_df.loc[mask, 'Minutes since last Hex'] = 0
+    async def reroute(self, movement_uid, new_goal=None, avoid=None):
+        """
+        Re-plans a movement from its current hex to new_goal (or its current destination) and
+        stores the new path. Repeated reroutes of a movement repair the previous search instead of
+        starting again. avoid=None keeps the avoid list of the last reroute.
+        Returns the route result dict, or None if the movement does not exist.
+        """
+        row = self.game_state_store.get_row("Movements", movement_uid)
+        if row is None:
+            return None
 
-        print(movements_df)
-        
-        # Convert the DataFrame to list-of-lists (header first) before updating.
-        data_list = [movements_df.columns.tolist()] + movements_df.values.tolist()
-        print(data_list)
-        return self.local_sheet_utils.update_sheet_by_name("Movements", data_list)
+        path = [hex_id.strip() for hex_id in str(row['Path']).split(',')]
+        current_hex = str(row['Current Hex']).strip()
+        goal = new_goal if new_goal else path[-1]
+
+        route = await self.pathfinding_pool.reroute(movement_uid, row['Movement Type'], current_hex, goal, avoid)
+        if route["path"] is None:
+            return route
+
+        terrain_values = route["terrain_values"]
+        terrain_mod_minutes_per_hex = row['Base Minutes per Hex'] * (sum(terrain_values)/len(terrain_values))
+        updated = self.game_state_store.update_fields("Movements", movement_uid, {
+            'Path': ', '.join(route["path"]),
+            'Terrain Values': ', '.join(map(str, terrain_values)),
+            'Current Hex': route["path"][0],
+            'Terrain Mod Minutes per Hex': float(terrain_mod_minutes_per_hex)
+        })
+        if not updated:
+            return None
+        return route
 
     def cancel_movement(self, uid):
-        movements_df = self.local_sheet_utils.get_sheet_by_name("Movements")
-        print(movements_df)
-        if movements_df is None:
+        if not self.game_state_store.delete_row("Movements", uid):
             return False
 
-        original_count = len(movements_df)
-        movements_df = movements_df[movements_df['Movement UID'] != uid]
-        print(movements_df)
-        if len(movements_df) == original_count:
-            return False
-
-        return self.local_sheet_utils.update_sheet_by_name("Movements", movements_df)
+        self.pathfinding_pool.forget_planner(uid)
+        return True
 
     async def retrieve_path(self, ctx, origin, destination, avoid):
         movement_type = await self.collection_utils.ask_question(
@@ -277,29 +381,84 @@ class MovementService:
             base_minutes_per_hex = 30 if siege.lower() in ["n", "no"] else 60
 
         # Retrieve the movement path
-        path, terrain_values = self.pathfinding_utils.retrieve_movement_path(
+        route = await self.pathfinding_pool.find_path(
             movement_type, origin,
             destination, avoid
         )
-        average_terrain_mod = sum(terrain_values)/len(terrain_values)
+        path, terrain_values = route["path"], route["terrain_values"]
 
-        if not path:  # If pathfinding failed, return empty path
+        if not path:  # If pathfinding failed, say why and return empty path
+            await ctx.send(f"❌ {route['reason']}")
             return [], 0
 
+        average_terrain_mod = sum(terrain_values)/len(terrain_values)
+
         # Calculate terrain mod minutes per hex
         terrain_mod_minutes_per_hex = base_minutes_per_hex * average_terrain_mod
 
         # Return the path and total time (impacted by terrain mod minutes per hex)
         return path, len(path) * terrain_mod_minutes_per_hex
         
+    async def retrieve_reach(self, ctx, origin):
+        """
+        Returns a list of (holding, minutes) for every holding reachable from origin,
+        fastest first, from a single distance field instead of one search per holding.
+        """
+        movement_type = await self.collection_utils.ask_question(
+            ctx, self.bot,
+            "Is the movement for an **army** or a **fleet**?", str
+        )
+
+        siege = await self.collection_utils.ask_question(
+            ctx, self.bot,
+            "Does the movement have any Siege? **(y/n)**", str
+        )
+
+        if not movement_type or siege is None or movement_type.strip().lower() not in HexGraph.MOVEMENT_TYPES:
+            await ctx.send("Are you retarded? I even highlighted the right answers :sob:")
+            return None
+
+        # Build a composition matching the answers, so the current season's rate applies.
+        movement_type = movement_type.strip().lower()
+        navy = ["Ships"] if movement_type == "fleet" else ["nan"]
+        siege_list = ["nan"] if siege.lower() in ["n", "no"] else ["Siege"]
+        try:
+            minutes_per_hex = self.movement_utils.get_minutes_per_hex(["nan"], navy, siege_list)
+        except RuntimeError as e:
+            print(f"Error getting minutes per hex: {e}")
+            return None
+
+        field = await self.pathfinding_pool.distance_field(movement_type, origin)
+        if field is None:
+            return None
+        graph, source, distances, tree = field
+
+        reach = []
+        for node in graph.holding_nodes():
+            if node == source or distances[node] == math.inf:
+                continue
+            # Timed like the movement itself would be: hexes moved times the mean terrain value
+            # of the whole path, start included.
+            path = [graph.index[hex_id] for hex_id in self.pathfinding_utils.path_from_tree(graph, tree, node)]
+            terrain_values = self.pathfinding_utils.extract_terrain_values(graph, movement_type, path)
+            minutes = (len(path) - 1) * minutes_per_hex * (sum(terrain_values) / len(terrain_values))
+            if minutes != math.inf:
+                reach.append((graph.holdings[node], minutes))
+        reach.sort(key=lambda entry: entry[1])
+        return [(holding, self.format_minutes(minutes)) for holding, minutes in reach]
+
     def retrieve_hex_info(self, hex_id):
-        map_df = self.local_sheet_utils.get_sheet_by_name("Map")
-        if map_df is None or map_df.empty:
+        # Accept holding names too, then read the hex from the shared Map.
+        hex_id = self.pathfinding_utils.resolve_hex(hex_id)
+        map_store = MapStore.current()
+        if hex_id is None or map_store is None:
             return None
-            
-        hex_data = map_df[map_df['Hex'] == hex_id]
-        if hex_data.empty:
+
+        record = map_store.get(hex_id)
+        if record is None:
             return None
-            
-        row = hex_data.iloc[0]
-        return self.embed_utils.create_hex_embed(row)
\ No newline at end of file
+
+        return self.embed_utils.set_info_embed_from_list(
+            ["Embed Title", "Terrain", "Holding Name", "Road", "River"],
+            [f"Hex {record.hex_id}", record.terrain, record.holding_name or "None", record.road, record.river]
+        )
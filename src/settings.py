@@ -3,3 +3,34 @@ BotStatus = "Generic Status."
 Prefix = ";"
 MovementsChannel = "Movements Channel ID here."
 GamemasterID = "Game Master ID, for army collision notifications etc."
+
+# Pathfinding route cache
+RouteCacheSize = 1024
+RouteCacheTTLSeconds = 3600
+DistanceFieldCacheSize = 64
+
+# Pathfinding worker pool: searches give up after this many expanded hexes or seconds (queue time
+# included, except for batches, whose searches are timed from when a worker process picks them up)
+PathfindingWorkers = 2
+PathfindingProcesses = 2
+PathfindingMaxExpansions = 20000
+PathfindingTimeoutSeconds = 2.0
+# Movements whose incremental (D* Lite) reroute state is kept in memory
+ReroutePlannerCacheSize = 256
+
+# How often Map.csv is checked for changes, which are then hot-reloaded
+MapWatchIntervalSeconds = 30
+
+# Search engine per movement type: "a_star", or "hierarchical" for HPA*-style cluster search
+# (much faster on long open-sea routes, but routes may be a few hexes longer than the best one)
+PathfindingEngines = {"army": "a_star", "fleet": "a_star"}
+HierarchyClusterSize = 8
+
+# How often the in-memory game state (Armies, Movements, StatusTimers, Status, Seasons) is written to CSV
+StateFlushIntervalSeconds = 15
+# Row changes to Armies and Movements are journaled, their CSV is rewritten once this many have piled up
+JournalCompactionThreshold = 500
+
+# Where the game state sheets are kept: "csv" (one CSV per sheet) or "sqlite" (one WAL-mode database)
+SheetStorage = "csv"
+SqliteDatabaseFile = "Game.db"
@@ -1,12 +1,12 @@
-from utils.sheets.LocalSheetUtils import LocalSheetUtils
+from utils.sheets.GameStateStore import GameStateStore
 
 class MovementUtils:
     def __init__(self):
-        self.local_sheet_utils = LocalSheetUtils()
+        self.game_state_store = GameStateStore()
 
     def get_minutes_per_hex(self, troops_list, navy_list, siege_list):
         # 1) Load Seasons.csv
-        df = self.local_sheet_utils.get_sheet_by_name("Seasons")
+        df = self.game_state_store.get_sheet_by_name("Seasons")
         if df is None or df.empty:
             raise RuntimeError("Could not load Seasons.csv")
 
@@ -65,17 +65,11 @@ class MovementUtils:
         return minutes
 
     def get_army_breakdown(self, army_uid):
-        armies_df = self.local_sheet_utils.get_sheet_by_name("Armies")
-        if armies_df is None or armies_df.empty:
-            print("Army DF is Empty..")
-            return False, ["nan"], ["nan"], ["nan"], ["nan"], ["nan"]
-
-        army = armies_df[armies_df['Army UID'] == army_uid]
-        if army.empty:
+        row = self.game_state_store.get_row("Armies", army_uid)
+        if row is None:
             print("Army UID info empty")
             return False, ["nan"], ["nan"], ["nan"], ["nan"], ["nan"]
 
-        row = army.iloc[0]
         print(f"Row:\n{row}")
 
         # Fetch raw values
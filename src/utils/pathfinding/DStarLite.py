@@ -0,0 +1,157 @@
+import math
+from heapq import heappop, heappush
+from threading import Lock
+
+class DStarLite:
+    """
+    D* Lite planner for one movement: keeps its search state between calls so a route can be
+    repaired after the mover advances, the avoid list changes or the Map is re-downloaded,
+    instead of being searched again from scratch.
+    The search runs backwards from the goal, so g[node] is the cost of travelling node -> goal.
+    Entering a tile costs the tile's cost, and avoided tiles cannot be entered.
+    """
+
+    def __init__(self, graph, movement_type, start, goal, avoid=frozenset()):
+        self.graph = graph
+        self.movement_type = movement_type
+        self.start = start
+        self.goal = goal
+        self.avoid = set(avoid)
+        # Planners are shared between pool threads, only one call may touch the state at a time.
+        self.lock = Lock()
+
+        self.last_start = start
+        self.key_modifier = 0
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.open_set = []
+        self.open_keys = {}
+        self.push(goal)
+
+    def heuristic(self, node):
+        graph = self.graph
+        dq = graph.cube_q[node] - graph.cube_q[self.start]
+        dr = graph.cube_r[node] - graph.cube_r[self.start]
+        return (abs(dq) + abs(dr) + abs(dq + dr)) // 2 * graph.min_costs[self.movement_type]
+
+    def key(self, node):
+        best = min(self.g.get(node, math.inf), self.rhs.get(node, math.inf))
+        return (best + self.heuristic(node) + self.key_modifier, best)
+
+    def push(self, node):
+        key = self.key(node)
+        self.open_keys[node] = key
+        heappush(self.open_set, (key, node))
+
+    def edge_cost(self, node):
+        """Cost of stepping onto node."""
+        if node in self.avoid:
+            return math.inf
+        return self.graph.costs[self.movement_type][node]
+
+    def update_vertex(self, node):
+        if node != self.goal:
+            self.rhs[node] = min(
+                (self.edge_cost(neighbour) + self.g.get(neighbour, math.inf)
+                 for neighbour in self.graph.neighbours(self.movement_type, node)),
+                default=math.inf
+            )
+        self.open_keys.pop(node, None)
+        if self.g.get(node, math.inf) != self.rhs.get(node, math.inf):
+            self.push(node)
+
+    def update_predecessors(self, node):
+        for predecessor in self.graph.reverse_neighbours(self.movement_type, node):
+            self.update_vertex(predecessor)
+
+    def compute_shortest_path(self, stats, max_expansions=None):
+        expanded = 0
+        while self.open_set:
+            key, node = self.open_set[0]
+            if self.open_keys.get(node) != key:
+                # Stale heap entry: the node was re-queued with a new key or settled since.
+                heappop(self.open_set)
+                continue
+            start_key = self.key(self.start)
+            start_consistent = self.g.get(self.start, math.inf) == self.rhs.get(self.start, math.inf)
+            if key >= start_key and start_consistent:
+                break
+
+            if max_expansions is not None and expanded >= max_expansions:
+                stats["expanded"] = expanded
+                stats["aborted"] = f"gave up after {max_expansions} hexes"
+                return False
+            expanded += 1
+
+            heappop(self.open_set)
+            new_key = self.key(node)
+            if key < new_key:
+                self.push(node)
+                continue
+            del self.open_keys[node]
+            if self.g.get(node, math.inf) > self.rhs.get(node, math.inf):
+                self.g[node] = self.rhs[node]
+            else:
+                self.g[node] = math.inf
+                self.update_vertex(node)
+            self.update_predecessors(node)
+
+        stats["expanded"] = expanded
+        return True
+
+    def move_start(self, start):
+        """The mover has advanced (or been placed) on start."""
+        if start == self.start:
+            return
+        self.start = start
+        self.key_modifier += self.heuristic(self.last_start)
+        self.last_start = start
+
+    def set_avoid(self, avoid):
+        avoid = set(avoid)
+        changed = self.avoid ^ avoid
+        self.avoid = avoid
+        for node in changed:
+            self.update_predecessors(node)
+
+    def set_graph(self, graph):
+        """
+        Swap in a re-compiled Map. Returns False if the hexes changed, in which case the planner
+        has to be rebuilt; otherwise only the tiles whose cost or edges changed are repaired.
+        """
+        old_graph = self.graph
+        if old_graph is graph:
+            return True
+        if old_graph.hex_ids != graph.hex_ids:
+            return False
+
+        movement_type = self.movement_type
+        changed = [node for node in range(len(graph))
+                   if old_graph.costs[movement_type][node] != graph.costs[movement_type][node]
+                   or old_graph.neighbours(movement_type, node) != graph.neighbours(movement_type, node)]
+        self.graph = graph
+        for node in changed:
+            self.update_vertex(node)
+            # Edges into the tile may have appeared or gone, so look at old and new predecessors.
+            for predecessor in set(old_graph.reverse_neighbours(movement_type, node)) | set(graph.reverse_neighbours(movement_type, node)):
+                self.update_vertex(predecessor)
+        return True
+
+    def plan(self, stats=None, max_expansions=None):
+        """Repairs the search and returns the node path start -> goal, or None."""
+        if stats is None:
+            stats = {}
+        if not self.compute_shortest_path(stats, max_expansions):
+            return None
+        if self.g.get(self.start, math.inf) == math.inf:
+            return None
+
+        path = [self.start]
+        while path[-1] != self.goal:
+            node = path[-1]
+            neighbour = min(self.graph.neighbours(self.movement_type, node),
+                            key=lambda neighbour: self.edge_cost(neighbour) + self.g.get(neighbour, math.inf))
+            path.append(neighbour)
+            if len(path) > len(self.graph):
+                return None
+        return path
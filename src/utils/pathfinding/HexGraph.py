@@ -0,0 +1,266 @@
+import hashlib
+import math
+import os
+from array import array
+import numpy as np
+from utils.pathfinding.HexMathUtils import HexMathUtils
+
+class HexGraph:
+    """
+    Compiled, read-only form of the Map sheet used by the pathfinding engine.
+    Every hex is given an integer node ID (its row in the Map). The grid adjacency is stored
+    once as flat arrays, and for each movement type the graph keeps a cost table (inf for
+    impassable tiles), an edge mask over the grid edges, and the resulting passable adjacency.
+    """
+    MOVEMENT_TYPES = ("army", "fleet")
+    # Bump when the attributes saved by save() change, so older snapshots are rebuilt
+    SNAPSHOT_FORMAT = 1
+    # Attributes held as array('i') / array('d') per movement type, saved and loaded as they are
+    INT_TABLES = ("offsets", "targets", "reverse_offsets", "reverse_targets", "components")
+
+    def __init__(self, hexes, codec, holdings, grid_neighbours, costs, edge_masks, version=0):
+        # Map version this graph was compiled from, bumped on every Map re-download.
+        self.version = version
+        # MapStore the graph was compiled from, one HexRecord per node.
+        self.hexes = hexes
+        # Hex ID <-> node table, nodes are rows of the Map.
+        self.codec = codec
+        self.hex_ids = codec.hex_ids
+        self.index = codec.index
+        # Holding Name per node, None for hexes without a holding.
+        self.holdings = list(holdings)
+        # Case-insensitive, whitespace-normalised Hex ID / Holding Name -> node.
+        # Hex IDs win if a holding is ever named like a hex.
+        self.names = {}
+        for node, holding in enumerate(self.holdings):
+            if holding is not None:
+                self.names.setdefault(self.normalise_name(holding), node)
+        for node, hex_id in enumerate(self.hex_ids):
+            self.names[self.normalise_name(hex_id)] = node
+
+        # Offset (column, row) coordinates per node, used by the heuristic.
+        self.columns = array('i', codec.columns)
+        self.rows = array('i', codec.rows)
+        # Axial (q, r) coordinates per node, used by the hex-distance heuristic.
+        cube_q, cube_r, _ = HexMathUtils.offset_to_cube(self.columns, self.rows)
+        self.cube_q = cube_q.tolist()
+        self.cube_r = cube_r.tolist()
+
+        # Every map neighbour of node n is grid_targets[grid_offsets[n]:grid_offsets[n + 1]].
+        self.grid_offsets = array('i', [0])
+        self.grid_targets = array('i')
+        for node_neighbours in grid_neighbours:
+            self.grid_targets.extend(node_neighbours)
+            self.grid_offsets.append(len(self.grid_targets))
+
+        # Cost of entering each node per movement type, and which grid edges it may use.
+        self.costs = {movement_type: array('d', costs[movement_type]) for movement_type in self.MOVEMENT_TYPES}
+        # Cheapest tile per movement type, which keeps the heuristic admissible.
+        self.min_costs = {
+            movement_type: min((cost for cost in self.costs[movement_type] if cost != math.inf), default=1)
+            for movement_type in self.MOVEMENT_TYPES
+        }
+        self.edge_masks = {
+            movement_type: bytearray(allowed for node_mask in edge_masks[movement_type] for allowed in node_mask)
+            for movement_type in self.MOVEMENT_TYPES
+        }
+
+        # Passable adjacency per movement type: grid edges that are allowed and lead onto a finite-cost tile.
+        self.offsets = {}
+        self.targets = {}
+        for movement_type in self.MOVEMENT_TYPES:
+            cost = self.costs[movement_type]
+            mask = self.edge_masks[movement_type]
+            offsets = array('i', [0])
+            targets = array('i')
+            for node in range(len(self.hex_ids)):
+                for edge in range(self.grid_offsets[node], self.grid_offsets[node + 1]):
+                    neighbour = self.grid_targets[edge]
+                    if mask[edge] and cost[neighbour] != math.inf:
+                        targets.append(neighbour)
+                offsets.append(len(targets))
+            self.offsets[movement_type] = offsets
+            self.targets[movement_type] = targets
+
+        # The same edges reversed, so a search can run backwards from a goal.
+        self.reverse_offsets = {}
+        self.reverse_targets = {}
+        for movement_type in self.MOVEMENT_TYPES:
+            incoming = [[] for _ in self.hex_ids]
+            for node in range(len(self.hex_ids)):
+                for neighbour in self.neighbours(movement_type, node):
+                    incoming[neighbour].append(node)
+            offsets = array('i', [0])
+            targets = array('i')
+            for sources in incoming:
+                targets.extend(sources)
+                offsets.append(len(targets))
+            self.reverse_offsets[movement_type] = offsets
+            self.reverse_targets[movement_type] = targets
+
+        # Connected component label per node and movement type, -1 for impassable tiles.
+        # Between two passable tiles every edge goes both ways, so a plain flood fill is enough.
+        self.components = {}
+        for movement_type in self.MOVEMENT_TYPES:
+            cost = self.costs[movement_type]
+            labels = array('i', [-1]) * len(self.hex_ids)
+            label = 0
+            for seed in range(len(self.hex_ids)):
+                if labels[seed] != -1 or cost[seed] == math.inf:
+                    continue
+                labels[seed] = label
+                stack = [seed]
+                while stack:
+                    node = stack.pop()
+                    for neighbour in self.neighbours(movement_type, node):
+                        if labels[neighbour] == -1:
+                            labels[neighbour] = label
+                            stack.append(neighbour)
+                label += 1
+            self.components[movement_type] = labels
+
+    def __len__(self):
+        return len(self.hex_ids)
+
+    def node(self, hex_id):
+        return self.index.get(hex_id)
+
+    @staticmethod
+    def normalise_name(name):
+        return " ".join(str(name).split()).lower()
+
+    def resolve(self, identifier):
+        """Node for a Hex ID or Holding Name, or None if it is neither."""
+        if identifier is None:
+            return None
+        node = self.index.get(identifier)
+        if node is not None:
+            return node
+        return self.names.get(self.normalise_name(identifier))
+
+    def neighbours(self, movement_type, node):
+        offsets = self.offsets[movement_type]
+        return self.targets[movement_type][offsets[node]:offsets[node + 1]]
+
+    def reverse_neighbours(self, movement_type, node):
+        offsets = self.reverse_offsets[movement_type]
+        return self.reverse_targets[movement_type][offsets[node]:offsets[node + 1]]
+
+    def fingerprint(self):
+        """Digest of everything a route depends on, used to tell whether a saved route table is stale."""
+        digest = hashlib.sha1()
+        digest.update("\n".join(self.hex_ids).encode("utf-8"))
+        digest.update("\n".join(holding or "" for holding in self.holdings).encode("utf-8"))
+        digest.update(self.grid_targets.tobytes())
+        for movement_type in self.MOVEMENT_TYPES:
+            digest.update(self.costs[movement_type].tobytes())
+            digest.update(bytes(self.edge_masks[movement_type]))
+        return digest.hexdigest()
+
+    def holding_nodes(self):
+        return [node for node, holding in enumerate(self.holdings) if holding is not None]
+
+    def reachable(self, movement_type, start, goal, avoid=frozenset()):
+        """
+        Constant-time check of whether goal can be reached from start, ignoring the avoid set
+        apart from the goal itself and the start's immediate neighbours. A True answer still
+        needs a search when hexes are avoided, a False answer never does.
+        """
+        if start == goal:
+            return True
+        labels = self.components[movement_type]
+        label = labels[goal]
+        if label == -1 or goal in avoid:
+            return False
+        if labels[start] == label and not avoid:
+            return True
+        # The start may itself be impassable (a fleet in port), so look at where it can step to.
+        return any(labels[neighbour] == label and neighbour not in avoid
+                   for neighbour in self.neighbours(movement_type, start))
+
+    def save(self, file_path, key):
+        """
+        Writes the compiled graph to file_path as a binary snapshot. key identifies what it was
+        compiled from (the Map contents and the terrain rules), load() only accepts the same key.
+        """
+        arrays = {
+            "format": np.array(self.SNAPSHOT_FORMAT),
+            "key": np.array(key),
+            "holdings": np.array([holding or "" for holding in self.holdings]),
+            "name_keys": np.array(list(self.names)),
+            "name_nodes": np.array(list(self.names.values()), dtype=np.int32),
+            "cube_q": np.array(self.cube_q, dtype=np.int32),
+            "cube_r": np.array(self.cube_r, dtype=np.int32),
+            "grid_offsets": np.frombuffer(self.grid_offsets, dtype=np.int32),
+            "grid_targets": np.frombuffer(self.grid_targets, dtype=np.int32),
+        }
+        for movement_type in self.MOVEMENT_TYPES:
+            arrays[f"{movement_type}_costs"] = np.frombuffer(self.costs[movement_type], dtype=np.float64)
+            arrays[f"{movement_type}_edge_masks"] = np.frombuffer(bytes(self.edge_masks[movement_type]), dtype=np.uint8)
+            for table in self.INT_TABLES:
+                arrays[f"{movement_type}_{table}"] = np.frombuffer(getattr(self, table)[movement_type], dtype=np.int32)
+        # Write to a temporary file first so a half-written snapshot is never loaded.
+        temporary_path = f"{file_path}.tmp.npz"
+        try:
+            np.savez(temporary_path, **arrays)
+            os.replace(temporary_path, file_path)
+            return True
+        except Exception as e:
+            print(f"Error saving map snapshot {file_path}: {e}")
+            return False
+
+    @staticmethod
+    def int_array(values):
+        table = array('i')
+        table.frombytes(values.astype(np.int32).tobytes())
+        return table
+
+    @classmethod
+    def load(cls, file_path, hexes, codec, key, version=0):
+        """
+        The graph saved by save() with the same key, rebuilt around hexes and codec without
+        compiling anything. None if there is no such snapshot.
+        """
+        if not os.path.exists(file_path):
+            return None
+        try:
+            with np.load(file_path) as data:
+                if int(data["format"]) != cls.SNAPSHOT_FORMAT or str(data["key"]) != key:
+                    return None
+                graph = cls.__new__(cls)
+                graph.version = version
+                graph.hexes = hexes
+                graph.codec = codec
+                graph.hex_ids = codec.hex_ids
+                graph.index = codec.index
+                graph.holdings = [holding or None for holding in data["holdings"].tolist()]
+                graph.names = dict(zip(data["name_keys"].tolist(), data["name_nodes"].tolist()))
+                graph.columns = array('i', codec.columns)
+                graph.rows = array('i', codec.rows)
+                graph.cube_q = data["cube_q"].tolist()
+                graph.cube_r = data["cube_r"].tolist()
+                graph.grid_offsets = cls.int_array(data["grid_offsets"])
+                graph.grid_targets = cls.int_array(data["grid_targets"])
+                graph.costs = {
+                    movement_type: array('d', data[f"{movement_type}_costs"].tobytes())
+                    for movement_type in cls.MOVEMENT_TYPES
+                }
+                graph.edge_masks = {
+                    movement_type: bytearray(data[f"{movement_type}_edge_masks"].tobytes())
+                    for movement_type in cls.MOVEMENT_TYPES
+                }
+                for table in cls.INT_TABLES:
+                    setattr(graph, table, {
+                        movement_type: cls.int_array(data[f"{movement_type}_{table}"])
+                        for movement_type in cls.MOVEMENT_TYPES
+                    })
+            graph.min_costs = {
+                movement_type: min((cost for cost in graph.costs[movement_type] if cost != math.inf), default=1)
+                for movement_type in cls.MOVEMENT_TYPES
+            }
+            if len(graph.holdings) != len(codec) or len(graph.grid_offsets) != len(codec) + 1:
+                return None
+            return graph
+        except Exception as e:
+            print(f"Error reading map snapshot {file_path}: {e}")
+            return None
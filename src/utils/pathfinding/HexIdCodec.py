@@ -0,0 +1,83 @@
+import re
+
+class HexIdCodec:
+    """
+    Hex IDs are a column in bijective base 26 (A..Z, AA..AZ, BA.. with A = 0) followed by a
+    zero-padded row, e.g. AB00. The static methods convert single IDs; an instance is built
+    once per Map and turns every ID into a node number and back with plain dict / list lookups.
+    """
+    HEX_ID_PATTERN = re.compile(r"^([A-Za-z]+)(\d+)$")
+
+    def __init__(self, hex_ids):
+        self.hex_ids = list(hex_ids)
+        self.index = {hex_id: node for node, hex_id in enumerate(self.hex_ids)}
+        # Rows are written at the Map's own width, so maps past row 99 just use more digits.
+        self.row_width = 2
+        self.columns = []
+        self.rows = []
+        for hex_id in self.hex_ids:
+            column_part, row_part = self.split_hex_id(hex_id)
+            self.columns.append(self.column_to_index(column_part))
+            self.rows.append(int(row_part) if row_part else -1)
+            self.row_width = max(self.row_width, len(row_part))
+        # (column, row) -> node
+        self.grid = {(column, row): node for node, (column, row) in enumerate(zip(self.columns, self.rows))}
+
+    def __len__(self):
+        return len(self.hex_ids)
+
+    def node(self, hex_id):
+        return self.index.get(hex_id)
+
+    def node_at(self, column, row):
+        return self.grid.get((column, row))
+
+    def coordinates(self, node):
+        return self.columns[node], self.rows[node]
+
+    def format(self, column, row):
+        """Hex ID at (column, row): the Map's own ID if the hex exists, otherwise a new one."""
+        node = self.grid.get((column, row))
+        if node is not None:
+            return self.hex_ids[node]
+        if column < 0 or row < 0:
+            return None
+        return f"{self.index_to_column(column)}{row:0{self.row_width}d}"
+
+    # Flat-topped grid where even columns sit half a hex lower, so their diagonals are on row + 1
+    def grid_neighbours(self, node):
+        column, row = self.columns[node], self.rows[node]
+        diagonal = 1 if column % 2 == 0 else -1
+        neighbours = []
+        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, diagonal), (1, diagonal)):
+            neighbour = self.grid.get((column + dx, row + dy))
+            if neighbour is not None:
+                neighbours.append(neighbour)
+        return neighbours
+
+    @staticmethod
+    def split_hex_id(hex_id):
+        match = HexIdCodec.HEX_ID_PATTERN.match(str(hex_id).strip())
+        if match is None:
+            return "", ""
+        return match.group(1).upper(), match.group(2)
+
+    @staticmethod
+    def column_to_index(column_part):
+        if not column_part or not column_part.isalpha():
+            return -1  # Invalid column
+        index = 0
+        for char in column_part.upper():
+            index = index * 26 + (ord(char) - ord('A') + 1)
+        return index - 1  # A=0, ..., Z=25, AA=26, AB=27, ...
+
+    @staticmethod
+    def index_to_column(index):
+        if index < 0:
+            return None
+        column = ""
+        index += 1
+        while index:
+            index, remainder = divmod(index - 1, 26)
+            column = chr(ord('A') + remainder) + column
+        return column
@@ -0,0 +1,85 @@
+import numpy as np
+
+class HexMathUtils:
+    """
+    Hex grid maths on cube coordinates.
+    The Map uses flat-topped hexes in offset (column, row) coordinates where even columns
+    sit half a hex lower than odd ones, so an even column's diagonal neighbours are on row + 1.
+    Every function takes scalars or NumPy arrays and works on whole batches at once.
+    """
+
+    # Axial directions, in the same order as the ring walk
+    DIRECTIONS = np.array([(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)])
+
+    @staticmethod
+    def offset_to_cube(columns, rows):
+        columns = np.asarray(columns)
+        rows = np.asarray(rows)
+        q = columns
+        r = rows - (columns + (columns & 1)) // 2
+        return q, r, -q - r
+
+    @staticmethod
+    def cube_to_offset(q, r):
+        q = np.asarray(q)
+        r = np.asarray(r)
+        return q, r + (q + (q & 1)) // 2
+
+    @staticmethod
+    def hex_distance(a_columns, a_rows, b_columns, b_rows):
+        a_q, a_r, a_s = HexMathUtils.offset_to_cube(a_columns, a_rows)
+        b_q, b_r, b_s = HexMathUtils.offset_to_cube(b_columns, b_rows)
+        return np.maximum(np.maximum(np.abs(a_q - b_q), np.abs(a_r - b_r)), np.abs(a_s - b_s))
+
+    @staticmethod
+    def ring(column, row, radius):
+        """Offset coordinates of every hex exactly `radius` steps from (column, row)."""
+        if radius == 0:
+            return np.array([column]), np.array([row])
+        q, r, _ = HexMathUtils.offset_to_cube(column, row)
+        steps = np.arange(radius)
+        # Start `radius` steps out along direction 4, then walk each of the six sides.
+        start_q = q + HexMathUtils.DIRECTIONS[4][0] * radius
+        start_r = r + HexMathUtils.DIRECTIONS[4][1] * radius
+        corner_q = start_q + np.concatenate(([0], np.cumsum(HexMathUtils.DIRECTIONS[:5, 0] * radius)))
+        corner_r = start_r + np.concatenate(([0], np.cumsum(HexMathUtils.DIRECTIONS[:5, 1] * radius)))
+        ring_q = (corner_q[:, None] + HexMathUtils.DIRECTIONS[:, 0][:, None] * steps).ravel()
+        ring_r = (corner_r[:, None] + HexMathUtils.DIRECTIONS[:, 1][:, None] * steps).ravel()
+        return HexMathUtils.cube_to_offset(ring_q, ring_r)
+
+    @staticmethod
+    def range(column, row, radius):
+        """Offset coordinates of every hex within `radius` steps of (column, row), centre included."""
+        q, r, _ = HexMathUtils.offset_to_cube(column, row)
+        dq, dr = np.meshgrid(np.arange(-radius, radius + 1), np.arange(-radius, radius + 1), indexing='ij')
+        inside = np.abs(dq + dr) <= radius
+        return HexMathUtils.cube_to_offset(q + dq[inside], r + dr[inside])
+
+    @staticmethod
+    def line(a_column, a_row, b_column, b_row):
+        """Offset coordinates of the hexes on the straight line from a to b, both ends included."""
+        a_q, a_r, a_s = HexMathUtils.offset_to_cube(a_column, a_row)
+        b_q, b_r, b_s = HexMathUtils.offset_to_cube(b_column, b_row)
+        distance = int(max(abs(a_q - b_q), abs(a_r - b_r), abs(a_s - b_s)))
+        # Nudge off the edges so points exactly between two hexes round consistently.
+        t = np.linspace(0.0, 1.0, distance + 1)
+        q = a_q + 1e-6 + (b_q - a_q) * t
+        r = a_r + 1e-6 + (b_r - a_r) * t
+        s = a_s - 2e-6 + (b_s - a_s) * t
+        return HexMathUtils.cube_to_offset(*HexMathUtils.cube_round(q, r, s)[:2])
+
+    @staticmethod
+    def cube_round(q, r, s):
+        round_q = np.rint(q)
+        round_r = np.rint(r)
+        round_s = np.rint(s)
+        diff_q = np.abs(round_q - q)
+        diff_r = np.abs(round_r - r)
+        diff_s = np.abs(round_s - s)
+        # Recompute whichever component drifted furthest so q + r + s stays 0.
+        fix_q = (diff_q > diff_r) & (diff_q > diff_s)
+        fix_r = ~fix_q & (diff_r > diff_s)
+        round_q = np.where(fix_q, -round_r - round_s, round_q)
+        round_r = np.where(fix_r, -round_q - round_s, round_r)
+        round_s = -round_q - round_r
+        return round_q.astype(int), round_r.astype(int), round_s.astype(int)
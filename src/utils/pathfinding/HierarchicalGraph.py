@@ -0,0 +1,198 @@
+import math
+import time
+from heapq import heappop, heappush
+
+class HierarchicalGraph:
+    """
+    HPA*-style abstraction of one movement type of a HexGraph.
+    The map is cut into square clusters of offset coordinates. Every group of neighbouring
+    crossings between two clusters gets one entrance (a pair of hexes, one on each side), and the
+    cheapest path inside a cluster between each pair of its entrances is stored. A route is found
+    by searching this small abstract graph and then stitching the stored cluster paths together,
+    so long open-sea routes never expand every tile on the way.
+    Routes are near-optimal: they always pass through entrance hexes.
+    """
+
+    def __init__(self, graph, movement_type, cluster_size):
+        self.graph = graph
+        self.movement_type = movement_type
+        self.cluster_size = cluster_size
+        self.clusters = [(graph.columns[node] // cluster_size, graph.rows[node] // cluster_size) for node in range(len(graph))]
+
+        costs = graph.costs[movement_type]
+        # Every passable edge between two clusters, grouped so each group shares one entrance.
+        crossings = [(node, neighbour)
+                     for node in range(len(graph)) if costs[node] != math.inf
+                     for neighbour in graph.neighbours(movement_type, node)
+                     if self.clusters[node] != self.clusters[neighbour]]
+
+        # Abstract adjacency: node -> [(neighbour, cost)], and the hex path behind every abstract edge.
+        self.edges = {}
+        self.paths = {}
+        self.entrances = {}
+        for group in self.group_crossings(crossings):
+            node, neighbour = group[len(group) // 2]
+            self.add_edge(node, neighbour, costs[neighbour], [node, neighbour])
+            self.entrances.setdefault(self.clusters[node], set()).add(node)
+            self.entrances.setdefault(self.clusters[neighbour], set()).add(neighbour)
+
+        # Cheapest path inside each cluster between every pair of its entrances.
+        for cluster, entrances in self.entrances.items():
+            for entrance in entrances:
+                distances, parents, _ = self.cluster_search(entrance, {cluster})
+                for other in entrances:
+                    if other != entrance and other in distances:
+                        self.add_edge(entrance, other, distances[other], self.walk(parents, other))
+
+    def group_crossings(self, crossings):
+        """Splits crossings into groups whose hexes touch on both sides of the border."""
+        groups = []
+        by_border = {}
+        for node, neighbour in crossings:
+            by_border.setdefault((self.clusters[node], self.clusters[neighbour]), []).append((node, neighbour))
+
+        for border_crossings in by_border.values():
+            remaining = list(border_crossings)
+            while remaining:
+                group = [remaining.pop()]
+                grown = True
+                while grown:
+                    grown = False
+                    for crossing in list(remaining):
+                        if any(self.touches(crossing[0], member[0]) and self.touches(crossing[1], member[1]) for member in group):
+                            group.append(crossing)
+                            remaining.remove(crossing)
+                            grown = True
+                # Order along the border so the middle crossing is picked as the entrance.
+                group.sort(key=lambda crossing: (self.graph.columns[crossing[0]], self.graph.rows[crossing[0]]))
+                groups.append(group)
+        return groups
+
+    def touches(self, node, other):
+        return node == other or other in self.graph.neighbours(self.movement_type, node)
+
+    def add_edge(self, node, neighbour, cost, path):
+        if cost < self.paths.get((node, neighbour), (math.inf, None))[0]:
+            if (node, neighbour) not in self.paths:
+                self.edges.setdefault(node, []).append(neighbour)
+            self.paths[(node, neighbour)] = (cost, path)
+
+    def cluster_search(self, source, clusters, reverse=False):
+        """
+        Dijkstra from source that never leaves the given set of clusters (the source itself may
+        lie outside it). Returns (distances, parents, settled) with distances/parents keyed by node.
+        Reverse searches follow edges backwards, so distances are costs of reaching source.
+        """
+        graph = self.graph
+        costs = graph.costs[self.movement_type]
+        step = graph.reverse_neighbours if reverse else graph.neighbours
+        distances = {source: 0}
+        parents = {}
+        open_set = [(0, source)]
+        settled = 0
+        while open_set:
+            distance, current = heappop(open_set)
+            if distance > distances[current]:
+                continue
+            settled += 1
+            for neighbour in step(self.movement_type, current):
+                if self.clusters[neighbour] not in clusters:
+                    continue
+                tentative = distance + (costs[current] if reverse else costs[neighbour])
+                if tentative < distances.get(neighbour, math.inf):
+                    distances[neighbour] = tentative
+                    parents[neighbour] = current
+                    heappush(open_set, (tentative, neighbour))
+        return distances, parents, settled
+
+    def walk(self, parents, node, reverse=False):
+        path = [node]
+        while path[-1] in parents:
+            path.append(parents[path[-1]])
+        if not reverse:
+            path.reverse()
+        return path
+
+    def heuristic(self, node, goal):
+        graph = self.graph
+        dq = graph.cube_q[node] - graph.cube_q[goal]
+        dr = graph.cube_r[node] - graph.cube_r[goal]
+        return (abs(dq) + abs(dr) + abs(dq + dr)) // 2 * graph.min_costs[self.movement_type]
+
+    def search(self, start, goal, stats=None, max_expansions=None, deadline=None):
+        """
+        Node path from start to goal, or None. Fills stats like PathfindingUtils.a_star:
+        "expanded" counts abstract nodes plus hexes settled while linking start and goal in.
+        """
+        if stats is None:
+            stats = {}
+        # Link start and goal to the entrances around them. An impassable start (a fleet in port)
+        # may only touch water in a neighbouring cluster, so then the start also looks one step out.
+        start_clusters = {self.clusters[start]}
+        if self.graph.costs[self.movement_type][start] == math.inf:
+            start_clusters.update(self.clusters[node] for node in self.graph.neighbours(self.movement_type, start))
+        start_distances, start_parents, start_settled = self.cluster_search(start, start_clusters)
+        goal_distances, goal_parents, goal_settled = self.cluster_search(goal, {self.clusters[goal]}, reverse=True)
+        start_entrances = [entrance for cluster in start_clusters for entrance in self.entrances.get(cluster, ())
+                           if entrance in start_distances and entrance != start]
+        expanded = start_settled + goal_settled
+
+        # Successors as (neighbour, cost, how the hexes between them are found)
+        def successors(node):
+            if node == start:
+                for entrance in start_entrances:
+                    yield entrance, start_distances[entrance], "start"
+                if goal in start_distances:
+                    yield goal, start_distances[goal], "start"
+            for neighbour in self.edges.get(node, ()):
+                yield neighbour, self.paths[(node, neighbour)][0], "edge"
+            if node in goal_distances and node != goal:
+                yield goal, goal_distances[node], "goal"
+
+        open_set = [(self.heuristic(start, goal), 0, start)]
+        g_score = {start: 0}
+        came_from = {}
+        closed = set()
+        while open_set:
+            _, g, current = heappop(open_set)
+            if current in closed:
+                continue
+            closed.add(current)
+            stats["expanded"] = expanded + len(closed)
+            if max_expansions is not None and stats["expanded"] > max_expansions:
+                stats["aborted"] = f"gave up after {max_expansions} hexes"
+                return None
+            if deadline is not None and time.monotonic() > deadline:
+                stats["aborted"] = "ran out of time"
+                return None
+
+            if current == goal:
+                return self.refine(came_from, goal, start_parents, goal_parents)
+
+            for neighbour, cost, kind in successors(current):
+                tentative = g + cost
+                if neighbour not in closed and tentative < g_score.get(neighbour, math.inf):
+                    g_score[neighbour] = tentative
+                    came_from[neighbour] = (current, kind)
+                    heappush(open_set, (tentative + self.heuristic(neighbour, goal), tentative, neighbour))
+
+        return None
+
+    def refine(self, came_from, goal, start_parents, goal_parents):
+        """Expands the abstract path ending at goal into hexes using the stored cluster paths."""
+        segments = []
+        node = goal
+        while node in came_from:
+            previous, kind = came_from[node]
+            if kind == "start":
+                segments.append(self.walk(start_parents, node))
+            elif kind == "goal":
+                segments.append(self.walk(goal_parents, previous, reverse=True))
+            else:
+                segments.append(self.paths[(previous, node)][1])
+            node = previous
+
+        path = [node]
+        for segment in reversed(segments):
+            path.extend(segment[1:])
+        return path
@@ -0,0 +1,86 @@
+import math
+import os
+import numpy as np
+
+class HoldingRouteTable:
+    """
+    Precomputed routes between every pair of holdings, per movement type.
+    For each holding the table keeps the cost of reaching it from every other holding and the
+    next hop towards it from every hex, so a holding-to-holding route is read straight off the
+    table instead of being searched for. Tables are saved next to the Map and only rebuilt when
+    the compiled graph's fingerprint changes.
+    """
+
+    def __init__(self, fingerprint, holding_nodes, costs, next_hops):
+        self.fingerprint = fingerprint
+        # Holding node -> its row/column in the tables
+        self.holding_nodes = holding_nodes
+        self.slots = {int(node): slot for slot, node in enumerate(holding_nodes)}
+        # costs[movement_type][from_slot, to_slot]: cost of the route, inf if there is none
+        self.costs = costs
+        # next_hops[movement_type][to_slot, node]: next node from node towards the holding, -1 if unreachable
+        self.next_hops = next_hops
+
+    @classmethod
+    def build(cls, graph, pathfinding_utils):
+        holding_nodes = np.array(graph.holding_nodes(), dtype=np.int32)
+        # Node IDs fit in 16 bits on any map we draw, which halves the size of the next-hop tables.
+        hop_dtype = np.int16 if len(graph) < np.iinfo(np.int16).max else np.int32
+        costs = {}
+        next_hops = {}
+        for movement_type in graph.MOVEMENT_TYPES:
+            cost_table = np.full((len(holding_nodes), len(holding_nodes)), np.inf, dtype=np.float32)
+            hop_table = np.empty((len(holding_nodes), len(graph)), dtype=hop_dtype)
+            for slot, target in enumerate(holding_nodes):
+                # A reverse search from the holding gives every hex's distance and next hop towards it.
+                distances, tree = pathfinding_utils.dijkstra(graph, movement_type, int(target), reverse=True)
+                distances = np.frombuffer(distances, dtype=np.float64)
+                cost_table[:, slot] = distances[holding_nodes]
+                hop_table[slot] = np.frombuffer(tree, dtype=np.int32)
+            costs[movement_type] = cost_table
+            next_hops[movement_type] = hop_table
+        return cls(graph.fingerprint(), holding_nodes, costs, next_hops)
+
+    @classmethod
+    def load(cls, file_path, graph):
+        """Returns the saved table if it was built from this graph, otherwise None."""
+        if not os.path.exists(file_path):
+            return None
+        try:
+            with np.load(file_path) as data:
+                if str(data["fingerprint"]) != graph.fingerprint():
+                    return None
+                costs = {movement_type: data[f"{movement_type}_costs"] for movement_type in graph.MOVEMENT_TYPES}
+                next_hops = {movement_type: data[f"{movement_type}_next_hops"] for movement_type in graph.MOVEMENT_TYPES}
+                return cls(str(data["fingerprint"]), data["holding_nodes"], costs, next_hops)
+        except Exception as e:
+            print(f"Error reading route table {file_path}: {e}")
+            return None
+
+    def save(self, file_path):
+        arrays = {"fingerprint": np.array(self.fingerprint), "holding_nodes": self.holding_nodes}
+        for movement_type in self.costs:
+            arrays[f"{movement_type}_costs"] = self.costs[movement_type]
+            arrays[f"{movement_type}_next_hops"] = self.next_hops[movement_type]
+        # Write to a temporary file first so a half-written table is never loaded.
+        temporary_path = f"{file_path}.tmp.npz"
+        try:
+            np.savez_compressed(temporary_path, **arrays)
+            os.replace(temporary_path, file_path)
+            return True
+        except Exception as e:
+            print(f"Error saving route table {file_path}: {e}")
+            return False
+
+    def covers(self, start, goal):
+        return start in self.slots and goal in self.slots
+
+    def route(self, movement_type, start, goal):
+        """Node path from holding start to holding goal, or None if there is no route."""
+        if self.costs[movement_type][self.slots[start], self.slots[goal]] == math.inf:
+            return None
+        next_hop = self.next_hops[movement_type][self.slots[goal]]
+        path = [start]
+        while path[-1] != goal:
+            path.append(int(next_hop[path[-1]]))
+        return path
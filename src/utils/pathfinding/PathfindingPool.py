@@ -0,0 +1,198 @@
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock
+from utils.pathfinding.PathfindingUtils import PathfindingUtils
+import settings as settings
+
+class PathfindingPool:
+    """
+    Runs pathfinding on a small, dedicated thread pool so command handlers can await it
+    without blocking the Discord event loop (gateway heartbeat, tasks.loop tickers).
+    Every search gets a node-expansion budget and a wall-clock deadline counted from
+    submission, so a burst of orders cannot queue up unbounded work.
+    Batches of searches go to a process pool whose workers each hold a read-only copy of the
+    compiled map, so they run in parallel; there each search's time only starts once a worker
+    picks it up, so starting the workers after a Map reload does not eat into it.
+    The executors and the metrics are shared by every instance.
+    """
+    _executor = None
+    _process_executor = None
+    _process_executor_version = None
+    _lock = Lock()
+    _queued = 0
+    _running = 0
+    _completed = 0
+    _aborted = 0
+    _latencies_ms = deque(maxlen=500)
+
+    def __init__(self):
+        self.pathfinding_utils = PathfindingUtils()
+
+    @classmethod
+    def executor(cls):
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=settings.PathfindingWorkers, thread_name_prefix="pathfinding"
+                )
+            return cls._executor
+
+    async def find_path(self, movement_type, start, goal, avoid=None):
+        """
+        Returns the search_route result dict, plus queue_ms and search_ms timings.
+        status is "aborted" if the search ran out of expansions or time.
+        """
+        submitted = time.monotonic()
+        deadline = submitted + settings.PathfindingTimeoutSeconds
+        return await self.submit(self.timed_search, submitted, deadline, movement_type, start, goal, avoid)
+
+    @classmethod
+    def process_executor(cls, graph, route_table):
+        with cls._lock:
+            # Workers keep the graph they were started with, so start new ones when the Map changes.
+            if cls._process_executor is None or cls._process_executor_version != graph.version:
+                if cls._process_executor is not None:
+                    cls._process_executor.shutdown(wait=False)
+                cls._process_executor = ProcessPoolExecutor(
+                    max_workers=settings.PathfindingProcesses,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=load_worker_graph, initargs=(graph, route_table)
+                )
+                cls._process_executor_version = graph.version
+            return cls._process_executor
+
+    async def find_paths(self, requests):
+        """
+        Searches a batch of (movement_type, start, goal, avoid) requests in parallel and returns
+        their search_route result dicts in the same order. A request that fails gets a "no_path"
+        result of its own instead of failing the whole batch.
+        """
+        if not requests:
+            return []
+        submitted = time.monotonic()
+        graph = await self.submit(self.pathfinding_utils.get_hex_graph)
+        if graph is None:
+            return [self.search_or_fail(request) for request in requests]
+
+        route_table = await self.submit(self.pathfinding_utils.get_route_table, graph)
+        loop = asyncio.get_running_loop()
+        executor = self.process_executor(graph, route_table)
+        results = await asyncio.gather(*[
+            loop.run_in_executor(
+                executor, search_in_worker, movement_type, start, goal, avoid,
+                settings.PathfindingMaxExpansions, settings.PathfindingTimeoutSeconds
+            )
+            for movement_type, start, goal, avoid in requests
+        ], return_exceptions=True)
+        results = [
+            failed_search(request, result) if isinstance(result, Exception) else result
+            for request, result in zip(requests, results)
+        ]
+        self.record(results, submitted)
+        return results
+
+    def search_or_fail(self, request):
+        try:
+            return self.pathfinding_utils.search_route(*request)
+        except Exception as e:
+            return failed_search(request, e)
+
+    async def reroute(self, movement_uid, movement_type, current_hex, goal, avoid=None):
+        """Repairs a movement's incremental plan off the event loop, see PathfindingUtils.reroute_path."""
+        submitted = time.monotonic()
+        result = await self.submit(
+            self.pathfinding_utils.reroute_path, movement_uid, movement_type, current_hex, goal, avoid,
+            settings.PathfindingMaxExpansions
+        )
+        self.record([result], submitted)
+        return result
+
+    def forget_planner(self, movement_uid):
+        """Drops a finished or cancelled movement's reroute plan. Cheap, so it runs right away."""
+        self.pathfinding_utils.forget_planner(movement_uid)
+
+    async def distance_field(self, movement_type, origin, reverse=False):
+        return await self.submit(self.pathfinding_utils.distance_field, movement_type, origin, reverse)
+
+    async def submit(self, function, *args):
+        with self._lock:
+            PathfindingPool._queued += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor(), self.run_tracked, function, args)
+
+    def run_tracked(self, function, args):
+        with self._lock:
+            PathfindingPool._queued -= 1
+            PathfindingPool._running += 1
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                PathfindingPool._running -= 1
+
+    def timed_search(self, submitted, deadline, movement_type, start, goal, avoid):
+        started = time.monotonic()
+        if started > deadline:
+            result = {"status": "aborted", "path": None, "terrain_values": None, "expanded": 0,
+                      "reason": "Pathfinding is overloaded right now, try again in a moment."}
+        else:
+            result = self.pathfinding_utils.search_route(
+                movement_type, start, goal, avoid, settings.PathfindingMaxExpansions, deadline
+            )
+        finished = time.monotonic()
+        result["queue_ms"] = (started - submitted) * 1000
+        result["search_ms"] = (finished - started) * 1000
+        self.record([result], submitted)
+        return result
+
+    # The one place searches are counted, so the warm-up work submitted alongside them is not
+    @classmethod
+    def record(cls, results, submitted):
+        finished = time.monotonic()
+        with cls._lock:
+            cls._completed += len(results)
+            cls._aborted += sum(result["status"] == "aborted" for result in results)
+            cls._latencies_ms.append((finished - submitted) * 1000)
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            latencies = sorted(cls._latencies_ms)
+            queued, running, completed, aborted = cls._queued, cls._running, cls._completed, cls._aborted
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+        return {
+            "queue_depth": queued,
+            "running": running,
+            "completed": completed,
+            "aborted": aborted,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": latencies[-1] if latencies else 0.0
+        }
+
+
+# Process pool workers: the compiled graph and route table are handed over once when the
+# worker starts, so every search in that worker reuses them instead of reading the Map.
+def load_worker_graph(graph, route_table):
+    PathfindingUtils._hex_graph = graph
+    PathfindingUtils._route_table = route_table
+    PathfindingUtils._route_table_graph = graph
+
+
+def search_in_worker(movement_type, start, goal, avoid, max_expansions, timeout_seconds):
+    deadline = time.monotonic() + timeout_seconds
+    return PathfindingUtils().search_route(movement_type, start, goal, avoid, max_expansions, deadline)
+
+
+def failed_search(request, error):
+    print(f"Error: Pathfinding request {request} failed: {error}")
+    return {"status": "no_path", "path": None, "terrain_values": None, "expanded": 0,
+            "reason": "Something went wrong while searching for this path."}
@@ -1,66 +1,302 @@
+import hashlib
 import math
-import pandas as pd
+import time
+from array import array
 from heapq import heappop, heappush
+from threading import Lock
+from cachetools import LRUCache
 from utils.sheets.LocalSheetUtils import LocalSheetUtils
+from utils.sheets.MapStore import MapStore
+from utils.pathfinding.DStarLite import DStarLite
+from utils.pathfinding.HexGraph import HexGraph
+from utils.pathfinding.HexIdCodec import HexIdCodec
+from utils.pathfinding.HierarchicalGraph import HierarchicalGraph
+from utils.pathfinding.HoldingRouteTable import HoldingRouteTable
+from utils.pathfinding.RouteCache import RouteCache
+import settings as settings
 
 class PathfindingUtils:
+    _hex_graph = None
+    _hex_graph_lock = Lock()
+    # Only one Map reload runs at a time, see reload_map
+    _reload_lock = Lock()
+    # Holding-to-holding routes for the current graph, see get_route_table
+    _route_table = None
+    _route_table_graph = None
+    _route_table_lock = Lock()
+    # Movement type -> HierarchicalGraph of the current graph, see get_hierarchy
+    _hierarchies = {}
+    _hierarchies_lock = Lock()
+    # Movement UID -> DStarLite planner kept between reroutes of that movement
+    _planners = LRUCache(maxsize=settings.ReroutePlannerCacheSize)
+    _planners_lock = Lock()
+    route_cache = RouteCache(settings.RouteCacheSize, settings.RouteCacheTTLSeconds)
+    # (map version, movement type, source node, reverse) -> (distances, tree), see distance_field
+    _distance_fields = LRUCache(maxsize=settings.DistanceFieldCacheSize)
+    _distance_fields_lock = Lock()
+
+    # Cost of entering a tile for an army, anything not listed costs 1
+    ARMY_TERRAIN_COSTS = {"Hills": 2, "Swamp": 2, "Desert": 1,
+                          "Forest": 2, "Dense Forest": 3, "Snow": 1,
+                          "Snowy Forest": 3, "Plains": 1, "Coast": 1,
+                          "Island": 1, "Peninsula": 1, "Sea": math.inf}
+    # Terrain an army can only cross along a road or through a holding
+    ARMY_ROAD_ONLY_TERRAIN = ("Mountains", "The Wall")
+    # Terrain a fleet can sail through
+    FLEET_TERRAIN = ("Sea", "Coast", "Island", "Peninsula")
+    # Bump whenever terrain_movement_cost or edge_allowed change, so saved graphs are rebuilt
+    RULES_VERSION = 1
+
     def __init__(self):
         self.local_sheet_utils = LocalSheetUtils()
 
-    def retrieve_digital_map(self):
-        try:
-            df = self.local_sheet_utils.get_sheet_by_name("Map")
-            if df is None or df.empty:
-                print("Error: Map is empty or missing.")
-                return []
-            # Convert the DataFrame to a list of dictionaries
-            map_data = df.to_dict(orient='records')
-            return map_data
-        except Exception as e:
-            print(f"Error reading the map: {e}")
-            return []
+    # Digest of the terrain rules a compiled graph depends on, so a rules change rebuilds the snapshot.
+    # The tables are hashed as they are, the code behind them only through RULES_VERSION.
+    def compile_rules_fingerprint(self):
+        digest = hashlib.sha1()
+        digest.update(repr((self.RULES_VERSION, sorted(self.ARMY_TERRAIN_COSTS.items()),
+                            self.ARMY_ROAD_ONLY_TERRAIN, self.FLEET_TERRAIN)).encode("utf-8"))
+        return digest.hexdigest()
+
+    # Compile the Map into a HexGraph: the terrain rules and the peninsula restriction are
+    # evaluated once per hex / edge here, so the search itself never looks at terrain strings
+    # hexes is a MapStore, or raw Map rows that get wrapped in one.
+    # A graph compiled from a Map.csv is saved next to it as Map.graph.npz and loaded from there
+    # until the CSV's contents or the rules change.
+    def build_hex_graph(self, hexes, version=0):
+        if not isinstance(hexes, MapStore):
+            hexes = MapStore(hexes, version)
+        codec = HexIdCodec(record.hex_id for record in hexes)
+        snapshot_path = f"{self.local_sheet_utils.DIR}/Map.graph.npz"
+        snapshot_key = f"{hexes.digest}:{self.compile_rules_fingerprint()}" if hexes.digest else None
+        if snapshot_key is not None:
+            graph = HexGraph.load(snapshot_path, hexes, codec, snapshot_key, hexes.version)
+            if graph is not None:
+                return graph
+        terrains = [record.terrain for record in hexes]
+        grid_neighbours = [codec.grid_neighbours(node) for node in range(len(codec))]
+
+        costs = {}
+        edge_masks = {}
+        for movement_type in HexGraph.MOVEMENT_TYPES:
+            costs[movement_type] = array('d', [self.terrain_movement_cost(movement_type, record) for record in hexes])
+            edge_masks[movement_type] = [
+                [self.edge_allowed(movement_type, terrains[node], terrains[neighbor]) for neighbor in neighbours]
+                for node, neighbours in enumerate(grid_neighbours)
+            ]
+        holdings = [record.holding_name for record in hexes]
+        graph = HexGraph(hexes, codec, holdings, grid_neighbours, costs, edge_masks, hexes.version)
+        if snapshot_key is not None:
+            graph.save(snapshot_path, snapshot_key)
+        return graph
+
+    # The compiled graph is shared by every PathfindingUtils instance and only built once
+    def get_hex_graph(self):
+        graph = PathfindingUtils._hex_graph
+        if graph is not None:
+            return graph
+        # Searches run on worker threads, so make sure only one of them compiles the Map.
+        with PathfindingUtils._hex_graph_lock:
+            if PathfindingUtils._hex_graph is None:
+                hexes = MapStore.current()
+                if not hexes:
+                    return None
+                PathfindingUtils._hex_graph = self.build_hex_graph(hexes)
+            return PathfindingUtils._hex_graph
+
+    # Precomputed holding-to-holding routes for graph, loaded from next to the Map if they were
+    # built from the same graph and rebuilt (and saved) otherwise
+    def get_route_table(self, graph):
+        if PathfindingUtils._route_table_graph is graph:
+            return PathfindingUtils._route_table
+        with PathfindingUtils._route_table_lock:
+            if PathfindingUtils._route_table_graph is not graph:
+                file_path = f"{self.local_sheet_utils.DIR}/Map.routes.npz"
+                table = HoldingRouteTable.load(file_path, graph)
+                if table is None:
+                    print("Building holding route table.")
+                    table = HoldingRouteTable.build(graph, self)
+                    table.save(file_path)
+                PathfindingUtils._route_table = table
+                PathfindingUtils._route_table_graph = graph
+            return PathfindingUtils._route_table
+
+    # Cluster abstraction of graph for one movement type, built the first time it is needed
+    def get_hierarchy(self, graph, movement_type):
+        with PathfindingUtils._hierarchies_lock:
+            hierarchy = PathfindingUtils._hierarchies.get(movement_type)
+            if hierarchy is None or hierarchy.graph is not graph:
+                hierarchy = HierarchicalGraph(graph, movement_type, settings.HierarchyClusterSize)
+                PathfindingUtils._hierarchies[movement_type] = hierarchy
+            return hierarchy
+
+    # Re-read Map.csv and build the new graph and route table next to the old ones, then swap the
+    # graph in with a single assignment. Searches already running keep the graph they started with.
+    # Blocking, so call it off the event loop. Returns True if a new Map version was swapped in.
+    def reload_map(self):
+        with PathfindingUtils._reload_lock:
+            previous = MapStore._current
+            store = MapStore.reload()
+            if store is None or store is previous:
+                return False
+            graph = self.build_hex_graph(store)
+            self.get_route_table(graph)
+            with PathfindingUtils._hex_graph_lock:
+                PathfindingUtils._hex_graph = graph
+            # Cached routes and fields are keyed by map version, so the old ones are simply dead weight.
+            self.route_cache.clear()
+            with self._distance_fields_lock:
+                self._distance_fields.clear()
+            print(f"Map reloaded, now on version {graph.version}.")
+            return True
+
+    # Heuristic function: hex distance between two nodes times the cheapest tile cost.
+    # It never overestimates and never drops by more than one step's cost per move, so A* can close nodes.
+    def heuristic(self, graph, movement_type, node, goal):
+        dq = graph.cube_q[node] - graph.cube_q[goal]
+        dr = graph.cube_r[node] - graph.cube_r[goal]
+        return (abs(dq) + abs(dr) + abs(dq + dr)) // 2 * graph.min_costs[movement_type]
+
+    # A* Pathfinding Algorithm over the compiled graph, start/goal/avoid are node IDs.
+    # If a stats dict is given, the number of expanded nodes is recorded in it. The search gives up
+    # after max_expansions nodes or once time.monotonic() passes deadline, setting stats["aborted"].
+    def a_star(self, graph, movement_type, start, goal, avoid, stats=None, max_expansions=None, deadline=None):
+        if movement_type not in HexGraph.MOVEMENT_TYPES:
+            if stats is not None:
+                stats["expanded"] = 0
+            return None, None
+        costs = graph.costs[movement_type]
+        offsets = graph.offsets[movement_type]
+        targets = graph.targets[movement_type]
 
-    # Heuristic function: straight-line distance between two hexes
-    def heuristic(self, hex1, hex2):
-        x1, y1 = self.hex_to_coordinates(hex1)
-        x2, y2 = self.hex_to_coordinates(hex2)
-        return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-
-    # A* Pathfinding Algorithm
-    def a_star(self, movement_type, start, goal, hexes, avoid):
-        hex_map = {hex['Hex']: hex for hex in hexes}
-        
-        # Translate avoid list into hex IDs
-        avoid_hexes = set()
-        for hex_data in hexes:
-            if hex_data['Hex'] in avoid or hex_data.get('Holding Name') in avoid:
-                avoid_hexes.add(hex_data['Hex'])
-        
         open_set = []
-        heappush(open_set, (0, start))  # (priority, hex)
+        start_h = self.heuristic(graph, movement_type, start, goal)
+        heappush(open_set, (start_h, start_h, start))  # (priority, heuristic for tie-breaks, node)
         came_from = {}
         g_score = {start: 0}
-        f_score = {start: self.heuristic(start, goal)}
-        
+        closed = set()
+
         while open_set:
-            _, current = heappop(open_set)
-            
+            _, _, current = heappop(open_set)
+            if current in closed:
+                continue
+            closed.add(current)
+
+            if max_expansions is not None and len(closed) > max_expansions:
+                return self.abort_search(stats, len(closed), f"gave up after {max_expansions} hexes")
+            if deadline is not None and len(closed) % 64 == 0 and time.monotonic() > deadline:
+                return self.abort_search(stats, len(closed), "ran out of time")
+
             if current == goal:
-                return self.reconstruct_path(came_from, current), self.extract_terrain_values(came_from, current, hex_map, movement_type)
-            
-            neighbors = self.get_neighbors(movement_type, current, hex_map, avoid_hexes)
-            for neighbor in neighbors:
-                terrain_cost = self.terrain_movement_cost(movement_type, hex_map[neighbor])
-                tentative_g_score = g_score[current] + terrain_cost
-                
+                if stats is not None:
+                    stats["expanded"] = len(closed)
+                path = self.reconstruct_path(came_from, current)
+                return [graph.hex_ids[node] for node in path], self.extract_terrain_values(graph, movement_type, path)
+
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if neighbor in avoid or neighbor in closed:
+                    continue
+                tentative_g_score = g_score[current] + costs[neighbor]
+
                 if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
                     came_from[neighbor] = current
                     g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + self.heuristic(neighbor, goal)
-                    heappush(open_set, (f_score[neighbor], neighbor))
-        
+                    h = self.heuristic(graph, movement_type, neighbor, goal)
+                    heappush(open_set, (tentative_g_score + h, h, neighbor))
+
+        if stats is not None:
+            stats["expanded"] = len(closed)
         return None, None  # No path found
 
+    # Route search using the engine configured for the movement type in settings.PathfindingEngines.
+    # Same contract as a_star. The hierarchy is built without avoid lists, so those always use A*.
+    def find_route(self, graph, movement_type, start, goal, avoid, stats=None, max_expansions=None, deadline=None):
+        if settings.PathfindingEngines.get(movement_type) != "hierarchical" or avoid:
+            return self.a_star(graph, movement_type, start, goal, avoid, stats, max_expansions, deadline)
+
+        if stats is None:
+            stats = {}
+        nodes = self.get_hierarchy(graph, movement_type).search(start, goal, stats, max_expansions, deadline)
+        if nodes is None:
+            if "aborted" in stats:
+                return None, None
+            # Entrances only ever miss a route in odd corners of the map, so let A* make sure.
+            return self.a_star(graph, movement_type, start, goal, avoid, stats, max_expansions, deadline)
+        return [graph.hex_ids[node] for node in nodes], self.extract_terrain_values(graph, movement_type, nodes)
+
+    def abort_search(self, stats, expanded, reason):
+        if stats is not None:
+            stats["expanded"] = expanded
+            stats["aborted"] = reason
+        return None, None
+
+    # Single-source Dijkstra over the compiled graph, returning (distances, tree) arrays.
+    # Forward: distances[n] is the cost of travelling source -> n and tree[n] is n's predecessor.
+    # Reverse: distances[n] is the cost of travelling n -> source and tree[n] is n's next hop towards it.
+    # Unreachable nodes keep an infinite distance and -1 in the tree.
+    def dijkstra(self, graph, movement_type, source, reverse=False, avoid=frozenset()):
+        costs = graph.costs[movement_type]
+        if reverse:
+            offsets = graph.reverse_offsets[movement_type]
+            targets = graph.reverse_targets[movement_type]
+        else:
+            offsets = graph.offsets[movement_type]
+            targets = graph.targets[movement_type]
+
+        distances = array('d', [math.inf]) * len(graph)
+        tree = array('i', [-1]) * len(graph)
+        distances[source] = 0
+        open_set = [(0, source)]
+
+        while open_set:
+            distance, current = heappop(open_set)
+            if distance > distances[current]:
+                continue
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if neighbor in avoid:
+                    continue
+                # Every edge costs the tile being entered: the neighbour going forwards, current going backwards.
+                tentative = distance + (costs[current] if reverse else costs[neighbor])
+                if tentative < distances[neighbor]:
+                    distances[neighbor] = tentative
+                    tree[neighbor] = current
+                    heappush(open_set, (tentative, neighbor))
+
+        return distances, tree
+
+    # Cached one-to-all (or all-to-one, if reverse) distance field for a hex or holding name.
+    # Returns (graph, source node, distances, tree), or None if the origin does not resolve.
+    def distance_field(self, movement_type, origin, reverse=False):
+        graph = self.get_hex_graph()
+        if graph is None:
+            return None
+        source = self.resolve_node(graph, origin)
+        if source is None:
+            return None
+
+        movement_type = movement_type.lower()
+        if movement_type not in HexGraph.MOVEMENT_TYPES:
+            return None
+        key = (graph.version, movement_type, source, reverse)
+        with self._distance_fields_lock:
+            field = self._distance_fields.get(key)
+        if field is None:
+            field = self.dijkstra(graph, movement_type, source, reverse)
+            with self._distance_fields_lock:
+                self._distance_fields[key] = field
+        distances, tree = field
+        return graph, source, distances, tree
+
+    # Walk a distance-field tree from node back to its source, returning the hex IDs source -> node
+    # for a forward field, or node -> source for a reverse one.
+    def path_from_tree(self, graph, tree, node, reverse=False):
+        path = [node]
+        while tree[path[-1]] != -1:
+            path.append(tree[path[-1]])
+        if not reverse:
+            path.reverse()
+        return [graph.hex_ids[step] for step in path]
+
     # Reconstruct the path from the came_from dictionary
     def reconstruct_path(self, came_from, current):
         path = [current]
@@ -71,154 +307,251 @@ class PathfindingUtils:
         return path
 
     # Extract terrain values for the path
-    def extract_terrain_values(self, came_from, current, hex_map, movement_type):
-        path = self.reconstruct_path(came_from, current)
-        return [self.terrain_movement_cost(movement_type, hex_map[hex_id]) for hex_id in path]
+    def extract_terrain_values(self, graph, movement_type, path):
+        costs = graph.costs[movement_type]
+        return [int(costs[node]) if costs[node] != math.inf else math.inf for node in path]
 
     # Determine movement cost based on terrain, with special rules for Mountains and The Wall
-    def terrain_movement_cost(self, movement_type, hex_data):
-        terrain = hex_data["Terrain"]
-        print(hex_data)
-        has_road = hex_data.get("Road", False)
-        has_river = hex_data.get("River", False)
-        has_holding = hex_data.get("Holding Name", False)
-        print(f"road: {has_road}, river {has_river}, holding {has_holding}")
+    def terrain_movement_cost(self, movement_type, record):
+        terrain = record.terrain
+        has_road = record.road
+        has_river = record.river
+        # Any filled-in Holding Name cell counts here, "FALSE" included, as it always has
+        has_holding = record.holding_cell
 
         if movement_type == "army":
-            if has_river == True and (has_road == False and has_holding == False):
-                return float('inf')
-            if terrain == "Mountains" or terrain == "The Wall":
-                return 3 if has_road or has_holding else float('inf')
-            if terrain == "Sea":
-                return float('inf')
-            terrain_costs = {"Hills": 2, "Swamp": 2, "Desert": 1, 
-                             "Forest": 2, "Dense Forest": 3, "Snow": 1,
-                             "Snowy Forest": 3, "Plains": 1, "Coast": 1, 
-                             "Island": 1, "Peninsula": 1}
-            return terrain_costs.get(terrain, 1)
-
-        if movement_type == "fleet" and terrain in ["Sea", "Coast", "Island", "Peninsula"]:
-            return 1
-        return float('inf')
-
-    # Get the neighbors of a hex, considering avoid list
-    def get_neighbors(self, movement_type, hex_id, hex_map, avoid_hexes):
-        col_part, row_part = self.split_hex_id(hex_id)
-        row = int(row_part)
-        neighbors = []
-        
-        column_index = self.column_to_index(col_part)
-        
-        # Hex grid movement offsets based on column parity
-        offsets = [
-            (-1, 0), (1, 0),  # Left, Right
-            (0, -1), (0, 1),  # Top, Bottom
-            (-1, 1) if column_index % 2 == 0 else (-1, -1),  # Top-left / Bottom-left
-            (1, 1) if column_index % 2 == 0 else (1, -1),  # Top-right / Bottom-right
-        ]
-        
-        for dx, dy in offsets:
-            neighbor_col = self.index_to_column(column_index + dx)
-            neighbor_row = row + dy
-            neighbor_id = f"{neighbor_col}{neighbor_row:02d}"  # Ensure row is two digits
-            
-            if neighbor_id in hex_map and neighbor_id not in avoid_hexes:
-                neighbor_hex = hex_map[neighbor_id]
-                terrain_cost = self.terrain_movement_cost(movement_type, neighbor_hex)
-
-                if terrain_cost == float('inf'):
-                    continue
+            if has_river and not (has_road or has_holding):
+                return math.inf
+            if terrain in self.ARMY_ROAD_ONLY_TERRAIN:
+                return 3 if has_road or has_holding else math.inf
+            return self.ARMY_TERRAIN_COSTS.get(terrain, 1)
 
-                # Prevent direct fleet movement through Peninsulas
-                if movement_type == "fleet":
-                    current_terrain = hex_map[hex_id]["Terrain"]
-                    neighbor_terrain = neighbor_hex["Terrain"]
+        if movement_type == "fleet" and terrain in self.FLEET_TERRAIN:
+            return 1
+        return math.inf
 
-                    if current_terrain == "Peninsula" or neighbor_terrain == "Peninsula":
-                        # Block fleet travel between coast/water via Peninsula
-                        if (current_terrain in ["Sea", "Coast", "Island", "Peninsula"] and 
-                            neighbor_terrain in ["Sea", "Coast", "Island", "Peninsula"]):
-                            continue  # Disallow direct hop through/into peninsula tile
+    # Prevent direct fleet movement through Peninsulas, used to build the fleet edge mask
+    def edge_allowed(self, movement_type, current_terrain, neighbor_terrain):
+        if movement_type != "fleet":
+            return True
+        if current_terrain == "Peninsula" or neighbor_terrain == "Peninsula":
+            # Block fleet travel between coast/water via Peninsula
+            if current_terrain in self.FLEET_TERRAIN and neighbor_terrain in self.FLEET_TERRAIN:
+                return False
+        return True
 
-                neighbors.append(neighbor_id)
-        
-        return neighbors
+    # Get every hex adjacent to hex_id on the map, regardless of terrain
+    def get_grid_neighbors(self, hex_id):
+        graph = self.get_hex_graph()
+        if graph is None or hex_id not in graph.index:
+            return []
+        return [graph.hex_ids[node] for node in graph.codec.grid_neighbours(graph.index[hex_id])]
 
     # Convert hex IDs to numerical coordinates for distance calculations
     def hex_to_coordinates(self, hex_id):
-        col_part, row_part = self.split_hex_id(hex_id)
-        column_index = self.column_to_index(col_part)
-        row = int(row_part)
-        return column_index, row
+        column_part, row_part = self.split_hex_id(hex_id)
+        return self.column_to_index(column_part), int(row_part) if row_part else -1
 
     # Split hex ID into column part and row part
     def split_hex_id(self, hex_id):
-        # Split into column (letters) and row (digits)
-        col_part = ''
-        row_part = ''
-        for char in hex_id:
-            if char.isalpha():
-                col_part += char
-            else:
-                row_part += char
-        return col_part, row_part
-
-
-    # TODO: These column to index and vice versa functions are very specific to the current map structure
-    # They may need to be adjusted if the map structure changes or if more columns are added, I.E. Beyond current BA, BB, BC, BD etc
+        return HexIdCodec.split_hex_id(hex_id)
+
     def column_to_index(self, col_part):
-        if len(col_part) == 1:
-            return ord(col_part) - ord('A')  # A=0, B=1, ..., Z=25
-        elif len(col_part) == 2 and col_part[0] == 'B':
-            second_char = col_part[1]
-            if 'A' <= second_char <= 'D':
-                return 26 + (ord(second_char) - ord('A'))  # BA=26, BB=27, BC=28, BD=29
-        return -1  # Invalid column
+        return HexIdCodec.column_to_index(col_part)
 
     def index_to_column(self, index):
-        if index < 0:
+        return HexIdCodec.index_to_column(index)
+
+    # Resolve a Hex ID or Holding Name to a node of the graph
+    def resolve_node(self, graph, identifier):
+        return graph.resolve(identifier)
+
+    # Resolve a Hex ID or Holding Name (any case or spacing) to its canonical Hex ID, or None
+    def resolve_hex(self, identifier):
+        graph = self.get_hex_graph()
+        if graph is None:
+            return None
+        node = graph.resolve(identifier)
+        return graph.hex_ids[node] if node is not None else None
+
+    # Holding Name on a hex, or None if the hex has no holding or does not exist
+    def holding_for_hex(self, hex_id):
+        graph = self.get_hex_graph()
+        if graph is None:
             return None
-        if index < 26:
-            return chr(ord('A') + index)  # 0-25 -> A-Z
-        elif index <= 29:  # 26-29
-            return "B" + chr(ord('A') + (index - 26))  # BA, BB, BC, BD
-        return None  # Invalid index
+        node = graph.resolve(hex_id)
+        return graph.holdings[node] if node is not None else None
 
     def retrieve_movement_path(self, movement_type, start, goal, avoid):
-        hexes = self.retrieve_digital_map()
+        result = self.search_route(movement_type, start, goal, avoid)
+        return result["path"], result["terrain_values"]
+
+    # Resolve and search one route, returning a result dict:
+    #   status: "found", "no_path" or "aborted"; path / terrain_values (None unless found);
+    #   reason: why there is no path; expanded: nodes expanded by A* (0 for cache hits and O(1) rejections)
+    def search_route(self, movement_type, start, goal, avoid, max_expansions=None, deadline=None):
+        result = {"status": "no_path", "path": None, "terrain_values": None, "reason": None, "expanded": 0}
+        graph = self.get_hex_graph()
+        if graph is None:
+            result["reason"] = "The Map is empty or missing."
+            return result
+
+        movement_type = movement_type.lower()
+        if movement_type not in HexGraph.MOVEMENT_TYPES:
+            result["reason"] = self.unknown_movement_type(movement_type)
+            return result
 
         if avoid is None:
             avoid = []
 
-        avoid_hexes = set()
-        start_hex = None
-        goal_hex = None
-
-        for hex_data in hexes:
-            if start == hex_data['Hex']:
-                start_hex = start
-            elif hex_data.get('Holding Name') == start:
-                start_hex = hex_data['Hex']
-            
-            if goal == hex_data['Hex']:
-                goal_hex = goal
-            elif hex_data.get('Holding Name') == goal:
-                goal_hex = hex_data['Hex']
-            
-            for avoid_item in avoid:
-                if avoid_item == hex_data['Hex'] or hex_data.get('Holding Name') == avoid_item:
-                    avoid_hexes.add(hex_data['Hex'])
-
-        if not start_hex or not goal_hex:
+        start_node = self.resolve_node(graph, start)
+        goal_node = self.resolve_node(graph, goal)
+        avoid_nodes = {node for node in (self.resolve_node(graph, avoid_item) for avoid_item in avoid) if node is not None}
+
+        if start_node is None or goal_node is None:
             print("Invalid start or goal Hex or Holding Name.")
-            return None, None
-        
-        path, terrain_values = self.a_star(movement_type.lower(), start_hex, goal_hex, hexes, avoid_hexes)
+            result["reason"] = self.explain_route_failure(movement_type, start, goal, avoid)
+            return result
+
+        # Routes between two holdings with nothing to avoid come straight from the precomputed table.
+        if not avoid_nodes:
+            table = self.get_route_table(graph)
+            if table.covers(start_node, goal_node):
+                nodes = table.route(movement_type, start_node, goal_node)
+                if nodes is None:
+                    result["reason"] = self.explain_route_failure(movement_type, start, goal, avoid)
+                    return result
+                path = [graph.hex_ids[node] for node in nodes]
+                terrain_values = self.extract_terrain_values(graph, movement_type, nodes)
+                result.update({"status": "found", "path": path, "terrain_values": terrain_values})
+                return result
+
+        cache_key = self.route_cache.make_key(
+            graph.version, movement_type, graph.hex_ids[start_node], graph.hex_ids[goal_node],
+            (graph.hex_ids[node] for node in avoid_nodes)
+        )
+        cached, path, terrain_values = self.route_cache.get(cache_key)
+        if not cached:
+            stats = {"expanded": 0}
+            if graph.reachable(movement_type, start_node, goal_node, avoid_nodes):
+                path, terrain_values = self.find_route(
+                    graph, movement_type, start_node, goal_node, avoid_nodes, stats, max_expansions, deadline
+                )
+            result["expanded"] = stats["expanded"]
+            if "aborted" in stats:
+                # A search that ran out of budget says nothing about the route, so don't cache it.
+                print(f"Search aborted: {stats['aborted']}")
+                result["status"] = "aborted"
+                result["reason"] = f"Pathfinding {stats['aborted']}, try a closer destination or fewer avoids."
+                return result
+            self.route_cache.put(cache_key, path, terrain_values)
 
         if path:
             print("Path found:", path)
             print("Terrain values:", terrain_values)
+            result.update({"status": "found", "path": path, "terrain_values": terrain_values})
         else:
             print("No path found.")
+            result["reason"] = self.explain_route_failure(movement_type, start, goal, avoid)
+
+        return result
+
+    # Repair (or start) the incremental plan of a movement from current_hex to goal, returning a
+    # search_route style result dict. avoid=None keeps the avoid list of the previous reroute.
+    def reroute_path(self, movement_uid, movement_type, current_hex, goal, avoid=None, max_expansions=None):
+        result = {"status": "no_path", "path": None, "terrain_values": None, "reason": None, "expanded": 0}
+        graph = self.get_hex_graph()
+        if graph is None:
+            result["reason"] = "The Map is empty or missing."
+            return result
+
+        movement_type = movement_type.lower()
+        if movement_type not in HexGraph.MOVEMENT_TYPES:
+            result["reason"] = self.unknown_movement_type(movement_type)
+            return result
+        start_node = self.resolve_node(graph, current_hex)
+        goal_node = self.resolve_node(graph, goal)
+        if start_node is None or goal_node is None:
+            result["reason"] = self.explain_route_failure(movement_type, current_hex, goal, avoid)
+            return result
+
+        with self._planners_lock:
+            planner = self._planners.get(movement_uid)
+        if avoid is None:
+            avoid_nodes = planner.avoid if planner is not None else set()
+        else:
+            avoid_nodes = {node for node in (self.resolve_node(graph, avoid_item) for avoid_item in avoid) if node is not None}
+
+        # A new goal or movement type invalidates everything the planner knows, so start over.
+        if planner is None or planner.goal != goal_node or planner.movement_type != movement_type:
+            planner = DStarLite(graph, movement_type, start_node, goal_node, avoid_nodes)
+            with self._planners_lock:
+                self._planners[movement_uid] = planner
+
+        with planner.lock:
+            graph_kept = planner.set_graph(graph)
+        if not graph_kept:
+            # The hexes changed under the planner: swap a fresh one in before anything uses it.
+            planner = DStarLite(graph, movement_type, start_node, goal_node, avoid_nodes)
+            with self._planners_lock:
+                self._planners[movement_uid] = planner
+
+        stats = {"expanded": 0}
+        with planner.lock:
+            planner.move_start(start_node)
+            planner.set_avoid(avoid_nodes)
+            nodes = planner.plan(stats, max_expansions) if goal_node not in avoid_nodes else None
+            avoid_names = [graph.hex_ids[node] for node in planner.avoid]
+
+        result["expanded"] = stats["expanded"]
+        if "aborted" in stats:
+            # The repair can carry on from where it stopped next time, so keep the planner.
+            result["status"] = "aborted"
+            result["reason"] = f"Pathfinding {stats['aborted']}, try a closer destination or fewer avoids."
+            return result
+        if nodes is None:
+            result["reason"] = self.explain_route_failure(movement_type, current_hex, goal, avoid_names)
+            return result
+
+        result.update({
+            "status": "found",
+            "path": [graph.hex_ids[node] for node in nodes],
+            "terrain_values": self.extract_terrain_values(graph, movement_type, nodes)
+        })
+        return result
+
+    def unknown_movement_type(self, movement_type):
+        return f"`{movement_type}` is not a movement type, use {' or '.join(HexGraph.MOVEMENT_TYPES)}."
+
+    # Drop the incremental plan of a movement that has finished or been cancelled
+    def forget_planner(self, movement_uid):
+        with self._planners_lock:
+            self._planners.pop(movement_uid, None)
+
+    # Explains why retrieve_movement_path returns no path, using only the reachability index
+    def explain_route_failure(self, movement_type, start, goal, avoid):
+        graph = self.get_hex_graph()
+        if graph is None:
+            return "The Map is empty or missing."
+
+        start_node = self.resolve_node(graph, start)
+        if start_node is None:
+            return f"`{start}` is not a valid hex ID or known holding name."
+        goal_node = self.resolve_node(graph, goal)
+        if goal_node is None:
+            return f"`{goal}` is not a valid hex ID or known holding name."
 
-        return path, terrain_values
\ No newline at end of file
+        movement_type = movement_type.lower()
+        if movement_type not in HexGraph.MOVEMENT_TYPES:
+            return self.unknown_movement_type(movement_type)
+        movers = "armies" if movement_type == "army" else f"{movement_type}s"
+        avoid_nodes = {node for node in (self.resolve_node(graph, avoid_item) for avoid_item in avoid or []) if node is not None}
+        if goal_node in avoid_nodes:
+            return f"`{goal}` is on the avoid list."
+        if graph.costs[movement_type][goal_node] == math.inf:
+            return f"`{goal}` ({graph.hexes[goal_node].terrain}) is impassable for {movers}."
+        if not graph.reachable(movement_type, start_node, goal_node):
+            return f"`{goal}` is not connected to `{start}` for {movers}."
+        if avoid_nodes:
+            return f"Every route from `{start}` to `{goal}` passes through the avoid list."
+        return f"No route found from `{start}` to `{goal}`."
@@ -0,0 +1,50 @@
+from threading import Lock
+from cachetools import TTLCache
+
+class RouteCache:
+    """
+    Bounded LRU cache of pathfinding results, with a time-to-live on every entry.
+    Keys include the map version, so routes computed on an older Map are never returned.
+    Failed searches are cached as well, since they are the most expensive ones to repeat.
+    """
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.routes = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(map_version, movement_type, start_hex, goal_hex, avoid_hexes):
+        return (map_version, movement_type, start_hex, goal_hex, frozenset(avoid_hexes))
+
+    def get(self, key):
+        """Returns (found, path, terrain_values)."""
+        with self.lock:
+            entry = self.routes.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None, None
+            self.hits += 1
+        path, terrain_values = entry
+        if path is None:
+            return True, None, None
+        return True, list(path), list(terrain_values)
+
+    def put(self, key, path, terrain_values):
+        entry = (tuple(path), tuple(terrain_values)) if path else (None, None)
+        with self.lock:
+            self.routes[key] = entry
+
+    def clear(self):
+        with self.lock:
+            self.routes.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self.routes),
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
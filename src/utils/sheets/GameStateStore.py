@@ -0,0 +1,326 @@
+import io
+import pandas as pd
+from threading import Lock, RLock
+from utils.sheets.LocalSheetUtils import LocalSheetUtils
+from utils.sheets.SheetJournal import SheetJournal
+from utils.sheets.SheetSchema import SheetSchema
+from utils.sheets.SheetTable import SheetTable
+from utils.sheets.SqliteSheetUtils import SqliteSheetUtils
+import settings as settings
+
+class GameStateStore:
+    """
+    In-memory source of truth for the game state sheets, shared by every cog and service.
+    Each sheet is read from CSV once into a SheetTable; reads and writes after that only touch
+    memory and mark the sheet dirty. flush() writes the dirty sheets back, it is called by
+    StateBackgroundController on an interval and when the bot shuts down.
+    get_sheet_by_name / update_sheet_by_name / write_to_row / write_rows work like the
+    LocalSheetUtils ones, other sheets (the Map) are passed straight through to it.
+    Row changes to the JOURNALED sheets are appended to a SheetJournal as they happen instead,
+    and their CSV is only rewritten once the journal grows past JournalCompactionThreshold.
+    With SheetStorage = "sqlite" the sheets live in a SqliteSheetUtils database instead, and
+    those row changes are written straight to their rows.
+    Other keyed sheets remember the cells changed since the last flush, and flush() only
+    updates those rows (sheet_utils.update_many) unless rows were added, removed or replaced.
+    """
+    # Sheet -> (key column, columns with a secondary index)
+    SHEETS = {
+        "Armies": ("Army UID", ("Player",)),
+        "Movements": ("Movement UID", ("Army UID", "Player")),
+        "StatusTimers": ("Army UID", ()),
+        "Status": ("Game Status", ()),
+        "Seasons": ("Army Type", ()),
+    }
+    # Sheets changed row by row every tick, see SheetJournal
+    JOURNALED = ("Armies", "Movements")
+    # How many times update() re-runs its function when the sheet changed underneath it
+    UPDATE_RETRIES = 5
+    # Where the game state is persisted (CSV or SQLite), and the CSV files for every other sheet
+    sheet_utils = None
+    local_sheet_utils = None
+    _tables = {}
+    _journals = {}
+    # Table version last written to disk, per sheet
+    _flushed_versions = {}
+    # Sheet -> {key: {column: value}} changed since the last flush, None if it needs a full write
+    _pending = {}
+    _lock = RLock()
+    # Only one flush writes at a time
+    _flush_lock = Lock()
+
+    def __init__(self):
+        if GameStateStore.local_sheet_utils is None:
+            GameStateStore.local_sheet_utils = LocalSheetUtils()
+        if GameStateStore.sheet_utils is None:
+            if settings.SheetStorage == "sqlite":
+                GameStateStore.sheet_utils = SqliteSheetUtils()
+            else:
+                GameStateStore.sheet_utils = self.local_sheet_utils
+
+    def table(self, sheet_name):
+        """The sheet's SheetTable, read from CSV the first time. None if it can't be read."""
+        table = self._tables.get(sheet_name)
+        if table is not None:
+            return table
+        with self._lock:
+            if sheet_name not in self._tables:
+                df = self.sheet_utils.get_sheet_by_name(sheet_name)
+                if df is None:
+                    return None
+                key_column, indexed_columns = self.SHEETS[sheet_name]
+                table = SheetTable.from_dataframe(
+                    df, key_column if key_column in df.columns else None, indexed_columns
+                )
+                entries = self.journal(sheet_name).read() if sheet_name in self.JOURNALED else []
+                # The CSV is the last snapshot, the journal holds every change since.
+                SheetJournal.replay(table, entries)
+                self._tables[sheet_name] = table
+                self._flushed_versions[sheet_name] = table.version
+                if entries and isinstance(self.sheet_utils, SqliteSheetUtils):
+                    # Left over from the CSV storage, move it into the database once.
+                    self.write_snapshot(sheet_name)
+            return self._tables[sheet_name]
+
+    def journal(self, sheet_name):
+        journal = self._journals.get(sheet_name)
+        if journal is None:
+            journal = self._journals[sheet_name] = SheetJournal(f"{self.sheet_utils.DIR}/{sheet_name}.journal")
+        return journal
+
+    def log(self, sheet_name, entries):
+        """Persists row changes to the JOURNALED sheets as they happen, and notes them for flush() otherwise."""
+        if not entries:
+            return
+        if sheet_name not in self.JOURNALED:
+            self.note_changes(sheet_name, entries)
+            return
+        if not isinstance(self.sheet_utils, SqliteSheetUtils):
+            self.journal(sheet_name).append(entries)
+            return
+        # SQLite changes the rows in place, it keeps its own write-ahead log.
+        key_column = self.SHEETS[sheet_name][0]
+        updates = {}
+        for entry in entries:
+            if entry["op"] == "update":
+                # update_many logs all its updates in one call, send them as one batch too.
+                updates.setdefault(entry["key"], {}).update(entry["fields"])
+            elif entry["op"] == "insert":
+                self.sheet_utils.write_rows(sheet_name, [entry["row"]])
+            elif entry["op"] == "delete":
+                self.sheet_utils.delete_row(sheet_name, entry["key"])
+        if updates:
+            self.sheet_utils.update_many(sheet_name, key_column, updates)
+
+    def note_changes(self, sheet_name, entries):
+        pending = self._pending.get(sheet_name, {})
+        key_column = self.SHEETS[sheet_name][0]
+        for entry in entries:
+            if pending is None or entry["op"] != "update" or key_column is None:
+                # Rows came or went: only a full write will do.
+                pending = None
+                break
+            pending.setdefault(SheetTable.normalise_key(entry["key"]), {}).update(entry["fields"])
+        self._pending[sheet_name] = pending
+
+    def get_sheet_by_name(self, sheet_name):
+        if sheet_name not in self.SHEETS:
+            return self.local_sheet_utils.get_sheet_by_name(sheet_name)
+        with self._lock:
+            table = self.table(sheet_name)
+            return None if table is None else SheetSchema.apply(sheet_name, table.to_dataframe())
+
+    def update_sheet_by_name(self, sheet_name, updated_data):
+        """Replaces a whole sheet, from a DataFrame or a list of lists with the header first."""
+        if sheet_name not in self.SHEETS:
+            return self.local_sheet_utils.update_sheet_by_name(sheet_name, updated_data)
+        try:
+            if isinstance(updated_data, pd.DataFrame):
+                df = updated_data
+            else:
+                df = pd.DataFrame(updated_data[1:], columns=updated_data[0])
+            # Round-trip through CSV so the values get the types they would have read back from disk.
+            df = SheetSchema.read_csv(sheet_name, io.StringIO(df.to_csv(index=False)))
+            key_column, indexed_columns = self.SHEETS[sheet_name]
+            table = SheetTable.from_dataframe(df, key_column if key_column in df.columns else None, indexed_columns)
+            with self._lock:
+                old_table = self._tables.get(sheet_name)
+                if old_table is not None and old_table.columns == table.columns and old_table.records == table.records:
+                    return True  # Nothing changed, nothing to write.
+                # Continue the old version count so the flusher sees the change.
+                table.version = (old_table.version if old_table is not None else self._flushed_versions.get(sheet_name, 0)) + 1
+                self._tables[sheet_name] = table
+                self._pending[sheet_name] = None
+                if sheet_name in self.JOURNALED:
+                    # The journal is relative to the old snapshot, so write the new one before any more changes.
+                    return self.write_snapshot(sheet_name)
+            return True
+        except Exception as e:
+            print(f"Error updating {sheet_name} in memory: {e}")
+            return False
+
+    def write_to_row(self, sheet_name, given_data):
+        return self.write_rows(sheet_name, [given_data])
+
+    def write_rows(self, sheet_name, rows):
+        """Appends rows, each a list in column order or a dict of column -> value."""
+        if sheet_name not in self.SHEETS:
+            return self.local_sheet_utils.write_rows(sheet_name, rows)
+        with self._lock:
+            table = self.table(sheet_name)
+            if table is None:
+                print(f"Error writing rows to {sheet_name}: sheet not found.")
+                return False
+            added = [table.add(row if isinstance(row, dict) else dict(zip(table.columns, row))) for row in rows]
+            self.log(sheet_name, [{"op": "insert", "row": record} for record in added])
+            return True
+
+    def get_sheet_and_version(self, sheet_name):
+        """(DataFrame, version) read together, for a later update(..., expected_version=version)."""
+        with self._lock:
+            table = self.table(sheet_name)
+            return (None, None) if table is None else (SheetSchema.apply(sheet_name, table.to_dataframe()), table.version)
+
+    def update(self, sheet_name, fn, expected_version=None):
+        """
+        Optimistic read-modify-write of a sheet. fn gets copies of the rows and returns the
+        {key: {column: value}} changes to make, or None to make none. They are only applied if
+        the sheet is still at the version the rows were read at, and at expected_version if one
+        is given (the version the caller read earlier); otherwise fn runs again on fresh rows.
+        The lock is not held while fn runs. Returns False if fn returned None, the sheet can't
+        be read or it kept changing for UPDATE_RETRIES attempts.
+        """
+        for attempt in range(self.UPDATE_RETRIES):
+            with self._lock:
+                table = self.table(sheet_name)
+                if table is None:
+                    return False
+                version = table.version
+                rows = [dict(record) for record in table.records]
+            if expected_version is not None and expected_version != version:
+                # The caller's view is already out of date, start from the current rows instead.
+                expected_version = None
+                continue
+            changes = fn(rows)
+            if changes is None:
+                return False
+            with self._lock:
+                if self.table(sheet_name) is table and table.version == version:
+                    self.update_many(sheet_name, changes)
+                    return True
+            print(f"{sheet_name} changed during an update, retrying ({attempt + 1}/{self.UPDATE_RETRIES}).")
+        print(f"Error updating {sheet_name}: it kept changing, gave up.")
+        return False
+
+    def get_row(self, sheet_name, key):
+        """Copy of the first row with key in the sheet's key column, or None."""
+        with self._lock:
+            table = self.table(sheet_name)
+            records = table.rows(key) if table is not None else []
+            return dict(records[0]) if records else None
+
+    def find_rows(self, sheet_name, column, value):
+        with self._lock:
+            table = self.table(sheet_name)
+            return [] if table is None else [dict(record) for record in table.find(column, value)]
+
+    def update_fields(self, sheet_name, key, fields):
+        """Sets {column: value} on the rows with key. False if there is no such row."""
+        with self._lock:
+            table = self.table(sheet_name)
+            changed = table.update(key, fields) if table is not None else None
+            if changed:
+                self.log(sheet_name, [{"op": "update", "key": key, "fields": changed}])
+            return changed is not None
+
+    def update_many(self, sheet_name, changes):
+        """Applies {key: {column: value}} in one go. Returns how many keys were found."""
+        with self._lock:
+            table = self.table(sheet_name)
+            if table is None:
+                return 0
+            found, entries = 0, []
+            for key, fields in changes.items():
+                changed = table.update(key, fields)
+                if changed is not None:
+                    found += 1
+                if changed:
+                    entries.append({"op": "update", "key": key, "fields": changed})
+            self.log(sheet_name, entries)
+            return found
+
+    def delete_row(self, sheet_name, key):
+        with self._lock:
+            table = self.table(sheet_name)
+            if table is None or not table.delete(key):
+                return False
+            self.log(sheet_name, [{"op": "delete", "key": key}])
+            return True
+
+    def is_dirty(self, sheet_name):
+        table = self._tables.get(sheet_name)
+        return table is not None and table.version != self._flushed_versions.get(sheet_name)
+
+    def write_snapshot(self, sheet_name):
+        """
+        Compacts a journaled sheet: writes the whole table to CSV and empties the journal.
+        Called with the lock held, so no change can land in the journal in between.
+        """
+        table = self._tables[sheet_name]
+        if not self.sheet_utils.update_sheet_by_name(sheet_name, table.to_dataframe()):
+            return False
+        self.journal(sheet_name).reset()
+        self._flushed_versions[sheet_name] = table.version
+        print(f"Compacted {sheet_name} journal into a new snapshot.")
+        return True
+
+    def flush(self):
+        """
+        Writes every sheet changed since the last flush to disk, and compacts journals that grew
+        past JournalCompactionThreshold. Returns False if a write failed.
+        """
+        ok = True
+        with self._flush_lock:
+            for sheet_name in list(self._tables):
+                if sheet_name in self.JOURNALED:
+                    with self._lock:
+                        if sheet_name not in self._tables:
+                            continue
+                        if self.journal(sheet_name).entries >= settings.JournalCompactionThreshold:
+                            ok = self.write_snapshot(sheet_name) and ok
+                        else:
+                            # Already on disk in the journal.
+                            self._flushed_versions[sheet_name] = self._tables[sheet_name].version
+                    continue
+
+                with self._lock:
+                    if not self.is_dirty(sheet_name):
+                        continue
+                    table = self._tables[sheet_name]
+                    version = table.version
+                    changes = self._pending.get(sheet_name)
+                    self._pending[sheet_name] = {}
+                    df = table.to_dataframe()
+                if changes and self.sheet_utils.update_many(sheet_name, table.key_column, changes) == len(changes):
+                    written = True
+                else:
+                    written = self.sheet_utils.update_sheet_by_name(sheet_name, df)
+                if written:
+                    self._flushed_versions[sheet_name] = version
+                    print(f"Flushed {sheet_name} to disk.")
+                else:
+                    ok = False
+                    with self._lock:
+                        self._pending[sheet_name] = None
+        return ok
+
+    @classmethod
+    def invalidate(cls, sheet_name=None):
+        """Drops sheets from memory without writing them, so they are read from disk again."""
+        with cls._flush_lock, cls._lock:
+            for name in [sheet_name] if sheet_name else list(cls._tables):
+                cls._tables.pop(name, None)
+                cls._flushed_versions.pop(name, None)
+                cls._pending.pop(name, None)
+            # The sheet directory may have changed, journals are opened again on next use.
+            for name in [sheet_name] if sheet_name else list(cls._journals):
+                cls._journals.pop(name, None)
@@ -0,0 +1,50 @@
+class HexRecord:
+    """One row of the Map. Slotted so the whole Map costs a few small objects, not a dict per hex."""
+    __slots__ = ("hex_id", "terrain", "holding_name", "road", "river", "holding_cell")
+
+    def __init__(self, hex_id, terrain, holding_name=None, road=False, river=False, holding_cell=None):
+        self.hex_id = hex_id
+        self.terrain = terrain
+        # None for hexes without a holding
+        self.holding_name = holding_name
+        self.road = road
+        self.river = river
+        # Whether the Holding Name cell was filled in at all, "FALSE" included, which is what the
+        # movement rules count as a holding. Defaults to having a holding name.
+        self.holding_cell = holding_name is not None if holding_cell is None else holding_cell
+
+    @classmethod
+    def from_row(cls, row):
+        """Builds a record from a Map row (dict or pandas row), normalising its cell values."""
+        return cls(
+            str(row["Hex"]).strip(),
+            row["Terrain"],
+            cls.parse_holding_name(row.get("Holding Name")),
+            cls.parse_flag(row.get("Road", False)),
+            cls.parse_flag(row.get("River", False)),
+            cls.parse_holding_cell(row.get("Holding Name", False))
+        )
+
+    # Map cells come through as bools or as "TRUE"/"FALSE" strings depending on how the CSV was written
+    @staticmethod
+    def parse_flag(value):
+        if isinstance(value, str):
+            return value.strip().upper() == "TRUE"
+        return bool(value is True or value == 1)
+
+    # Holding Name is "FALSE" (or empty) for hexes without a holding
+    @staticmethod
+    def parse_holding_name(value):
+        if not isinstance(value, str) or not value.strip() or value.strip().upper() == "FALSE":
+            return None
+        return value
+
+    # The movement rules have always taken any truthy cell for a holding, the "FALSE" string included
+    @staticmethod
+    def parse_holding_cell(value):
+        return bool(value)
+
+    def as_row(self):
+        holding_name = self.holding_name or ("FALSE" if self.holding_cell else False)
+        return {"Hex": self.hex_id, "Terrain": self.terrain, "Holding Name": holding_name,
+                "Road": self.road, "River": self.river}
@@ -1,12 +1,112 @@
 import pandas as pd
 import os
+import tempfile
+from threading import Lock
 from filelock import FileLock  # Import FileLock for safe file access
+from utils.sheets.SheetSchema import SheetSchema
 
 class LocalSheetUtils:
+    """
+    Reads and writes the sheets as CSV files in DIR.
+    Writes go to a temporary file that is then renamed over the CSV (os.replace), so the CSV is
+    always either the old or the new version, never half written. That lets readers open it
+    without taking the FileLock, which only keeps writers of the same sheet from overlapping.
+    This class does not merge writes: a whole-sheet replacement that a newer one overtook while
+    waiting for the lock is skipped, every other write is published. Merging the updates of a
+    time window into one write is GameStateStore's flush.
+    """
+    # Last DataFrame read from each CSV, with the (mtime_ns, size) of the file it was read from.
+    # Shared by every instance, so a sheet is only parsed again once it changes on disk.
+    _cache = {}
+    _cache_stats = {}
+    _cache_lock = Lock()
+    # CSV -> number of update_sheet_by_name calls so far, used to skip replacements already outdated
+    _generations = {}
+    # (CSV, key column) -> (signature, {key: [row positions]}) of the cached DataFrame, see row_index
+    _row_indexes = {}
+
     def __init__(self):
         self.DIR = 'src/sheets'
         os.makedirs(self.DIR, exist_ok=True)
 
+    @staticmethod
+    def file_signature(file_path):
+        try:
+            stat = os.stat(file_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def write_temp_file(self, sheet_name, df):
+        """Serializes df to a new temporary file next to the sheet's CSV and returns its path."""
+        fd, temp_path = tempfile.mkstemp(dir=self.DIR, prefix=f".{sheet_name}.", suffix=".csv.tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as file:
+                df.to_csv(file, index=False)
+                file.flush()
+                os.fsync(file.fileno())
+            return temp_path
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def publish(self, sheet_name, temp_path):
+        """Swaps the temporary file in as the sheet's CSV, call with the FileLock held."""
+        os.replace(temp_path, f"{self.DIR}/{sheet_name}.csv")
+        self.invalidate_cache(sheet_name)
+
+    def invalidate_cache(self, sheet_name):
+        file_path = f"{self.DIR}/{sheet_name}.csv"
+        with self._cache_lock:
+            self._cache.pop(file_path, None)
+            for index_key in [index_key for index_key in self._row_indexes if index_key[0] == file_path]:
+                del self._row_indexes[index_key]
+
+    @staticmethod
+    def normalise_key(key):
+        return str(key).strip()
+
+    @staticmethod
+    def same_value(old, new):
+        # Empty cells are NaN or <NA> depending on the column type, and <NA> can't be compared.
+        if pd.isna(old) is True or pd.isna(new) is True:
+            return pd.isna(old) is True and pd.isna(new) is True
+        return bool(old == new)
+
+    def row_index(self, sheet_name, key_column):
+        """
+        {key: [row positions]} over key_column of the sheet as last read into the cache, built
+        once per version of the file. None if the sheet is not cached or has no such column.
+        """
+        file_path = f"{self.DIR}/{sheet_name}.csv"
+        with self._cache_lock:
+            cached = self._cache.get(file_path)
+            if cached is None or key_column not in cached[1].columns:
+                return None
+            signature, df = cached
+            indexed = self._row_indexes.get((file_path, key_column))
+            if indexed is not None and indexed[0] == signature:
+                return indexed[1]
+            index = {}
+            for position, key in enumerate(df[key_column].tolist()):
+                index.setdefault(self.normalise_key(key), []).append(position)
+            self._row_indexes[(file_path, key_column)] = (signature, index)
+            return index
+
+    def count_cache_lookup(self, sheet_name, hit):
+        with self._cache_lock:
+            stats = self._cache_stats.setdefault(sheet_name, {"hits": 0, "misses": 0})
+            stats["hits" if hit else "misses"] += 1
+
+    @classmethod
+    def cache_stats(cls):
+        """{sheet: {"hits", "misses", "hit_rate"}} for every sheet read so far."""
+        with cls._cache_lock:
+            return {
+                sheet_name: dict(stats, hit_rate=stats["hits"] / (stats["hits"] + stats["misses"]))
+                for sheet_name, stats in cls._cache_stats.items()
+            }
+
     def write_to_row(self, sheet_name, given_data):
         file_path = f"{self.DIR}/{sheet_name}.csv"
         lock = FileLock(f"{file_path}.lock")  # Create a lock file for the CSV
@@ -14,7 +114,7 @@ class LocalSheetUtils:
             with lock:  # Use the lock to ensure safe access
                 # If the file exists, read it; otherwise, create a new DataFrame.
                 if os.path.exists(file_path):
-                    df = pd.read_csv(file_path, encoding="utf-8")
+                    df = SheetSchema.read_csv(sheet_name, file_path)
                     # Create a DataFrame for the new row.
                     new_row_df = pd.DataFrame([given_data], columns=df.columns)
                     # Append the new row.
@@ -22,23 +122,49 @@ class LocalSheetUtils:
                 else:
                     df = pd.DataFrame([given_data])
                 # Write the updated DataFrame back to CSV.
-                df.to_csv(file_path, index=False, encoding="utf-8")
+                self.publish(sheet_name, self.write_temp_file(sheet_name, df))
                 print("wrote to row")
                 return True
         except Exception as e:
             print(f"Error writing to {sheet_name}.csv: {e}")
             return False
 
-    def get_sheet_by_name(self, sheet_name):
+    def write_rows(self, sheet_name, rows):
+        """ Appends several rows to a sheet with a single read and write of the CSV. """
         file_path = f"{self.DIR}/{sheet_name}.csv"
         lock = FileLock(f"{file_path}.lock")  # Create a lock file for the CSV
         try:
             with lock:  # Use the lock to ensure safe access
-                # Read the CSV using pandas.
-                df = pd.read_csv(file_path, encoding="utf-8")
-                print(f"Dataframe for Get Sheet: {file_path}\n{df}")
-                # Return the df.
-                return df
+                df = SheetSchema.read_csv(sheet_name, file_path)
+                new_rows_df = pd.DataFrame(rows, columns=df.columns)
+                df = pd.concat([df, new_rows_df], ignore_index=True)
+                self.publish(sheet_name, self.write_temp_file(sheet_name, df))
+                print(f"wrote {len(rows)} rows")
+                return True
+        except Exception as e:
+            print(f"Error writing rows to {sheet_name}.csv: {e}")
+            return False
+
+    def get_sheet_by_name(self, sheet_name):
+        """ The sheet as a DataFrame, parsed again only if the CSV changed since the last read. """
+        file_path = f"{self.DIR}/{sheet_name}.csv"
+        signature = self.file_signature(file_path)
+        cached = self._cache.get(file_path)
+        if signature is not None and cached is not None and cached[0] == signature:
+            self.count_cache_lookup(sheet_name, True)
+            # A copy, so callers can change it without touching the cache.
+            return cached[1].copy()
+        try:
+            # No lock needed, writers replace the file rather than changing it in place.
+            with open(file_path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                # Read the CSV using pandas, with the sheet's declared column types.
+                df = SheetSchema.read_csv(sheet_name, file)
+            with self._cache_lock:
+                self._cache[file_path] = ((stat.st_mtime_ns, stat.st_size), df)
+            self.count_cache_lookup(sheet_name, False)
+            print(f"Read {file_path}: {len(df)} rows")
+            return df.copy()
         except FileNotFoundError:
             print(f"Error: {sheet_name}.csv not found.")
             return None
@@ -46,22 +172,83 @@ class LocalSheetUtils:
             print(f"Error reading {sheet_name}.csv: {e}")
             return None
 
+    def update_fields(self, sheet_name, key_column, key, fields):
+        """Sets {column: value} on the rows whose key_column is key. False if there is none."""
+        return self.update_many(sheet_name, key_column, {key: fields}) > 0
+
+    def update_many(self, sheet_name, key_column, changes):
+        """
+        Applies {key: {column: value}} to the rows found through key_column in one read and at
+        most one write of the CSV; nothing is written if no value actually changes.
+        Returns how many keys were found, or 0 if the sheet can't be updated.
+        """
+        file_path = f"{self.DIR}/{sheet_name}.csv"
+        lock = FileLock(f"{file_path}.lock")  # Create a lock file for the CSV
+        try:
+            with lock:  # Use the lock to ensure safe access
+                # Usually served from the cache, along with the row index built over it.
+                df = self.get_sheet_by_name(sheet_name)
+                index = self.row_index(sheet_name, key_column) if df is not None else None
+                if index is None:
+                    print(f"Error updating {sheet_name}.csv: no sheet or no {key_column} column.")
+                    return 0
+                found, changed = 0, False
+                for key, fields in changes.items():
+                    positions = index.get(self.normalise_key(key))
+                    if not positions:
+                        continue
+                    found += 1
+                    for column, value in fields.items():
+                        if column not in df.columns:
+                            print(f"Warning: {sheet_name}.csv has no column {column}.")
+                            continue
+                        if isinstance(df[column].dtype, pd.CategoricalDtype) and not pd.isna(value) \
+                                and value not in df[column].cat.categories:
+                            df[column] = df[column].cat.add_categories([value])
+                        location = df.columns.get_loc(column)
+                        for position in positions:
+                            if self.same_value(df.iat[position, location], value):
+                                continue
+                            df.iat[position, location] = value
+                            changed = True
+                if changed:
+                    self.publish(sheet_name, self.write_temp_file(sheet_name, df))
+                return found
+        except Exception as e:
+            print(f"Error updating {sheet_name}.csv: {e}")
+            return 0
+
     def update_sheet_by_name(self, sheet_name, updated_data):
+        """
+        Replaces the whole sheet. Skipped (still returning True) if a newer replacement of the
+        same sheet came in while this one waited for the lock, that one is published instead.
+        """
         file_path = f"{self.DIR}/{sheet_name}.csv"
         lock = FileLock(f"{file_path}.lock")  # Create a lock file for the CSV
+        temp_path = None
         try:
+            # If updated_data is already a DataFrame, use it directly.
+            if isinstance(updated_data, pd.DataFrame):
+                df = updated_data
+            else:
+                # Assume updated_data is a list of lists with the first row as header.
+                header = updated_data[0]
+                data_rows = updated_data[1:]
+                df = pd.DataFrame(data_rows, columns=header)
+            with self._cache_lock:
+                generation = self._generations[file_path] = self._generations.get(file_path, 0) + 1
+            # Serialize before taking the lock, it is only held for the rename.
+            temp_path = self.write_temp_file(sheet_name, df)
             with lock:  # Use the lock to ensure safe access
-                # If updated_data is already a DataFrame, use it directly.
-                if isinstance(updated_data, pd.DataFrame):
-                    df = updated_data
-                else:
-                    # Assume updated_data is a list of lists with the first row as header.
-                    header = updated_data[0]
-                    data_rows = updated_data[1:]
-                    df = pd.DataFrame(data_rows, columns=header)
-                df.to_csv(file_path, index=False, encoding="utf-8", mode='w')
-                return True
+                if generation < self._generations[file_path]:
+                    # A newer replacement of the whole sheet came in meanwhile, it wins anyway.
+                    os.remove(temp_path)
+                    return True
+                self.publish(sheet_name, temp_path)
+            return True
         except Exception as e:
             print(f"Error updating {sheet_name}.csv: {e}")
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
             return False
 
@@ -0,0 +1,165 @@
+import hashlib
+import os
+from threading import Lock
+import numpy as np
+from utils.sheets.HexRecord import HexRecord
+from utils.sheets.LocalSheetUtils import LocalSheetUtils
+
+class MapStore:
+    """
+    Read-only Map shared by every cog and service in the process.
+    Map.csv is parsed once into HexRecords; MapStore.current() hands out the same store until
+    the Map is re-downloaded and MapStore.invalidate() or MapStore.reload() is called, which
+    bumps the version.
+    The parsed Map is also saved as Map.snapshot.npz next to the CSV and read from there,
+    instead of parsing the CSV, for as long as the CSV's contents hash the same.
+    """
+    # Bump when the arrays in the snapshot change, so older snapshots are ignored
+    SNAPSHOT_FORMAT = 2
+    _current = None
+    _version = 0
+    _lock = Lock()
+    # (mtime, size) of Map.csv when the current store was read, see changed_on_disk
+    _signature = None
+
+    def __init__(self, rows, version=0, digest=None):
+        self.version = version
+        # Hash of the Map.csv contents the store was read from, None if built from rows in memory.
+        self.digest = digest
+        self.records = tuple(row if isinstance(row, HexRecord) else HexRecord.from_row(row) for row in rows)
+        self.index = {record.hex_id: record for record in self.records}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, node):
+        return self.records[node]
+
+    def get(self, hex_id):
+        return self.index.get(hex_id)
+
+    @classmethod
+    def current(cls):
+        """The shared store, loading Map.csv the first time. None if the Map is empty or missing."""
+        store = cls._current
+        if store is not None:
+            return store
+        with cls._lock:
+            if cls._current is None:
+                cls._current = cls.load(cls._version)
+            return cls._current
+
+    @staticmethod
+    def file_path():
+        return f"{LocalSheetUtils().DIR}/Map.csv"
+
+    @staticmethod
+    def snapshot_path():
+        return f"{LocalSheetUtils().DIR}/Map.snapshot.npz"
+
+    @staticmethod
+    def load_snapshot(digest):
+        """HexRecords saved from a Map.csv with this digest, or None."""
+        file_path = MapStore.snapshot_path()
+        if not os.path.exists(file_path):
+            return None
+        try:
+            with np.load(file_path) as data:
+                if int(data["format"]) != MapStore.SNAPSHOT_FORMAT or str(data["digest"]) != digest:
+                    return None
+                return [
+                    HexRecord(hex_id, terrain, holding_name or None, road, river, holding_cell)
+                    for hex_id, terrain, holding_name, road, river, holding_cell in zip(
+                        data["hex_ids"].tolist(), data["terrains"].tolist(), data["holding_names"].tolist(),
+                        data["roads"].tolist(), data["rivers"].tolist(), data["holding_cells"].tolist()
+                    )
+                ]
+        except Exception as e:
+            print(f"Error reading map snapshot {file_path}: {e}")
+            return None
+
+    def save_snapshot(self):
+        file_path = self.snapshot_path()
+        # Write to a temporary file first so a half-written snapshot is never loaded.
+        temporary_path = f"{file_path}.tmp.npz"
+        try:
+            np.savez(
+                temporary_path,
+                format=np.array(self.SNAPSHOT_FORMAT),
+                digest=np.array(self.digest),
+                hex_ids=np.array([record.hex_id for record in self.records]),
+                terrains=np.array([str(record.terrain) for record in self.records]),
+                holding_names=np.array([record.holding_name or "" for record in self.records]),
+                roads=np.array([record.road for record in self.records], dtype=bool),
+                rivers=np.array([record.river for record in self.records], dtype=bool),
+                holding_cells=np.array([record.holding_cell for record in self.records], dtype=bool)
+            )
+            os.replace(temporary_path, file_path)
+            return True
+        except Exception as e:
+            print(f"Error saving map snapshot {file_path}: {e}")
+            return False
+
+    @staticmethod
+    def file_signature():
+        try:
+            stat = os.stat(MapStore.file_path())
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    @classmethod
+    def load(cls, version=0):
+        try:
+            signature = cls.file_signature()
+            with open(cls.file_path(), "rb") as file:
+                digest = hashlib.sha1(file.read()).hexdigest()
+            records = cls.load_snapshot(digest)
+            if records:
+                store = cls(records, version, digest)
+            else:
+                df = LocalSheetUtils().get_sheet_by_name("Map")
+                if df is None or df.empty:
+                    print("Error: Map is empty or missing.")
+                    return None
+                store = cls(df.to_dict(orient='records'), version, digest)
+                store.save_snapshot()
+            cls._signature = signature
+            return store
+        except Exception as e:
+            print(f"Error reading the map: {e}")
+            return None
+
+    @classmethod
+    def changed_on_disk(cls):
+        """Cheap check of whether Map.csv was written since the current store was read."""
+        return cls._current is not None and cls.file_signature() != cls._signature
+
+    @classmethod
+    def reload(cls):
+        """
+        Reads Map.csv into a new store and swaps it in as the current one. Returns the new store,
+        the current one if the contents did not actually change, or None if the Map can't be read
+        (the current store is then kept).
+        """
+        store = cls.load()
+        if store is None:
+            return None
+        with cls._lock:
+            current = cls._current
+            if current is not None and current.digest == store.digest:
+                return current
+            cls._version += 1
+            store.version = cls._version
+            cls._current = store
+            return store
+
+    @classmethod
+    def invalidate(cls):
+        """Drops the shared store after Map.csv changed; the next current() reloads it."""
+        with cls._lock:
+            cls._current = None
+            cls._version += 1
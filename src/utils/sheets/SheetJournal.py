@@ -0,0 +1,86 @@
+import json
+import os
+from threading import Lock
+
+class SheetJournal:
+    """
+    Append-only log of row changes to one sheet, kept next to its CSV as <Sheet>.journal.
+    Every line is one JSON entry:
+        {"op": "insert", "row": {column: value, ...}}
+        {"op": "update", "key": uid, "fields": {column: value, ...}}
+        {"op": "delete", "key": uid}
+    The CSV is the last snapshot; reading it and replaying the journal gives the current sheet.
+    Entries are flushed to disk as they are written, so a crash loses at most the entry being
+    written, whose half-written line is skipped on replay.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = Lock()
+        self.entries = self.count_entries()
+
+    def count_entries(self):
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                return sum(1 for line in file if line.strip())
+        except FileNotFoundError:
+            return 0
+
+    def append(self, entries):
+        """Writes entries to the end of the journal. Returns False if the write failed."""
+        if not entries:
+            return True
+        try:
+            lines = "".join(json.dumps(entry, default=str) + "\n" for entry in entries)
+            with self.lock:
+                with open(self.file_path, "a", encoding="utf-8") as file:
+                    file.write(lines)
+                    file.flush()
+                    os.fsync(file.fileno())
+                self.entries += len(entries)
+            return True
+        except Exception as e:
+            print(f"Error writing to journal {self.file_path}: {e}")
+            return False
+
+    def read(self):
+        """Every complete entry in the journal, oldest first."""
+        entries = []
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        print(f"Skipping unreadable entry in journal {self.file_path}")
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def reset(self):
+        """Empties the journal once its entries are part of a CSV snapshot."""
+        with self.lock:
+            try:
+                os.remove(self.file_path)
+            except FileNotFoundError:
+                pass
+            self.entries = 0
+
+    @staticmethod
+    def replay(table, entries):
+        """Applies journal entries to a SheetTable read from the last snapshot."""
+        for entry in entries:
+            op = entry.get("op")
+            if op == "insert":
+                row = entry["row"]
+                # The snapshot may already hold the row if compaction stopped before the reset.
+                if table.key_column is not None and table.rows(row.get(table.key_column)):
+                    table.update(row[table.key_column], row)
+                else:
+                    table.add(row)
+            elif op == "update":
+                table.update(entry["key"], entry["fields"])
+            elif op == "delete":
+                table.delete(entry["key"])
@@ -0,0 +1,82 @@
+import pandas as pd
+
+class SheetSchema:
+    """
+    Declared column types of each sheet, applied when a CSV is read instead of letting pandas
+    guess them from the values:
+        str       text, kept as it is written (an Army UID like "12" stays a string), NaN if empty
+        category  text with a handful of distinct values
+        Int64     whole numbers, <NA> if empty
+        float64   numbers that may have a fraction, NaN if empty
+    Columns a sheet has but its schema does not declare are read the usual way. A column whose
+    values don't fit its type is reported and read the usual way too, the rest of the sheet
+    still gets its declared types, so the bot keeps running.
+    """
+    SCHEMAS = {
+        "Armies": {
+            "Army UID": "str", "Player": "str", "Current Hex": "str", "Commanders": "str",
+            "Troops": "str", "Navy": "str", "Siege": "str", "Status": "category",
+        },
+        "Movements": {
+            "Movement UID": "str", "Player": "str", "Movement Type": "category", "Army UID": "str",
+            "Commanders": "str", "Army": "str", "Navy": "str", "Siege": "str", "Intent": "str",
+            "Path": "str", "Terrain Values": "str", "Current Hex": "str",
+            "Base Minutes per Hex": "Int64", "Terrain Mod Minutes per Hex": "float64",
+            "Minutes since last Hex": "Int64", "Message": "str",
+        },
+        "StatusTimers": {"Army UID": "str", "Status": "category", "Status Timer": "Int64"},
+        "Status": {"Game Status": "str"},
+        "Seasons": {
+            "Army Type": "str", "Spring": "str", "Summer": "str", "Autumn": "str", "Winter": "str", "Custom": "str",
+        },
+        # Road / River are "TRUE"/"FALSE", HexRecord parses them.
+        "Map": {"Hex": "str", "Terrain": "category", "Holding Name": "str", "Road": "str", "River": "str"},
+    }
+
+    @classmethod
+    def read_csv(cls, sheet_name, source):
+        """pd.read_csv with the sheet's column types. source is a path or an open file."""
+        schema = cls.SCHEMAS.get(sheet_name)
+        if schema is None:
+            return pd.read_csv(source, encoding="utf-8")
+        # Text columns can't fail, so they are typed by the parser; numbers are converted column by
+        # column afterwards, so one bad value only costs its own column its type.
+        text_columns = {column: dtype for column, dtype in schema.items() if dtype in ("str", "category")}
+        df = pd.read_csv(source, encoding="utf-8", dtype=text_columns)
+        cls.check_columns(sheet_name, df)
+        return cls.apply(sheet_name, df)
+
+    @classmethod
+    def apply(cls, sheet_name, df):
+        """Gives an already built DataFrame (e.g. from memory or SQLite) the sheet's column types."""
+        schema = cls.SCHEMAS.get(sheet_name)
+        if schema is None:
+            return df
+        for column, dtype in schema.items():
+            if column not in df.columns or str(df[column].dtype) == dtype:
+                continue
+            try:
+                if dtype == "str":
+                    values = df[column].astype(object)
+                    df[column] = values.where(values.isna(), values.map(cls.to_text))
+                elif dtype in ("Int64", "float64"):
+                    df[column] = pd.to_numeric(df[column]).astype(dtype)
+                else:
+                    df[column] = df[column].astype(dtype)
+            except (ValueError, TypeError) as e:
+                print(f"Error: {sheet_name} column {column} is not {dtype} ({e}), leaving it as it is.")
+        return df
+
+    @staticmethod
+    def to_text(value):
+        # A column with gaps comes back from pandas / SQLite as floats, 12.0 was written as 12.
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    @classmethod
+    def check_columns(cls, sheet_name, df):
+        missing = [column for column in cls.SCHEMAS.get(sheet_name, {}) if column not in df.columns]
+        if missing:
+            print(f"Warning: {sheet_name} is missing the columns {missing}.")
+        return not missing
@@ -0,0 +1,126 @@
+import math
+import pandas as pd
+
+class SheetTable:
+    """
+    One sheet held in memory as a list of row dicts (records), with an index from the key
+    column to its rows and optional secondary indexes on other columns.
+    Column types are taken from the CSV when it is read and values written later are coerced to
+    them, so an int column stays an int column. version goes up on every change.
+    """
+
+    def __init__(self, columns, records=(), key_column=None, indexed_columns=(), kinds=None):
+        self.columns = list(columns)
+        self.key_column = key_column
+        self.indexed_columns = tuple(column for column in indexed_columns if column in self.columns)
+        # column -> numpy dtype kind ("i", "f", "b" or "O")
+        self.kinds = dict(kinds or {})
+        self.records = []
+        self.index = {}
+        self.secondary = {column: {} for column in self.indexed_columns}
+        self.version = 0
+        for record in records:
+            self.add(record)
+
+    @classmethod
+    def from_dataframe(cls, df, key_column=None, indexed_columns=()):
+        kinds = {column: df[column].dtype.kind for column in df.columns}
+        # Plain Python values, with NaN for every kind of missing value (nullable ints give <NA>).
+        records = df.astype(object).where(df.notna(), math.nan).to_dict(orient='records')
+        return cls(df.columns, records, key_column, indexed_columns, kinds)
+
+    def to_dataframe(self):
+        df = pd.DataFrame(self.records, columns=self.columns)
+        # An int column with no rows (or with gaps filled in) would otherwise come back as object/float.
+        for column, kind in self.kinds.items():
+            if kind == "i" and not df[column].isna().any():
+                df[column] = df[column].astype("int64")
+        return df
+
+    @staticmethod
+    def normalise_key(key):
+        return str(key).strip()
+
+    @staticmethod
+    def same_value(old, new):
+        return old == new or (pd.isna(old) is True and pd.isna(new) is True)
+
+    def coerce(self, column, value):
+        kind = self.kinds.get(column)
+        try:
+            if kind == "i" and isinstance(value, float) and not value.is_integer():
+                # Like pandas, a fractional or missing value turns the whole column into floats.
+                self.kinds[column] = "f"
+                return value
+            if kind == "i" and not isinstance(value, bool):
+                return int(value)
+            if kind == "f":
+                return float(value)
+        except (TypeError, ValueError):
+            # Not a number after all, the column holds anything from now on.
+            self.kinds[column] = "O"
+        return value
+
+    def add(self, record):
+        record = {column: self.coerce(column, record.get(column, math.nan)) for column in self.columns}
+        self.records.append(record)
+        if self.key_column is not None:
+            self.index.setdefault(self.normalise_key(record[self.key_column]), []).append(record)
+        for column in self.indexed_columns:
+            self.secondary[column].setdefault(self.normalise_key(record[column]), []).append(record)
+        self.version += 1
+        return record
+
+    def rows(self, key):
+        return self.index.get(self.normalise_key(key), [])
+
+    def find(self, column, value):
+        if column in self.secondary:
+            return self.secondary[column].get(self.normalise_key(value), [])
+        value = self.normalise_key(value)
+        return [record for record in self.records if self.normalise_key(record.get(column)) == value]
+
+    def move(self, index, record, old_value, new_value):
+        index[self.normalise_key(old_value)].remove(record)
+        if not index[self.normalise_key(old_value)]:
+            del index[self.normalise_key(old_value)]
+        index.setdefault(self.normalise_key(new_value), []).append(record)
+
+    def update(self, key, fields):
+        """
+        Sets fields on every row with key. Returns the {column: value} that actually changed,
+        or None if there is no such row.
+        """
+        records = list(self.rows(key))
+        if not records:
+            return None
+        fields = {column: value for column, value in fields.items() if column in self.columns}
+        changed = {}
+        for record in records:
+            for column, value in fields.items():
+                value = self.coerce(column, value)
+                if self.same_value(record[column], value):
+                    continue
+                if column == self.key_column:
+                    self.move(self.index, record, record[column], value)
+                if column in self.secondary:
+                    self.move(self.secondary[column], record, record[column], value)
+                record[column] = value
+                changed[column] = value
+                self.version += 1
+        return changed
+
+    def delete(self, key):
+        """Removes every row with key. Returns False if there is none."""
+        records = self.index.pop(self.normalise_key(key), [])
+        if not records:
+            return False
+        removed = {id(record) for record in records}
+        self.records = [record for record in self.records if id(record) not in removed]
+        for column in self.indexed_columns:
+            for record in records:
+                self.secondary[column][self.normalise_key(record[column])].remove(record)
+                if not self.secondary[column][self.normalise_key(record[column])]:
+                    del self.secondary[column][self.normalise_key(record[column])]
+        self.version += 1
+        return True
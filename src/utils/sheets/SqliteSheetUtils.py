@@ -0,0 +1,209 @@
+import math
+import os
+import sqlite3
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from utils.sheets.SheetSchema import SheetSchema
+import settings as settings
+
+class SqliteSheetUtils:
+    """
+    Keeps every sheet as a table in one SQLite database (WAL mode, so readers never wait on the
+    writer), with the same surface as LocalSheetUtils plus keyed row access.
+    Tables are indexed on Army UID, Movement UID and Player, so looking up one row does not
+    read the whole sheet. A sheet that is not in the database yet is imported from its CSV the
+    first time it is read; import_csv / export_csv move sheets between the two by hand.
+    """
+    # Sheet -> column get_row / delete_row look rows up by
+    KEY_COLUMNS = {"Armies": "Army UID", "Movements": "Movement UID", "StatusTimers": "Army UID", "Seasons": "Army Type",
+                   "Status": "Game Status"}
+    INDEXED_COLUMNS = ("Army UID", "Movement UID", "Player")
+
+    def __init__(self):
+        self.DIR = 'src/sheets'
+        os.makedirs(self.DIR, exist_ok=True)
+
+    def database_path(self):
+        return f"{self.DIR}/{settings.SqliteDatabaseFile}"
+
+    @contextmanager
+    def connect(self):
+        """A connection that commits on success, rolls back on error and is always closed."""
+        connection = sqlite3.connect(self.database_path(), timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def quote(name):
+        return '"' + str(name).replace('"', '""') + '"'
+
+    @staticmethod
+    def to_sql_value(value):
+        # numpy scalars become plain Python values, NaN becomes NULL.
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return value
+
+    def table_columns(self, connection, sheet_name):
+        rows = connection.execute(f"PRAGMA table_info({self.quote(sheet_name)})").fetchall()
+        return [row[1] for row in rows]
+
+    def ensure_table(self, sheet_name):
+        """True once the sheet is in the database, bringing it over from its CSV if it is not yet."""
+        with self.connect() as connection:
+            if self.table_columns(connection, sheet_name):
+                return True
+        return self.import_csv(sheet_name)
+
+    def import_csv(self, sheet_name, file_path=None):
+        """Copies <Sheet>.csv into the database, replacing the table."""
+        file_path = file_path or f"{self.DIR}/{sheet_name}.csv"
+        try:
+            df = SheetSchema.read_csv(sheet_name, file_path)
+        except FileNotFoundError:
+            print(f"Error: {sheet_name}.csv not found.")
+            return False
+        except Exception as e:
+            print(f"Error reading {sheet_name}.csv: {e}")
+            return False
+        return self.update_sheet_by_name(sheet_name, df)
+
+    def export_csv(self, sheet_name, file_path=None):
+        """Writes the table out as <Sheet>.csv, e.g. for the Google Sheets sync."""
+        df = self.get_sheet_by_name(sheet_name)
+        if df is None:
+            return False
+        try:
+            df.to_csv(file_path or f"{self.DIR}/{sheet_name}.csv", index=False, encoding="utf-8")
+            return True
+        except Exception as e:
+            print(f"Error exporting {sheet_name}.csv: {e}")
+            return False
+
+    def get_sheet_by_name(self, sheet_name):
+        try:
+            if not self.ensure_table(sheet_name):
+                return None
+            with self.connect() as connection:
+                columns = self.table_columns(connection, sheet_name)
+                rows = connection.execute(f"SELECT * FROM {self.quote(sheet_name)} ORDER BY rowid").fetchall()
+            df = pd.DataFrame.from_records(rows, columns=columns)
+            # NULLs come back as NaN, like empty CSV cells. (fillna would downcast silently, which pandas deprecates.)
+            return SheetSchema.apply(sheet_name, df.where(df.notna(), np.nan).infer_objects())
+        except Exception as e:
+            print(f"Error reading {sheet_name} from the database: {e}")
+            return None
+
+    def update_sheet_by_name(self, sheet_name, updated_data):
+        try:
+            if isinstance(updated_data, pd.DataFrame):
+                df = updated_data
+            else:
+                # Assume updated_data is a list of lists with the first row as header.
+                df = pd.DataFrame(updated_data[1:], columns=updated_data[0])
+            columns = [str(column) for column in df.columns]
+            table = self.quote(sheet_name)
+            rows = [[self.to_sql_value(value) for value in row] for row in df.itertuples(index=False, name=None)]
+            with self.connect() as connection:
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+                connection.execute(f"CREATE TABLE {table} ({', '.join(self.quote(column) for column in columns)})")
+                for column in columns:
+                    if column in self.INDEXED_COLUMNS:
+                        index = self.quote(f"{sheet_name}_{column}")
+                        connection.execute(f"CREATE INDEX {index} ON {table} ({self.quote(column)})")
+                if rows:
+                    placeholders = ", ".join("?" for _ in columns)
+                    connection.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+            return True
+        except Exception as e:
+            print(f"Error updating {sheet_name} in the database: {e}")
+            return False
+
+    def write_to_row(self, sheet_name, given_data):
+        return self.write_rows(sheet_name, [given_data])
+
+    def write_rows(self, sheet_name, rows):
+        """Appends rows, each a list in column order or a dict of column -> value."""
+        try:
+            if not self.ensure_table(sheet_name):
+                return False
+            with self.connect() as connection:
+                columns = self.table_columns(connection, sheet_name)
+                values = []
+                for row in rows:
+                    row = [row.get(column) for column in columns] if isinstance(row, dict) else list(row)
+                    values.append([self.to_sql_value(value) for value in row])
+                placeholders = ", ".join("?" for _ in columns)
+                connection.executemany(f"INSERT INTO {self.quote(sheet_name)} VALUES ({placeholders})", values)
+            return True
+        except Exception as e:
+            print(f"Error writing rows to {sheet_name}: {e}")
+            return False
+
+    def get_row(self, sheet_name, uid):
+        """The first row whose key column is uid, as a dict, or None."""
+        key_column = self.KEY_COLUMNS.get(sheet_name)
+        try:
+            if not self.ensure_table(sheet_name):
+                return None
+            with self.connect() as connection:
+                columns = self.table_columns(connection, sheet_name)
+                if key_column not in columns:
+                    return None
+                row = connection.execute(
+                    f"SELECT * FROM {self.quote(sheet_name)} WHERE {self.quote(key_column)} = ? ORDER BY rowid LIMIT 1",
+                    (str(uid).strip(),)
+                ).fetchone()
+            return None if row is None else dict(zip(columns, row))
+        except Exception as e:
+            print(f"Error reading {uid} from {sheet_name}: {e}")
+            return None
+
+    def update_fields(self, sheet_name, key_column, key, fields):
+        """Sets {column: value} on the rows whose key_column is key. False if there is none."""
+        return self.update_many(sheet_name, key_column, {key: fields}) > 0
+
+    def update_many(self, sheet_name, key_column, changes):
+        """Applies {key: {column: value}} in one transaction. Returns how many keys were found."""
+        try:
+            if not self.ensure_table(sheet_name):
+                return 0
+            found = 0
+            with self.connect() as connection:
+                for key, fields in changes.items():
+                    if not fields:
+                        continue
+                    assignments = ", ".join(f"{self.quote(column)} = ?" for column in fields)
+                    cursor = connection.execute(
+                        f"UPDATE {self.quote(sheet_name)} SET {assignments} WHERE {self.quote(key_column)} = ?",
+                        [self.to_sql_value(value) for value in fields.values()] + [str(key).strip()]
+                    )
+                    found += cursor.rowcount > 0
+            return found
+        except Exception as e:
+            print(f"Error updating {sheet_name}: {e}")
+            return 0
+
+    def delete_row(self, sheet_name, uid):
+        key_column = self.KEY_COLUMNS.get(sheet_name)
+        if key_column is None:
+            return False
+        try:
+            if not self.ensure_table(sheet_name):
+                return False
+            with self.connect() as connection:
+                cursor = connection.execute(
+                    f"DELETE FROM {self.quote(sheet_name)} WHERE {self.quote(key_column)} = ?", (str(uid).strip(),)
+                )
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error deleting {uid} from {sheet_name}: {e}")
+            return False
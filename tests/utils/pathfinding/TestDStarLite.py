@@ -0,0 +1,72 @@
+import copy
+import math
+import random
+import unittest
+from tests.utils.pathfinding.maps import generate_map
+from utils.pathfinding.DStarLite import DStarLite
+from utils.pathfinding.PathfindingUtils import PathfindingUtils
+
+
+class TestDStarLite(unittest.TestCase):
+    def setUp(self):
+        self.pathfinding_utils = PathfindingUtils()
+
+    def assert_matches_a_star(self, graph, planner, avoid):
+        nodes = planner.plan()
+        path, _ = self.pathfinding_utils.a_star(graph, planner.movement_type, planner.start, planner.goal, avoid)
+        self.assertEqual(path is None, nodes is None)
+        if path is not None:
+            costs = graph.costs[planner.movement_type]
+            self.assertEqual((planner.start, planner.goal), (nodes[0], nodes[-1]))
+            self.assertEqual(sum(costs[graph.index[hex_id]] for hex_id in path[1:]),
+                             sum(costs[node] for node in nodes[1:]))
+        return nodes
+
+    def test_repairs_match_a_fresh_search(self):
+        for seed in range(6):
+            rng = random.Random(seed)
+            hexes = generate_map(seed, sea_ratio=0.25)
+            graph = self.pathfinding_utils.build_hex_graph(hexes)
+            passable = [node for node in range(len(graph)) if graph.costs["army"][node] != math.inf]
+            planner = DStarLite(graph, "army", rng.choice(passable), rng.choice(passable))
+            avoid = set()
+
+            for _ in range(10):
+                nodes = self.assert_matches_a_star(graph, planner, avoid)
+                # Advance along the route, then change the avoid list and, now and then, the Map.
+                if nodes and len(nodes) > 2:
+                    planner.move_start(nodes[2])
+                avoid = set(rng.sample(passable, 8)) - {planner.goal}
+                planner.set_avoid(avoid)
+                if rng.random() < 0.3:
+                    hexes = copy.deepcopy(hexes)
+                    for node in rng.sample(range(len(hexes)), 30):
+                        hexes[node]["Terrain"] = rng.choice(["Sea", "Plains", "Hills", "Mountains"])
+                    graph = self.pathfinding_utils.build_hex_graph(hexes)
+                    self.assertTrue(planner.set_graph(graph))
+
+    def test_reroute_replaces_the_planner_when_the_hexes_change(self):
+        graphs = [self.pathfinding_utils.build_hex_graph(generate_map(3, columns=columns, sea_ratio=0))
+                  for columns in (30, 31)]
+        start, goal = graphs[0].hex_ids[0], graphs[0].hex_ids[-1]
+        previous_graph = PathfindingUtils._hex_graph
+        try:
+            PathfindingUtils._hex_graph = graphs[0]
+            self.assertEqual("found", self.pathfinding_utils.reroute_path("1_1", "army", start, goal)["status"])
+            planner = PathfindingUtils._planners["1_1"]
+
+            PathfindingUtils._hex_graph = graphs[1]
+            result = self.pathfinding_utils.reroute_path("1_1", "army", start, goal)
+            self.assertEqual("found", result["status"])
+            self.assertEqual([start, goal], [result["path"][0], result["path"][-1]])
+            # The old planner is left alone, the new one is stored and planned on the new Map.
+            self.assertIs(graphs[0], planner.graph)
+            self.assertIsNot(planner, PathfindingUtils._planners["1_1"])
+            self.assertIs(graphs[1], PathfindingUtils._planners["1_1"].graph)
+        finally:
+            PathfindingUtils._hex_graph = previous_graph
+            self.pathfinding_utils.forget_planner("1_1")
+
+
+if __name__ == "__main__":
+    unittest.main()
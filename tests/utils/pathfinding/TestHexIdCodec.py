@@ -0,0 +1,39 @@
+import unittest
+from utils.pathfinding.HexIdCodec import HexIdCodec
+
+
+class TestHexIdCodec(unittest.TestCase):
+    def test_columns_are_bijective_base_26(self):
+        self.assertEqual(0, HexIdCodec.column_to_index("A"))
+        self.assertEqual(25, HexIdCodec.column_to_index("Z"))
+        self.assertEqual(26, HexIdCodec.column_to_index("AA"))
+        self.assertEqual(27, HexIdCodec.column_to_index("AB"))
+        self.assertEqual(63, HexIdCodec.column_to_index("BL"))
+        self.assertEqual(702, HexIdCodec.column_to_index("AAA"))
+        for index in range(2000):
+            self.assertEqual(index, HexIdCodec.column_to_index(HexIdCodec.index_to_column(index)))
+        self.assertEqual(-1, HexIdCodec.column_to_index(""))
+        self.assertIsNone(HexIdCodec.index_to_column(-1))
+
+    def test_table_lookups_and_row_width(self):
+        hex_ids = [f"{HexIdCodec.index_to_column(column)}{row:03d}" for column in range(26, 30) for row in range(120)]
+        codec = HexIdCodec(hex_ids)
+        self.assertEqual(3, codec.row_width)
+        node = codec.node("AB105")
+        self.assertEqual((27, 105), codec.coordinates(node))
+        self.assertEqual("AB105", codec.format(27, 105))
+        self.assertEqual("AE007", codec.format(30, 7))
+        self.assertEqual(node, codec.node_at(27, 105))
+
+    def test_grid_neighbours_follow_column_parity(self):
+        hex_ids = [f"{HexIdCodec.index_to_column(column)}{row:02d}" for column in range(26, 32) for row in range(6)]
+        codec = HexIdCodec(hex_ids)
+        # AE is an even column, so its diagonal neighbours sit on the next row down.
+        neighbours = {codec.hex_ids[node] for node in codec.grid_neighbours(codec.node("AE02"))}
+        self.assertEqual({"AD02", "AF02", "AE01", "AE03", "AD03", "AF03"}, neighbours)
+        neighbours = {codec.hex_ids[node] for node in codec.grid_neighbours(codec.node("AD02"))}
+        self.assertEqual({"AC02", "AE02", "AD01", "AD03", "AC01", "AE01"}, neighbours)
+
+
+if __name__ == "__main__":
+    unittest.main()
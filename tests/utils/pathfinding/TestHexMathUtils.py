@@ -0,0 +1,78 @@
+import math
+import unittest
+import numpy as np
+from tests.utils.pathfinding.maps import generate_map
+from utils.pathfinding.HexMathUtils import HexMathUtils
+from utils.pathfinding.PathfindingUtils import PathfindingUtils
+
+
+class EuclideanPathfindingUtils(PathfindingUtils):
+    # The straight-line heuristic on offset coordinates that A* used before hex distances
+    def heuristic(self, graph, movement_type, node, goal):
+        return math.hypot(graph.columns[goal] - graph.columns[node], graph.rows[goal] - graph.rows[node])
+
+
+class TestHexMathUtils(unittest.TestCase):
+    def setUp(self):
+        self.pathfinding_utils = PathfindingUtils()
+
+    def test_offset_cube_round_trip(self):
+        columns, rows = np.meshgrid(np.arange(-3, 30), np.arange(0, 22), indexing='ij')
+        q, r, s = HexMathUtils.offset_to_cube(columns, rows)
+        self.assertTrue(np.all(q + r + s == 0))
+        back_columns, back_rows = HexMathUtils.cube_to_offset(q, r)
+        self.assertTrue(np.array_equal(back_columns, columns))
+        self.assertTrue(np.array_equal(back_rows, rows))
+
+    def test_grid_neighbours_are_one_step_away(self):
+        hexes = generate_map(seed=3, columns=6, rows=6)
+        graph = self.pathfinding_utils.build_hex_graph(hexes)
+        for node in range(len(graph)):
+            for neighbour in graph.grid_targets[graph.grid_offsets[node]:graph.grid_offsets[node + 1]]:
+                distance = HexMathUtils.hex_distance(graph.columns[node], graph.rows[node],
+                                                     graph.columns[neighbour], graph.rows[neighbour])
+                self.assertEqual(1, distance)
+
+    def test_ring_range_and_line(self):
+        for radius in range(0, 5):
+            ring_columns, ring_rows = HexMathUtils.ring(7, 4, radius)
+            self.assertEqual(max(1, 6 * radius), len(ring_columns))
+            self.assertTrue(np.all(HexMathUtils.hex_distance(7, 4, ring_columns, ring_rows) == radius))
+
+            range_columns, _ = HexMathUtils.range(7, 4, radius)
+            self.assertEqual(3 * radius * (radius + 1) + 1, len(range_columns))
+
+        line_columns, line_rows = HexMathUtils.line(0, 0, 9, 3)
+        self.assertEqual(HexMathUtils.hex_distance(0, 0, 9, 3) + 1, len(line_columns))
+        self.assertEqual((0, 0), (line_columns[0], line_rows[0]))
+        self.assertEqual((9, 3), (line_columns[-1], line_rows[-1]))
+        steps = HexMathUtils.hex_distance(line_columns[:-1], line_rows[:-1], line_columns[1:], line_rows[1:])
+        self.assertTrue(np.all(steps == 1))
+
+    def test_expansion_benchmark_cross_map_routes(self):
+        """Hex-distance A* expands fewer nodes than the straight-line heuristic on long sea routes."""
+        graph = self.pathfinding_utils.build_hex_graph(generate_map(seed=1, sea_ratio=0.9))
+        euclidean_utils = EuclideanPathfindingUtils()
+        first_column = self.pathfinding_utils.index_to_column(0)
+        last_column = self.pathfinding_utils.index_to_column(29)
+
+        expanded = {"hex": 0, "euclidean": 0}
+        for start_row in range(0, 22, 3):
+            for goal_row in (0, 10, 21):
+                start = graph.node(f"{first_column}{start_row:02d}")
+                goal = graph.node(f"{last_column}{goal_row:02d}")
+                hex_stats, euclidean_stats = {}, {}
+                path, terrain_values = self.pathfinding_utils.a_star(graph, "fleet", start, goal, set(), hex_stats)
+                euclidean_path, euclidean_terrain = euclidean_utils.a_star(graph, "fleet", start, goal, set(), euclidean_stats)
+                self.assertEqual(path is None, euclidean_path is None)
+                if path:
+                    self.assertLessEqual(sum(terrain_values), sum(euclidean_terrain))
+                expanded["hex"] += hex_stats["expanded"]
+                expanded["euclidean"] += euclidean_stats["expanded"]
+
+        print(f"\nNodes expanded on cross-map fleet routes: {expanded}")
+        self.assertLess(expanded["hex"], expanded["euclidean"])
+
+
+if __name__ == "__main__":
+    unittest.main()
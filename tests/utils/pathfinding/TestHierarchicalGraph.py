@@ -0,0 +1,45 @@
+import math
+import random
+import unittest
+from unittest.mock import patch
+import settings as settings
+from tests.utils.pathfinding.maps import generate_map
+from utils.pathfinding.HierarchicalGraph import HierarchicalGraph
+from utils.pathfinding.PathfindingUtils import PathfindingUtils
+
+
+class TestHierarchicalGraph(unittest.TestCase):
+    def setUp(self):
+        self.pathfinding_utils = PathfindingUtils()
+        self.graph = self.pathfinding_utils.build_hex_graph(generate_map(seed=7, sea_ratio=0.7))
+        self.hierarchy = HierarchicalGraph(self.graph, "fleet", cluster_size=6)
+        self.passable = [node for node in range(len(self.graph)) if self.graph.costs["fleet"][node] != math.inf]
+
+    def test_routes_are_valid_and_found_whenever_a_star_finds_one(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            start, goal = rng.choice(self.passable), rng.choice(self.passable)
+            path, terrain_values = self.pathfinding_utils.a_star(self.graph, "fleet", start, goal, set())
+            nodes = self.hierarchy.search(start, goal)
+            if path is None:
+                self.assertIsNone(nodes)
+                continue
+            self.assertEqual((start, goal), (nodes[0], nodes[-1]))
+            for node, neighbour in zip(nodes, nodes[1:]):
+                self.assertIn(neighbour, self.graph.neighbours("fleet", node))
+            self.assertGreaterEqual(len(nodes), len(path))
+
+    @patch.dict(settings.PathfindingEngines, {"fleet": "hierarchical"})
+    def test_find_route_keeps_the_a_star_contract(self):
+        start, goal = self.passable[0], self.passable[-1]
+        path, terrain_values = self.pathfinding_utils.find_route(self.graph, "fleet", start, goal, set())
+        expected_path, _ = self.pathfinding_utils.a_star(self.graph, "fleet", start, goal, set())
+        self.assertEqual(expected_path is None, path is None)
+        if path is not None:
+            self.assertEqual(self.graph.hex_ids[start], path[0])
+            self.assertEqual(self.graph.hex_ids[goal], path[-1])
+            self.assertEqual(len(path), len(terrain_values))
+
+
+if __name__ == "__main__":
+    unittest.main()
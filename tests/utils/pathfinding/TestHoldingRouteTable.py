@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from tests.utils.pathfinding.maps import generate_map
+from utils.pathfinding.HoldingRouteTable import HoldingRouteTable
+from utils.pathfinding.PathfindingUtils import PathfindingUtils
+
+
+class TestHoldingRouteTable(unittest.TestCase):
+    def setUp(self):
+        self.pathfinding_utils = PathfindingUtils()
+        self.graph = self.pathfinding_utils.build_hex_graph(generate_map(seed=5, sea_ratio=0.4))
+        self.table = HoldingRouteTable.build(self.graph, self.pathfinding_utils)
+
+    def route_cost(self, movement_type, nodes):
+        return sum(self.graph.costs[movement_type][node] for node in nodes[1:])
+
+    def test_routes_match_a_star(self):
+        holdings = self.graph.holding_nodes()
+        for movement_type in self.graph.MOVEMENT_TYPES:
+            for start in holdings:
+                for goal in holdings:
+                    nodes = self.table.route(movement_type, start, goal)
+                    path, _ = self.pathfinding_utils.a_star(self.graph, movement_type, start, goal, set())
+                    if path is None:
+                        self.assertIsNone(nodes)
+                        continue
+                    self.assertEqual(start, nodes[0])
+                    self.assertEqual(goal, nodes[-1])
+                    self.assertEqual(self.route_cost(movement_type, [self.graph.index[hex_id] for hex_id in path]),
+                                     self.route_cost(movement_type, nodes))
+
+    def test_saved_table_only_loads_for_the_same_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "Map.routes.npz")
+            self.assertTrue(self.table.save(file_path))
+
+            loaded = HoldingRouteTable.load(file_path, self.graph)
+            self.assertIsNotNone(loaded)
+            start, goal = self.graph.holding_nodes()[:2]
+            self.assertEqual(self.table.route("army", start, goal), loaded.route("army", start, goal))
+
+            other_graph = self.pathfinding_utils.build_hex_graph(generate_map(seed=6, sea_ratio=0.4))
+            self.assertIsNone(HoldingRouteTable.load(file_path, other_graph))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from tests.utils.pathfinding.maps import generate_map
+from utils.pathfinding.PathfindingUtils import PathfindingUtils
+from utils.sheets.LocalSheetUtils import LocalSheetUtils
+from utils.sheets.MapStore import MapStore
+
+
+class TestMapSnapshot(unittest.TestCase):
+    def setUp(self):
+        # MapStore and PathfindingUtils read the Map from src/sheets under the working directory.
+        self.previous_directory = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        os.makedirs("src/sheets")
+        self.write_map(generate_map(seed=11, terrain_mix=True))
+
+    def tearDown(self):
+        LocalSheetUtils().invalidate_cache("Map")
+        os.chdir(self.previous_directory)
+        self.directory.cleanup()
+
+    def write_map(self, rows):
+        pd.DataFrame(rows).to_csv("src/sheets/Map.csv", index=False)
+
+    def build(self):
+        store = MapStore.load()
+        return store, PathfindingUtils().build_hex_graph(store)
+
+    def test_snapshot_loads_the_same_map_and_graph(self):
+        store, graph = self.build()
+        self.assertTrue(os.path.exists("src/sheets/Map.snapshot.npz"))
+        self.assertTrue(os.path.exists("src/sheets/Map.graph.npz"))
+
+        LocalSheetUtils().invalidate_cache("Map")
+        reads = LocalSheetUtils.cache_stats()["Map"]["misses"]
+        loaded_store, loaded_graph = self.build()
+        # Read from the snapshot, the CSV is not parsed again.
+        self.assertEqual(reads, LocalSheetUtils.cache_stats()["Map"]["misses"])
+        self.assertEqual([record.as_row() for record in store], [record.as_row() for record in loaded_store])
+        for name, value in vars(graph).items():
+            if name not in ("hexes", "codec"):
+                self.assertEqual(value, getattr(loaded_graph, name), name)
+        self.assertEqual(graph.fingerprint(), loaded_graph.fingerprint())
+
+    def test_snapshot_is_rebuilt_when_the_csv_changes(self):
+        self.build()
+        rows = generate_map(seed=11, terrain_mix=True)
+        rows[0]["Terrain"] = "Mountains" if rows[0]["Terrain"] != "Mountains" else "Plains"
+        self.write_map(rows)
+
+        store, graph = self.build()
+        self.assertEqual(rows[0]["Terrain"], store[0].terrain)
+        self.assertEqual(PathfindingUtils().build_hex_graph(rows).costs, graph.costs)
+
+    def test_graph_snapshot_is_rebuilt_when_the_rules_change(self):
+        self.build()
+        os.utime("src/sheets/Map.graph.npz", ns=(0, 0))
+        self.build()
+        self.assertEqual(0, os.stat("src/sheets/Map.graph.npz").st_mtime_ns)
+
+        rules_version = PathfindingUtils.RULES_VERSION
+        PathfindingUtils.RULES_VERSION = rules_version + 1
+        try:
+            self.build()
+        finally:
+            PathfindingUtils.RULES_VERSION = rules_version
+        self.assertNotEqual(0, os.stat("src/sheets/Map.graph.npz").st_mtime_ns)
+
+
+if __name__ == "__main__":
+    unittest.main()
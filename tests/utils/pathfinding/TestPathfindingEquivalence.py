@@ -0,0 +1,150 @@
+import os
+import random
+import time
+import unittest
+from tests.utils.pathfinding.maps import generate_map
+from tests.utils.pathfinding.reference import ReferencePathfinding
+from utils.pathfinding.DStarLite import DStarLite
+from utils.pathfinding.HierarchicalGraph import HierarchicalGraph
+from utils.pathfinding.HoldingRouteTable import HoldingRouteTable
+from utils.pathfinding.PathfindingUtils import PathfindingUtils
+import settings as settings
+
+# Set PATHFINDING_EQUIVALENCE_QUERIES to run a longer soak, e.g. 20000
+QUERIES = int(os.environ.get("PATHFINDING_EQUIVALENCE_QUERIES", "1000"))
+# (seed, sea ratio) of every generated map, queries are spread evenly over them
+MAPS = [(11, 0.1), (12, 0.25), (13, 0.45), (14, 0.7)]
+# Engines that must find the cheapest route; the others only have to find a valid one
+EXACT_ENGINES = ("a_star", "route_table", "d_star_lite")
+
+
+class TestPathfindingEquivalence(unittest.TestCase):
+    """
+    Runs the same seeded random queries through the original A* (ReferencePathfinding) and
+    every engine, checking each route is walkable under the original rules and costs what it
+    should, and prints latency percentiles and nodes expanded per engine.
+    Everything runs on generated maps, so no sheets, Google or Discord are needed.
+    """
+
+    def setUp(self):
+        self.pathfinding_utils = PathfindingUtils()
+        self.timings = {}
+        self.expansions = {}
+
+    def record(self, engine, function, *args):
+        stats = {}
+        started = time.perf_counter()
+        path = function(*args, stats)
+        self.timings.setdefault(engine, []).append((time.perf_counter() - started) * 1000)
+        self.expansions.setdefault(engine, []).append(stats.get("expanded", 0))
+        return path
+
+    def random_query(self, rng, graph, hexes):
+        movement_type = rng.choice(graph.MOVEMENT_TYPES)
+        holdings = graph.holding_nodes()
+        if rng.random() < 0.3:
+            start, goal = rng.sample(holdings, 2)
+        else:
+            start, goal = rng.sample(range(len(graph)), 2)
+
+        avoid = []
+        if rng.random() < 0.3:
+            avoid = [hexes[node]["Hex"] for node in rng.sample(range(len(graph)), rng.randint(1, 12))]
+            # Avoid lists may also name holdings
+            avoid += [hexes[node]["Holding Name"] for node in rng.sample(holdings, 2)]
+        avoid = [identifier for identifier in avoid
+                 if identifier not in (hexes[start]["Hex"], hexes[goal]["Hex"],
+                                       hexes[start]["Holding Name"], hexes[goal]["Holding Name"])]
+        return movement_type, start, goal, avoid
+
+    def assert_valid_route(self, reference, movement_type, start, goal, avoid_hexes, path):
+        self.assertEqual(start, path[0])
+        self.assertEqual(goal, path[-1])
+        for current, neighbor in zip(path, path[1:]):
+            self.assertIn(neighbor, reference.get_neighbors(movement_type, current, avoid_hexes))
+        return sum(reference.terrain_movement_cost(movement_type, reference.hex_map[hex_id]) for hex_id in path[1:])
+
+    def test_engines_match_the_reference(self):
+        rng = random.Random(2024)
+        checked = {}
+        for seed, sea_ratio in MAPS:
+            hexes = generate_map(seed, columns=30, rows=22, sea_ratio=sea_ratio, terrain_mix=True)
+            graph = self.pathfinding_utils.build_hex_graph(hexes)
+            reference = ReferencePathfinding(hexes)
+            euclidean_reference = ReferencePathfinding(hexes, heuristic="euclidean")
+            route_table = HoldingRouteTable.build(graph, self.pathfinding_utils)
+            hierarchies = {movement_type: HierarchicalGraph(graph, movement_type, settings.HierarchyClusterSize)
+                           for movement_type in graph.MOVEMENT_TYPES}
+
+            def to_hexes(nodes):
+                return None if nodes is None else [graph.hex_ids[node] for node in nodes]
+
+            for _ in range(QUERIES // len(MAPS)):
+                movement_type, start, goal, avoid = self.random_query(rng, graph, hexes)
+                start_hex, goal_hex = graph.hex_ids[start], graph.hex_ids[goal]
+                avoid_nodes = {node for node in (graph.resolve(identifier) for identifier in avoid) if node is not None}
+                avoid_hexes = {graph.hex_ids[node] for node in avoid_nodes}
+
+                expected, _ = self.record("reference", reference.a_star, movement_type, start_hex, goal_hex, avoid)
+                expected_cost = None if expected is None else \
+                    self.assert_valid_route(reference, movement_type, start_hex, goal_hex, avoid_hexes, expected)
+
+                routes = {
+                    "reference_euclidean": self.record("reference_euclidean", euclidean_reference.a_star,
+                                                       movement_type, start_hex, goal_hex, avoid)[0],
+                    "a_star": self.record("a_star", self.pathfinding_utils.a_star,
+                                          graph, movement_type, start, goal, avoid_nodes)[0],
+                    "d_star_lite": to_hexes(self.record("d_star_lite", DStarLite(graph, movement_type, start, goal, avoid_nodes).plan)),
+                }
+                if not avoid:
+                    routes["hierarchical"] = to_hexes(self.record("hierarchical", hierarchies[movement_type].search, start, goal))
+                    if route_table.covers(start, goal):
+                        routes["route_table"] = to_hexes(self.record(
+                            "route_table", lambda stats: route_table.route(movement_type, start, goal)))
+
+                for engine, path in routes.items():
+                    with self.subTest(engine=engine, movement_type=movement_type, start=start_hex, goal=goal_hex, avoid=avoid):
+                        checked[engine] = checked.get(engine, 0) + 1
+                        self.assertEqual(expected is None, path is None)
+                        if path is None:
+                            continue
+                        cost = self.assert_valid_route(reference, movement_type, start_hex, goal_hex, avoid_hexes, path)
+                        if engine in EXACT_ENGINES:
+                            self.assertEqual(expected_cost, cost)
+                        else:
+                            self.assertGreaterEqual(cost, expected_cost)
+
+        self.print_report(checked)
+
+    def test_unknown_movement_types_find_no_path(self):
+        graph = self.pathfinding_utils.build_hex_graph(generate_map(11, columns=10, rows=8))
+        stats = {}
+        self.assertEqual((None, None), self.pathfinding_utils.a_star(graph, "boat", 0, 1, set(), stats))
+        self.assertEqual(0, stats["expanded"])
+
+        previous_graph = PathfindingUtils._hex_graph
+        PathfindingUtils._hex_graph = graph
+        try:
+            result = self.pathfinding_utils.search_route("Boat", graph.hex_ids[0], graph.hex_ids[1], [])
+        finally:
+            PathfindingUtils._hex_graph = previous_graph
+        self.assertEqual("no_path", result["status"])
+        self.assertIn("army or fleet", result["reason"])
+
+    def print_report(self, checked):
+        def percentile(values, fraction):
+            return values[min(len(values) - 1, int(fraction * len(values)))]
+
+        print(f"\n{'engine':<20}{'queries':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+              f"{'expanded p50':>14}{'expanded p95':>14}")
+        for engine, timings in self.timings.items():
+            timings = sorted(timings)
+            expansions = sorted(self.expansions[engine])
+            print(f"{engine:<20}{checked.get(engine, len(timings)):>8}"
+                  f"{percentile(timings, 0.5):>9.3f}{percentile(timings, 0.95):>9.3f}"
+                  f"{percentile(timings, 0.99):>9.3f}{timings[-1]:>9.3f}"
+                  f"{percentile(expansions, 0.5):>14}{percentile(expansions, 0.95):>14}")
+
+
+if __name__ == "__main__":
+    unittest.main()
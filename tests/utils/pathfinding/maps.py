@@ -0,0 +1,56 @@
+import random
+from utils.pathfinding.HexIdCodec import HexIdCodec
+
+LAND = ["Plains", "Plains", "Plains", "Hills", "Forest", "Dense Forest", "Swamp", "Mountains"]
+# Rarer terrain mixed in by terrain_mix, see generate_map
+MIXED_LAND = LAND + ["Desert", "Snow", "Snowy Forest", "The Wall", "Island"]
+
+
+def generate_map(seed, columns=30, rows=22, sea_ratio=0.2, terrain_mix=False):
+    """
+    Seeded random Map rows in the same shape as Map.csv records.
+    With terrain_mix the land also gets the rarer terrain, coasts and peninsulas along the sea,
+    and rivers and roads that run across several hexes like they do on the real Map.
+    """
+    rng = random.Random(seed)
+    hexes = []
+    for column in range(columns):
+        for row in range(rows):
+            terrain = "Sea" if rng.random() < sea_ratio else rng.choice(MIXED_LAND if terrain_mix else LAND)
+            hexes.append({
+                "Hex": f"{HexIdCodec.index_to_column(column)}{row:02d}",
+                "Terrain": terrain,
+                "Holding Name": f"Holding {column}-{row}" if rng.random() < 0.05 else "FALSE",
+                "Road": rng.random() < 0.05,
+                "River": rng.random() < 0.05,
+            })
+    if terrain_mix:
+        add_coasts(rng, hexes)
+        for _ in range(max(1, columns // 6)):
+            add_trail(rng, hexes, columns, rows, "River", rng.randint(rows // 2, rows * 2))
+        for _ in range(max(1, columns // 4)):
+            add_trail(rng, hexes, columns, rows, "Road", rng.randint(rows // 2, rows * 2))
+    return hexes
+
+
+def add_coasts(rng, hexes):
+    """Turns land next to the sea into Coast, with the odd Peninsula jutting out."""
+    codec = HexIdCodec([hex_data["Hex"] for hex_data in hexes])
+    for node, hex_data in enumerate(hexes):
+        if hex_data["Terrain"] == "Sea" or hex_data["Terrain"] == "Island":
+            continue
+        sea_neighbours = sum(hexes[neighbour]["Terrain"] == "Sea" for neighbour in codec.grid_neighbours(node))
+        if sea_neighbours >= 3 and rng.random() < 0.5:
+            hex_data["Terrain"] = "Peninsula"
+        elif sea_neighbours and rng.random() < 0.6:
+            hex_data["Terrain"] = "Coast"
+
+
+def add_trail(rng, hexes, columns, rows, flag, length):
+    """Sets flag on a random walk of neighbouring land hexes."""
+    codec = HexIdCodec([hex_data["Hex"] for hex_data in hexes])
+    node = codec.node_at(rng.randrange(columns), rng.randrange(rows))
+    for _ in range(length):
+        if hexes[node]["Terrain"] != "Sea":
+            hexes[node][flag] = True
+        node = rng.choice(codec.grid_neighbours(node))
@@ -0,0 +1,135 @@
+import math
+from heapq import heappop, heappush
+from utils.pathfinding.HexIdCodec import HexIdCodec
+
+
+class ReferencePathfinding:
+    """
+    The original A* over Map rows, kept as the reference the compiled engines are checked
+    against: hex ID strings, a dict of rows, neighbours and terrain costs worked out per step,
+    and no closed set. The rules are the original ones, including a "FALSE" Holding Name
+    counting as a holding, the only change is that columns use HexIdCodec where the original
+    only knew columns A..BD.
+    heuristic="euclidean" is the original straight-line heuristic, which can overestimate on a
+    hex grid, so heuristic="none" (plain Dijkstra) is the one that gives the cheapest cost.
+    """
+
+    def __init__(self, hexes, heuristic="none"):
+        self.hex_map = {hex_data["Hex"]: hex_data for hex_data in hexes}
+        self.use_heuristic = heuristic == "euclidean"
+
+    def heuristic(self, hex1, hex2):
+        if not self.use_heuristic:
+            return 0
+        x1, y1 = self.hex_to_coordinates(hex1)
+        x2, y2 = self.hex_to_coordinates(hex2)
+        return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+
+    def a_star(self, movement_type, start, goal, avoid, stats=None):
+        hex_map = self.hex_map
+
+        # Translate avoid list into hex IDs
+        avoid_hexes = set()
+        for hex_data in hex_map.values():
+            if hex_data["Hex"] in avoid or hex_data.get("Holding Name") in avoid:
+                avoid_hexes.add(hex_data["Hex"])
+
+        open_set = []
+        heappush(open_set, (0, start))  # (priority, hex)
+        came_from = {}
+        g_score = {start: 0}
+        expanded = 0
+
+        while open_set:
+            _, current = heappop(open_set)
+            expanded += 1
+
+            if current == goal:
+                if stats is not None:
+                    stats["expanded"] = expanded
+                path = self.reconstruct_path(came_from, current)
+                return path, [self.terrain_movement_cost(movement_type, hex_map[hex_id]) for hex_id in path]
+
+            for neighbor in self.get_neighbors(movement_type, current, avoid_hexes):
+                tentative_g_score = g_score[current] + self.terrain_movement_cost(movement_type, hex_map[neighbor])
+                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    heappush(open_set, (tentative_g_score + self.heuristic(neighbor, goal), neighbor))
+
+        if stats is not None:
+            stats["expanded"] = expanded
+        return None, None  # No path found
+
+    def reconstruct_path(self, came_from, current):
+        path = [current]
+        while current in came_from:
+            current = came_from[current]
+            path.append(current)
+        path.reverse()
+        return path
+
+    def terrain_movement_cost(self, movement_type, hex_data):
+        terrain = hex_data["Terrain"]
+        has_road = hex_data.get("Road", False)
+        has_river = hex_data.get("River", False)
+        has_holding = hex_data.get("Holding Name", False)
+
+        if movement_type == "army":
+            if has_river == True and (has_road == False and has_holding == False):
+                return float('inf')
+            if terrain == "Mountains" or terrain == "The Wall":
+                return 3 if has_road or has_holding else float('inf')
+            if terrain == "Sea":
+                return float('inf')
+            terrain_costs = {"Hills": 2, "Swamp": 2, "Desert": 1,
+                             "Forest": 2, "Dense Forest": 3, "Snow": 1,
+                             "Snowy Forest": 3, "Plains": 1, "Coast": 1,
+                             "Island": 1, "Peninsula": 1}
+            return terrain_costs.get(terrain, 1)
+
+        if movement_type == "fleet" and terrain in ["Sea", "Coast", "Island", "Peninsula"]:
+            return 1
+        return float('inf')
+
+    def get_neighbors(self, movement_type, hex_id, avoid_hexes):
+        hex_map = self.hex_map
+        column_index, row = self.hex_to_coordinates(hex_id)
+        neighbors = []
+
+        # Hex grid movement offsets based on column parity
+        offsets = [
+            (-1, 0), (1, 0),  # Left, Right
+            (0, -1), (0, 1),  # Top, Bottom
+            (-1, 1) if column_index % 2 == 0 else (-1, -1),  # Top-left / Bottom-left
+            (1, 1) if column_index % 2 == 0 else (1, -1),  # Top-right / Bottom-right
+        ]
+
+        for dx, dy in offsets:
+            neighbor_col = HexIdCodec.index_to_column(column_index + dx)
+            neighbor_row = row + dy
+            if neighbor_col is None or neighbor_row < 0:
+                continue
+            neighbor_id = f"{neighbor_col}{neighbor_row:02d}"
+
+            if neighbor_id in hex_map and neighbor_id not in avoid_hexes:
+                neighbor_hex = hex_map[neighbor_id]
+                if self.terrain_movement_cost(movement_type, neighbor_hex) == float('inf'):
+                    continue
+
+                # Prevent direct fleet movement through Peninsulas
+                if movement_type == "fleet":
+                    current_terrain = hex_map[hex_id]["Terrain"]
+                    neighbor_terrain = neighbor_hex["Terrain"]
+                    if current_terrain == "Peninsula" or neighbor_terrain == "Peninsula":
+                        if (current_terrain in ["Sea", "Coast", "Island", "Peninsula"] and
+                                neighbor_terrain in ["Sea", "Coast", "Island", "Peninsula"]):
+                            continue  # Disallow direct hop through/into peninsula tile
+
+                neighbors.append(neighbor_id)
+
+        return neighbors
+
+    def hex_to_coordinates(self, hex_id):
+        column_part, row_part = HexIdCodec.split_hex_id(hex_id)
+        return HexIdCodec.column_to_index(column_part), int(row_part)
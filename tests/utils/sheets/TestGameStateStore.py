@@ -0,0 +1,216 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from utils.sheets.GameStateStore import GameStateStore
+from utils.sheets.LocalSheetUtils import LocalSheetUtils
+import settings as settings
+
+
+class CountingSheetUtils(LocalSheetUtils):
+    def __init__(self, directory):
+        super().__init__()
+        self.DIR = directory
+        self.reads = []
+        self.writes = []
+        self.row_updates = []
+
+    def get_sheet_by_name(self, sheet_name):
+        self.reads.append(sheet_name)
+        return super().get_sheet_by_name(sheet_name)
+
+    def update_sheet_by_name(self, sheet_name, updated_data):
+        self.writes.append(sheet_name)
+        return super().update_sheet_by_name(sheet_name, updated_data)
+
+    def update_many(self, sheet_name, key_column, changes):
+        self.writes.append(sheet_name)
+        self.row_updates.append((sheet_name, changes))
+        return super().update_many(sheet_name, key_column, changes)
+
+
+class TestGameStateStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        pd.DataFrame([
+            ["1_1", "<@1>", "AB01", "Stationary", 3],
+            ["2_2", "<@2>", "AB02", "Moving", 5],
+        ], columns=["Army UID", "Player", "Current Hex", "Status", "Men"]).to_csv(
+            os.path.join(self.directory.name, "Armies.csv"), index=False)
+        pd.DataFrame([["Unpaused"]], columns=["Game Status"]).to_csv(
+            os.path.join(self.directory.name, "Status.csv"), index=False)
+        pd.DataFrame([["1_1", "Siege", 180]], columns=["Army UID", "Status", "Status Timer"]).to_csv(
+            os.path.join(self.directory.name, "StatusTimers.csv"), index=False)
+
+        self.previous_sheet_utils = GameStateStore.sheet_utils
+        GameStateStore.invalidate()
+        GameStateStore.sheet_utils = self.sheet_utils = CountingSheetUtils(self.directory.name)
+        self.store = GameStateStore()
+
+    def tearDown(self):
+        GameStateStore.invalidate()
+        GameStateStore.sheet_utils = self.previous_sheet_utils
+        self.directory.cleanup()
+
+    def read_back(self, sheet_name):
+        return pd.read_csv(os.path.join(self.directory.name, f"{sheet_name}.csv"))
+
+    def test_changes_stay_in_memory_until_flushed(self):
+        self.assertTrue(self.store.update_fields("StatusTimers", "1_1", {"Status Timer": 179.0}))
+        self.assertEqual(179, self.store.get_row("StatusTimers", "1_1")["Status Timer"])
+        self.assertEqual(180, self.read_back("StatusTimers")["Status Timer"][0])
+        self.assertEqual(["StatusTimers"], self.sheet_utils.reads)
+
+        self.store.get_sheet_by_name("Status")
+        self.assertTrue(self.store.flush())
+        # Only the changed sheet is written, and only once.
+        self.assertEqual(["StatusTimers"], self.sheet_utils.writes)
+        self.assertTrue(self.store.flush())
+        self.assertEqual(["StatusTimers"], self.sheet_utils.writes)
+
+        timers = self.read_back("StatusTimers")
+        self.assertEqual([179], list(timers["Status Timer"]))
+        self.assertEqual("int64", str(timers["Status Timer"].dtype))
+
+    def restart(self):
+        """Drops everything in memory, like the bot starting again on the same files."""
+        GameStateStore.invalidate()
+        GameStateStore.sheet_utils = self.sheet_utils = CountingSheetUtils(self.directory.name)
+        return GameStateStore()
+
+    def test_journal_is_replayed_onto_the_snapshot(self):
+        self.store.update_fields("Armies", "1_1", {"Current Hex": "AB03"})
+        self.store.write_to_row("Armies", ["3_3", "<@3>", "AB04", "Stationary", 7])
+        self.store.delete_row("Armies", "2_2")
+        self.assertTrue(self.store.flush())
+        # Row changes go to the journal, the CSV snapshot is left alone.
+        self.assertEqual([], self.sheet_utils.writes)
+        self.assertEqual(["AB01", "AB02"], list(self.read_back("Armies")["Current Hex"]))
+
+        # A crash half way through writing an entry only loses that entry.
+        with open(os.path.join(self.directory.name, "Armies.journal"), "a") as journal:
+            journal.write('{"op": "delete", "key": "1')
+
+        store = self.restart()
+        self.assertEqual(["1_1", "3_3"], list(store.get_sheet_by_name("Armies")["Army UID"]))
+        self.assertEqual("AB03", store.get_row("Armies", "1_1")["Current Hex"])
+        self.assertEqual(7, store.get_row("Armies", "3_3")["Men"])
+
+    def test_journal_is_compacted_past_the_threshold(self):
+        threshold = settings.JournalCompactionThreshold
+        settings.JournalCompactionThreshold = 3
+        try:
+            for men in range(1, 4):
+                self.store.update_fields("Armies", "2_2", {"Men": men})
+            self.assertTrue(self.store.flush())
+        finally:
+            settings.JournalCompactionThreshold = threshold
+
+        self.assertEqual(["Armies"], self.sheet_utils.writes)
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, "Armies.journal")))
+        self.assertEqual([3, 3], list(self.read_back("Armies")["Men"]))
+        self.assertEqual(3, self.restart().get_row("Armies", "2_2")["Men"])
+
+    def test_replacing_a_journaled_sheet_resets_its_journal(self):
+        self.store.update_fields("Armies", "1_1", {"Status": "Moving"})
+        self.store.update_sheet_by_name("Armies", [["Army UID", "Status"], ["5_5", "Stationary"]])
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, "Armies.journal")))
+        self.assertEqual(["5_5"], list(self.restart().get_sheet_by_name("Armies")["Army UID"]))
+
+    def test_unchanged_values_do_not_dirty_the_sheet(self):
+        self.store.update_fields("Armies", "2_2", {"Status": "Moving", "Men": 5.0})
+        self.assertFalse(self.store.is_dirty("Armies"))
+        self.assertFalse(self.store.update_fields("Armies", "9_9", {"Status": "Moving"}))
+
+    def test_rows_keep_their_types_and_indexes(self):
+        self.store.write_to_row("Armies", ["3_3", "<@1>", "AB04", "Stationary", "7"])
+        self.assertEqual(7, self.store.get_row("Armies", "3_3")["Men"])
+        self.assertEqual(["1_1", "3_3"], [row["Army UID"] for row in self.store.find_rows("Armies", "Player", "<@1>")])
+
+        self.store.update_fields("Armies", "3_3", {"Player": "<@2>"})
+        self.assertEqual(["1_1"], [row["Army UID"] for row in self.store.find_rows("Armies", "Player", "<@1>")])
+        self.assertTrue(self.store.delete_row("Armies", "1_1"))
+        self.assertFalse(self.store.delete_row("Armies", "1_1"))
+        self.assertEqual([], self.store.find_rows("Armies", "Player", "<@1>"))
+
+        df = self.store.get_sheet_by_name("Armies")
+        self.assertEqual(["2_2", "3_3"], list(df["Army UID"]))
+        self.assertEqual("int64", str(df["Men"].dtype))
+
+    def test_update_runs_again_when_the_sheet_changed_meanwhile(self):
+        calls = []
+
+        def add_men(rows):
+            calls.append([row["Men"] for row in rows])
+            if len(calls) == 1:
+                # Another command changes the sheet while this one is working out its change.
+                self.store.update_fields("Armies", "1_1", {"Men": 10})
+            return {row["Army UID"]: {"Men": row["Men"] + 1} for row in rows}
+
+        self.assertTrue(self.store.update("Armies", add_men))
+        self.assertEqual([[3, 5], [10, 5]], calls)
+        self.assertEqual([11, 6], list(self.store.get_sheet_by_name("Armies")["Men"]))
+
+    def test_update_against_an_outdated_version_sees_the_current_rows(self):
+        df, version = self.store.get_sheet_and_version("Armies")
+        self.store.update_fields("Armies", "2_2", {"Status": "Stationary"})
+        seen = []
+        self.assertTrue(self.store.update("Armies", lambda rows: seen.extend(row["Status"] for row in rows) or {}, version))
+        self.assertEqual(["Stationary", "Stationary"], seen)
+        self.assertEqual(version + 1, self.store.get_sheet_and_version("Armies")[1])
+        self.assertFalse(self.store.update("Armies", lambda rows: None))
+
+    def test_update_gives_up_when_the_sheet_keeps_changing(self):
+        def always_conflicting(rows):
+            self.store.update_fields("Armies", "1_1", {"Men": rows[0]["Men"] + 1})
+            return {}
+
+        self.assertFalse(self.store.update("Armies", always_conflicting))
+        self.assertEqual(3 + GameStateStore.UPDATE_RETRIES, self.store.get_row("Armies", "1_1")["Men"])
+
+    def test_cell_changes_are_flushed_row_by_row(self):
+        self.store.update_fields("StatusTimers", "1_1", {"Status Timer": 150})
+        self.store.update_fields("StatusTimers", "1_1", {"Status Timer": 120})
+        self.assertTrue(self.store.flush())
+        self.assertEqual([("StatusTimers", {"1_1": {"Status Timer": 120}})], self.sheet_utils.row_updates)
+        self.assertEqual([120], list(self.read_back("StatusTimers")["Status Timer"]))
+
+        # Adding a row needs the whole sheet written.
+        self.store.write_to_row("StatusTimers", ["2_2", "Siege", 60])
+        self.assertTrue(self.store.flush())
+        self.assertEqual(1, len(self.sheet_utils.row_updates))
+        self.assertEqual(["StatusTimers", "StatusTimers"], self.sheet_utils.writes)
+        self.assertEqual(["1_1", "2_2"], list(self.read_back("StatusTimers")["Army UID"]))
+
+        self.assertTrue(self.store.update_fields("Status", "Unpaused", {"Game Status": "Paused"}))
+        self.assertTrue(self.store.flush())
+        self.assertEqual(("Status", {"Unpaused": {"Game Status": "Paused"}}), self.sheet_utils.row_updates[-1])
+        self.assertEqual(["Paused"], list(self.read_back("Status")["Game Status"]))
+
+    def test_fractional_minutes_per_hex_survive_a_reload(self):
+        pd.DataFrame([["9_1", "1_1", "", "", 30, 30, 0]], columns=[
+            "Movement UID", "Army UID", "Navy", "Siege", "Base Minutes per Hex",
+            "Terrain Mod Minutes per Hex", "Minutes since last Hex"
+        ]).to_csv(os.path.join(self.directory.name, "Movements.csv"), index=False)
+        self.assertTrue(self.store.update_fields("Movements", "9_1", {"Terrain Mod Minutes per Hex": 32.5}))
+        self.assertTrue(self.store.update_sheet_by_name("Movements", self.store.get_sheet_by_name("Movements")))
+
+        df = self.restart().get_sheet_by_name("Movements")
+        self.assertEqual([32.5], list(df["Terrain Mod Minutes per Hex"]))
+        self.assertEqual("float64", str(df["Terrain Mod Minutes per Hex"].dtype))
+        self.assertEqual("Int64", str(df["Base Minutes per Hex"].dtype))
+        self.assertEqual(["1_1"], list(df["Army UID"]))
+        self.assertEqual("object", str(df["Navy"].dtype))
+
+    def test_replacing_a_sheet_reads_values_like_a_csv(self):
+        self.store.update_sheet_by_name("Status", [["Game Status"], ["Paused"]])
+        self.assertEqual("Paused", self.store.get_sheet_by_name("Status").iloc[0, 0])
+
+        self.store.update_sheet_by_name("Armies", [["Army UID", "Men"], ["4_4", "12"]])
+        self.assertEqual(12, self.store.get_row("Armies", "4_4")["Men"])
+        self.assertTrue(self.store.flush())
+        self.assertEqual(["Paused"], list(self.read_back("Status")["Game Status"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
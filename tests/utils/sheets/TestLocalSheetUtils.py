@@ -0,0 +1,99 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+import pandas as pd
+from filelock import FileLock
+from utils.sheets.LocalSheetUtils import LocalSheetUtils
+
+
+class TestLocalSheetUtils(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sheet_utils = LocalSheetUtils()
+        self.sheet_utils.DIR = self.directory.name
+        self.sheet_name = f"Seasons{id(self)}"
+        self.file_path = os.path.join(self.directory.name, f"{self.sheet_name}.csv")
+        pd.DataFrame([["army", 45]], columns=["Army Type", "Spring"]).to_csv(self.file_path, index=False)
+
+    def tearDown(self):
+        self.sheet_utils.invalidate_cache(self.sheet_name)
+        self.directory.cleanup()
+
+    def stats(self):
+        return LocalSheetUtils.cache_stats()[self.sheet_name]
+
+    def test_unchanged_sheet_is_read_from_the_cache(self):
+        first = self.sheet_utils.get_sheet_by_name(self.sheet_name)
+        first.loc[0, "Spring"] = 0
+        second = self.sheet_utils.get_sheet_by_name(self.sheet_name)
+        # Changing a returned DataFrame does not change the cached one.
+        self.assertEqual(45, second.loc[0, "Spring"])
+        self.assertEqual({"hits": 1, "misses": 1, "hit_rate": 0.5}, self.stats())
+
+    def test_writes_are_seen_by_the_next_read(self):
+        self.sheet_utils.get_sheet_by_name(self.sheet_name)
+        self.assertTrue(self.sheet_utils.write_to_row(self.sheet_name, ["cavalry", 30]))
+        self.assertEqual(["army", "cavalry"], list(self.sheet_utils.get_sheet_by_name(self.sheet_name)["Army Type"]))
+        self.assertTrue(self.sheet_utils.update_sheet_by_name(self.sheet_name, [["Army Type", "Spring"], ["army", 60]]))
+        self.assertEqual([60], list(self.sheet_utils.get_sheet_by_name(self.sheet_name)["Spring"]))
+        self.assertEqual(0, self.stats()["hits"])
+
+        # So is a change made to the file by something else.
+        pd.DataFrame([["army", 75]], columns=["Army Type", "Spring"]).to_csv(self.file_path, index=False)
+        os.utime(self.file_path, ns=(0, 0))
+        self.assertEqual([75], list(self.sheet_utils.get_sheet_by_name(self.sheet_name)["Spring"]))
+
+    def temp_files(self):
+        return [name for name in os.listdir(self.directory.name) if name.endswith(".tmp")]
+
+    def test_replacements_are_atomic_and_the_newest_wins(self):
+        lock = FileLock(f"{self.file_path}.lock")
+        results = []
+
+        def update(value):
+            results.append(self.sheet_utils.update_sheet_by_name(self.sheet_name, [["Army Type", "Spring"], ["army", value]]))
+
+        with lock:
+            older = threading.Thread(target=update, args=(50,))
+            older.start()
+            while len(self.temp_files()) < 1:
+                time.sleep(0.01)
+            newer = threading.Thread(target=update, args=(55,))
+            newer.start()
+            while len(self.temp_files()) < 2:
+                time.sleep(0.01)
+            # Both are serialized and waiting on the lock, readers still see the old sheet.
+            self.assertEqual([45], list(self.sheet_utils.get_sheet_by_name(self.sheet_name)["Spring"]))
+        older.join()
+        newer.join()
+
+        self.assertEqual([True, True], results)
+        self.assertEqual([55], list(self.sheet_utils.get_sheet_by_name(self.sheet_name)["Spring"]))
+        self.assertEqual([], self.temp_files())
+
+    def test_keyed_updates_only_write_when_something_changed(self):
+        self.sheet_utils.update_sheet_by_name("Armies", [
+            ["Army UID", "Player", "Status", "Men"],
+            ["1_1", "<@1>", "Stationary", 3],
+            ["2_2", "<@2>", "Moving", 5],
+        ])
+        self.assertTrue(self.sheet_utils.update_fields("Armies", "Army UID", " 1_1", {"Status": "Siege"}))
+        self.assertFalse(self.sheet_utils.update_fields("Armies", "Army UID", "9_9", {"Status": "Siege"}))
+        self.assertEqual(2, self.sheet_utils.update_many("Armies", "Player", {"<@1>": {"Men": 4}, "<@2>": {"Men": 6}}))
+        self.assertEqual(0, self.sheet_utils.update_many("Armies", "Nope", {"1_1": {"Men": 4}}))
+
+        armies = pd.read_csv(os.path.join(self.directory.name, "Armies.csv"))
+        self.assertEqual(["Siege", "Moving"], list(armies["Status"]))
+        self.assertEqual([4, 6], list(armies["Men"]))
+
+        # Setting values the rows already have leaves the file alone.
+        os.utime(os.path.join(self.directory.name, "Armies.csv"), ns=(0, 0))
+        self.assertTrue(self.sheet_utils.update_fields("Armies", "Army UID", "2_2", {"Status": "Moving", "Men": 6.0}))
+        self.assertEqual(0, os.stat(os.path.join(self.directory.name, "Armies.csv")).st_mtime_ns)
+        self.sheet_utils.invalidate_cache("Armies")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from utils.sheets.HexRecord import HexRecord
+from utils.sheets.MapStore import MapStore
+
+
+class TestMapStore(unittest.TestCase):
+    def test_rows_are_normalised_into_records(self):
+        store = MapStore([
+            {"Hex": "AB00", "Terrain": "Sea", "Holding Name": "FALSE", "Road": "FALSE", "River": False},
+            {"Hex": "AB01", "Terrain": "Plains", "Holding Name": "Lisbon", "Road": "TRUE", "River": True},
+        ], version=3)
+        self.assertEqual(3, store.version)
+        self.assertEqual(2, len(store))
+
+        sea, lisbon = store.get("AB00"), store.get("AB01")
+        self.assertIsNone(sea.holding_name)
+        # Holdings are looked up by name, but the movement rules count any filled-in cell.
+        self.assertTrue(sea.holding_cell)
+        self.assertFalse(HexRecord.from_row({"Hex": "AB02", "Terrain": "Sea", "Holding Name": False}).holding_cell)
+        self.assertFalse(sea.road or sea.river)
+        self.assertEqual("Lisbon", lisbon.holding_name)
+        self.assertTrue(lisbon.road and lisbon.river)
+        self.assertIs(lisbon, store[1])
+        self.assertIsNone(store.get("ZZ99"))
+
+    def test_records_have_no_instance_dict(self):
+        record = HexRecord("AB00", "Sea")
+        self.assertFalse(hasattr(record, "__dict__"))
+
+
+if __name__ == "__main__":
+    unittest.main()
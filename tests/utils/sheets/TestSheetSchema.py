@@ -0,0 +1,32 @@
+import io
+import unittest
+import pandas as pd
+from utils.sheets.SheetSchema import SheetSchema
+
+
+class TestSheetSchema(unittest.TestCase):
+    def test_columns_get_their_declared_types(self):
+        df = SheetSchema.read_csv("StatusTimers", io.StringIO("Army UID,Status,Status Timer\n0012,Siege,180\n13,Siege,\n"))
+        self.assertEqual(["0012", "13"], list(df["Army UID"]))
+        self.assertEqual("category", str(df["Status"].dtype))
+        self.assertEqual("Int64", str(df["Status Timer"].dtype))
+        self.assertTrue(pd.isna(df["Status Timer"][1]))
+
+    def test_values_that_do_not_fit_only_cost_their_column_its_type(self):
+        df = SheetSchema.read_csv("StatusTimers", io.StringIO("Army UID,Status,Status Timer\n12,Siege,soon\n"))
+        self.assertEqual(["soon"], list(df["Status Timer"]))
+        self.assertEqual(["12"], list(df["Army UID"]))
+        self.assertEqual("category", str(df["Status"].dtype))
+
+    def test_frames_built_in_memory_are_typed_like_a_read(self):
+        df = pd.DataFrame({"Army UID": [12, None], "Status": ["Siege", "Siege"], "Status Timer": [180.0, None], "Other": [1, 2]})
+        df = SheetSchema.apply("StatusTimers", df)
+        self.assertEqual("12", df["Army UID"][0])
+        self.assertTrue(pd.isna(df["Army UID"][1]))
+        self.assertEqual("category", str(df["Status"].dtype))
+        self.assertEqual([180, pd.NA], list(df["Status Timer"]))
+        self.assertEqual("int64", str(df["Other"].dtype))
+
+
+if __name__ == "__main__":
+    unittest.main()
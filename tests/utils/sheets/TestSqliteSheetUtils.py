@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import pandas as pd
+from utils.sheets.GameStateStore import GameStateStore
+from utils.sheets.SqliteSheetUtils import SqliteSheetUtils
+
+
+class TestSqliteSheetUtils(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        pd.DataFrame([
+            ["1_1", "<@1>", "AB01", "Stationary", 3, None],
+            ["2_2", "<@2>", "AB02", "Moving", 5, None],
+        ], columns=["Army UID", "Player", "Current Hex", "Status", "Men", "Notes"]).to_csv(
+            os.path.join(self.directory.name, "Armies.csv"), index=False)
+        self.sheet_utils = SqliteSheetUtils()
+        self.sheet_utils.DIR = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_sheet_is_imported_from_csv_on_first_read(self):
+        df = self.sheet_utils.get_sheet_by_name("Armies")
+        self.assertEqual(["1_1", "2_2"], list(df["Army UID"]))
+        self.assertEqual("int64", str(df["Men"].dtype))
+        self.assertTrue(df["Notes"].isna().all())
+        self.assertIsNone(self.sheet_utils.get_sheet_by_name("Missing"))
+
+        with sqlite3.connect(self.sheet_utils.database_path()) as connection:
+            self.assertEqual("wal", connection.execute("PRAGMA journal_mode").fetchone()[0])
+            indexes = {row[1] for row in connection.execute('PRAGMA index_list("Armies")')}
+        self.assertEqual({"Armies_Army UID", "Armies_Player"}, indexes)
+
+    def test_rows_are_read_and_changed_by_key(self):
+        self.assertTrue(self.sheet_utils.write_rows("Armies", [["3_3", "<@3>", "AB04", "Stationary", 7, None]]))
+        self.assertTrue(self.sheet_utils.update_fields("Armies", "Army UID", " 3_3", {"Current Hex": "AB05", "Men": 6}))
+        self.assertEqual("AB05", self.sheet_utils.get_row("Armies", "3_3")["Current Hex"])
+        self.assertFalse(self.sheet_utils.update_fields("Armies", "Army UID", "9_9", {"Men": 1}))
+        self.assertEqual(2, self.sheet_utils.update_many("Armies", "Player", {"<@1>": {"Men": 4}, "<@3>": {"Status": "Moving"}}))
+        self.assertEqual("Moving", self.sheet_utils.get_row("Armies", "3_3")["Status"])
+
+        self.assertTrue(self.sheet_utils.delete_row("Armies", "1_1"))
+        self.assertFalse(self.sheet_utils.delete_row("Armies", "1_1"))
+        self.assertIsNone(self.sheet_utils.get_row("Armies", "1_1"))
+
+        path = os.path.join(self.directory.name, "Export.csv")
+        self.assertTrue(self.sheet_utils.export_csv("Armies", path))
+        exported = pd.read_csv(path)
+        self.assertEqual(["2_2", "3_3"], list(exported["Army UID"]))
+        self.assertEqual([5, 6], list(exported["Men"]))
+
+    def test_game_state_store_writes_row_changes_through(self):
+        previous_sheet_utils = GameStateStore.sheet_utils
+        GameStateStore.invalidate()
+        GameStateStore.sheet_utils = self.sheet_utils
+        try:
+            store = GameStateStore()
+            store.update_fields("Armies", "1_1", {"Status": "Moving"})
+            store.write_to_row("Armies", ["3_3", "<@3>", "AB04", "Stationary", 7, None])
+            store.delete_row("Armies", "2_2")
+            self.assertTrue(store.flush())
+
+            self.assertEqual("Moving", self.sheet_utils.get_row("Armies", "1_1")["Status"])
+            self.assertEqual(7, self.sheet_utils.get_row("Armies", "3_3")["Men"])
+            self.assertIsNone(self.sheet_utils.get_row("Armies", "2_2"))
+            self.assertFalse(os.path.exists(os.path.join(self.directory.name, "Armies.journal")))
+        finally:
+            GameStateStore.invalidate()
+            GameStateStore.sheet_utils = previous_sheet_utils
+
+
+if __name__ == "__main__":
+    unittest.main()